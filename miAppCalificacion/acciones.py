@@ -0,0 +1,72 @@
+# miAppCalificacion/acciones.py
+"""
+Acciones masivas sobre CalificacionTributaria: cambio de estado y eliminación.
+
+Las usan el listado (views.acciones_masivas) y el admin. Cada acción es un INSERT ...
+SELECT al histórico más un único UPDATE o DELETE, sin importar cuántas filas abarque
+el queryset, y sin cargar las filas en memoria.
+"""
+
+from django.db import transaction
+from django.db.models import BigIntegerField, CharField, DateTimeField, Value
+from django.utils import timezone
+
+from .models import CalificacionHistorico, CalificacionTributaria
+from .utils import eliminar_desde_queryset, insertar_desde_queryset
+from .versiones import incrementar_version, TABLA_CALIFICACIONES
+
+
+def largo_maximo_estado():
+    return CalificacionTributaria._meta.get_field('estado').max_length
+
+
+def registrar_historico(calificaciones, accion, usuario, estado_nuevo=''):
+    """Copia al histórico las calificaciones afectadas con un solo INSERT ... SELECT."""
+    filas = calificaciones.order_by().annotate(
+        _accion=Value(accion, output_field=CharField()),
+        _estado_nuevo=Value(estado_nuevo, output_field=CharField()),
+        _usuario=Value(usuario.pk, output_field=BigIntegerField()),
+        _fecha=Value(timezone.now(), output_field=DateTimeField()),
+    ).values_list(
+        'pk', 'empresa_subsidiaria_id', 'fecha_inicio_periodo', 'monto_impuesto',
+        '_accion', 'estado', '_estado_nuevo', '_usuario', '_fecha',
+    )
+    return insertar_desde_queryset(CalificacionHistorico, [
+        'calificacion_id', 'empresa_subsidiaria', 'fecha_inicio_periodo', 'monto_impuesto',
+        'accion', 'estado_anterior', 'estado_nuevo', 'usuario', 'modified_at',
+    ], filas)
+
+
+def cambiar_estado(calificaciones, estado_nuevo, usuario):
+    """Cambia el estado de todas las calificaciones del queryset. Retorna cuántas cambiaron."""
+    with transaction.atomic():
+        registrar_historico(calificaciones, CalificacionHistorico.ACCION_ESTADO, usuario, estado_nuevo)
+        # update() no pasa por auto_now: la marca de modificación se asigna explícitamente
+        total = calificaciones.update(estado=estado_nuevo, usuario_modificador=usuario, actualizado_en=timezone.now())
+    # update() no dispara señales: se invalida la caché del listado explícitamente
+    incrementar_version(TABLA_CALIFICACIONES)
+    return total
+
+
+def eliminar(calificaciones, usuario):
+    """
+    Elimina todas las calificaciones del queryset.
+
+    Retorna (cantidad eliminada, advertencia o None si el snapshot de factores se actualizó).
+    """
+    pks_con_factores = list(calificaciones.filter(ejercicio__isnull=False).values_list('pk', flat=True))
+    with transaction.atomic():
+        registrar_historico(calificaciones, CalificacionHistorico.ACCION_ELIMINACION, usuario)
+        # queryset.delete() cargaría cada fila en memoria: hay receptores de post_delete
+        total = eliminar_desde_queryset(calificaciones)
+    incrementar_version(TABLA_CALIFICACIONES)
+
+    advertencia = None
+    if pks_con_factores:
+        try:
+            from . import matriz_factores
+            if matriz_factores.version_actual():
+                matriz_factores.actualizar_snapshot(pks_con_factores)
+        except Exception as e:
+            advertencia = f'No se pudo actualizar el snapshot de factores: {e}'
+    return total, advertencia
@@ -1,3 +1,141 @@
-from django.contrib import admin
+from datetime import date
 
-# Register your models here.
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.template.response import TemplateResponse
+
+from . import acciones
+from .models import CalificacionTributaria, EmpresaSubsidiaria, TasaDeCambio, ViolacionRegla
+from .utils import PaginadorEstimado
+
+# Años que ofrece el filtro por ejercicio (la ley exige conservar diez)
+ANIOS_FILTRO = 10
+
+
+class AdminTablaGrande(admin.ModelAdmin):
+    """
+    Base para los admins de tablas con millones de filas.
+
+    El total de la lista es estimado (PaginadorEstimado) y se omite el COUNT(*) sin
+    filtros que el admin hace para mostrar "N en total". Cada subclase debe precargar
+    con list_select_related las FK que muestra, usar autocomplete_fields para las FK
+    editables y filtrar o buscar sólo por columnas indexadas.
+    """
+    paginator = PaginadorEstimado
+    show_full_result_count = False
+    list_per_page = 50
+
+
+class EjercicioFilter(admin.SimpleListFilter):
+    """Filtro por año de inicio del periodo; las opciones son fijas, sin consultar la tabla."""
+    title = 'ejercicio (inicio del periodo)'
+    parameter_name = 'ejercicio'
+
+    def lookups(self, request, model_admin):
+        anio = date.today().year
+        return [(str(a), str(a)) for a in range(anio, anio - ANIOS_FILTRO, -1)]
+
+    def queryset(self, request, queryset):
+        if not (self.value() or '').isdigit():
+            return queryset
+        anio = int(self.value())
+        # Rango sobre la columna (índice calif_fecha_inicio_idx y, si existe, la partición del año)
+        return queryset.filter(fecha_inicio_periodo__gte=date(anio, 1, 1), fecha_inicio_periodo__lt=date(anio + 1, 1, 1))
+
+
+@admin.register(CalificacionTributaria)
+class CalificacionTributariaAdmin(AdminTablaGrande):
+    list_display = (
+        'id', 'empresa_subsidiaria', 'fecha_inicio_periodo', 'fecha_fin_periodo',
+        'monto_impuesto', 'estado', 'origen', 'usuario_creador',
+    )
+    list_select_related = ('empresa_subsidiaria', 'usuario_creador')
+    list_filter = (EjercicioFilter,)
+    # Búsqueda por prefijo: usa los índices UPPER(...) de las migraciones *_indices_prefijo
+    search_fields = ('^empresa_subsidiaria__nombre_legal', '^empresa_subsidiaria__identificacion_fiscal')
+    search_help_text = 'Nombre legal o ID fiscal de la subsidiaria (comienza con).'
+    autocomplete_fields = ('empresa_subsidiaria', 'usuario_creador', 'usuario_modificador')
+    ordering = ('-pk',)
+    actions = ('cambiar_estado', 'eliminar_en_bloque')
+
+    def get_actions(self, request):
+        # delete_selected carga cada fila para las señales; eliminar_en_bloque hace un solo DELETE
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    def _confirmar(self, request, queryset, accion, titulo, pedir_estado=False):
+        return TemplateResponse(request, 'admin/miAppCalificacion/accion_masiva.html', {
+            **self.admin_site.each_context(request),
+            'title': titulo,
+            'opts': self.model._meta,
+            'accion': accion,
+            'pedir_estado': pedir_estado,
+            'largo_estado': acciones.largo_maximo_estado(),
+            # Con "seleccionar todas" el alcance es el filtro vigente: no se listan ni cuentan las filas
+            'seleccion': request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+            'todas': request.POST.get('select_across') == '1',
+            'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+        })
+
+    @admin.action(description='Cambiar el estado de las calificaciones seleccionadas', permissions=['change'])
+    def cambiar_estado(self, request, queryset):
+        if 'aplicar' in request.POST:
+            estado_nuevo = (request.POST.get('estado_nuevo') or '').strip()
+            if estado_nuevo and len(estado_nuevo) <= acciones.largo_maximo_estado():
+                total = acciones.cambiar_estado(queryset, estado_nuevo, request.user)
+                self.message_user(request, f'{total} calificaciones cambiaron al estado "{estado_nuevo}".')
+                return None
+            self.message_user(
+                request, f'Debe indicar un estado de hasta {acciones.largo_maximo_estado()} caracteres.', messages.ERROR
+            )
+        return self._confirmar(request, queryset, 'cambiar_estado', 'Cambiar estado', pedir_estado=True)
+
+    @admin.action(description='Eliminar las calificaciones seleccionadas (en bloque)', permissions=['delete'])
+    def eliminar_en_bloque(self, request, queryset):
+        if 'aplicar' in request.POST:
+            total, advertencia = acciones.eliminar(queryset, request.user)
+            if advertencia:
+                self.message_user(request, advertencia, messages.WARNING)
+            self.message_user(request, f'{total} calificaciones eliminadas.')
+            return None
+        return self._confirmar(request, queryset, 'eliminar_en_bloque', 'Eliminar calificaciones')
+
+
+@admin.register(EmpresaSubsidiaria)
+class EmpresaSubsidiariaAdmin(AdminTablaGrande):
+    list_display = ('nombre_legal', 'identificacion_fiscal', 'regimen_fiscal', 'pais_operacion')
+    list_select_related = ('pais_operacion',)
+    # Los países son pocos: el filtro lista la tabla completa sin costo
+    list_filter = ('pais_operacion',)
+    search_fields = ('^nombre_legal', '^identificacion_fiscal')
+    search_help_text = 'Nombre legal o ID fiscal (comienza con).'
+    autocomplete_fields = ('pais_operacion',)
+    ordering = ('nombre_legal',)
+
+
+@admin.register(TasaDeCambio)
+class TasaDeCambioAdmin(AdminTablaGrande):
+    list_display = ('fecha', 'moneda_origen', 'moneda_destino', 'valor_tasa')
+    list_select_related = ('moneda_origen', 'moneda_destino')
+    # Par de monedas + fecha es el índice único de la tabla
+    list_filter = ('moneda_origen', 'moneda_destino')
+    autocomplete_fields = ('moneda_origen', 'moneda_destino')
+    ordering = ('-pk',)
+
+
+@admin.register(ViolacionRegla)
+class ViolacionReglaAdmin(AdminTablaGrande):
+    """Reporte de revalidar_calificaciones (sólo lectura)."""
+    list_display = ('calificacion_id', 'regla', 'valor', 'empresa_subsidiaria', 'revalidacion')
+    list_select_related = ('empresa_subsidiaria', 'revalidacion')
+    # Índice (revalidacion, regla)
+    list_filter = ('revalidacion', 'regla')
+    search_fields = ('=calificacion_id',)
+    ordering = ('-pk',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,107 @@
+# miAppCalificacion/analitica.py
+"""
+Estadísticas de factores calculadas con NumPy sobre el snapshot columnar (matriz_factores).
+
+Todas las operaciones trabajan sobre columnas completas; los únicos ciclos en Python
+recorren las 30 columnas de factores o los grupos (empresas/ejercicios), nunca las filas.
+"""
+
+import warnings
+
+import numpy as np
+
+from .models import FACTOR_NUMEROS
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+# Cortes del histograma de la suma de factores 8 al 19; el último tramo (> 1) son filas inválidas
+CORTES_SUMA = np.array([0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.00000001, np.inf])
+
+# Factores 8 al 19 = primeras 12 columnas de la matriz
+N_FACTORES_SUMA = 12
+
+MAX_FILAS_ATIPICAS = 200
+
+
+def _a_lista(arreglo):
+    """Convierte a lista JSON-serializable reemplazando NaN por None."""
+    return [None if np.isnan(valor) else round(float(valor), 8) for valor in arreglo]
+
+
+def calcular_estadisticas(matriz, agrupar='empresa', tolerancia=0.01):
+    """
+    Calcula por grupo (empresa o ejercicio): cantidad de filas, media y percentiles de cada
+    factor, e histograma de la suma de factores 8 al 19. Además lista las filas cuya suma
+    está a menos de `tolerancia` del tope de 1.0 (o lo supera).
+    """
+    clave = matriz.empresa if agrupar == 'empresa' else matriz.ejercicio
+    factores = matriz.factores
+    grupos, inverso, conteos = np.unique(clave, return_inverse=True, return_counts=True)
+    n_grupos = len(grupos)
+
+    # Medias por grupo ignorando NaN: sumas y conteos con bincount, columna por columna
+    medias = np.empty((n_grupos, factores.shape[1]))
+    for j in range(factores.shape[1]):
+        columna = np.asarray(factores[:, j])
+        validos = ~np.isnan(columna)
+        sumas = np.bincount(inverso, weights=np.where(validos, columna, 0.0), minlength=n_grupos)
+        n_validos = np.bincount(inverso, weights=validos, minlength=n_grupos)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            medias[:, j] = sumas / n_validos
+
+    # Suma 8-19 por fila e histograma por grupo con un único bincount sobre (grupo, tramo)
+    suma = np.nansum(factores[:, :N_FACTORES_SUMA], axis=1)
+    tramos = np.searchsorted(CORTES_SUMA, suma, side='right') - 1
+    tramos = np.clip(tramos, 0, len(CORTES_SUMA) - 2)
+    n_tramos = len(CORTES_SUMA) - 1
+    histogramas = np.bincount(
+        inverso * n_tramos + tramos, minlength=n_grupos * n_tramos
+    ).reshape(n_grupos, n_tramos)
+
+    # Percentiles: se ordena una vez por grupo y cada grupo es un bloque contiguo
+    orden = np.argsort(inverso, kind='stable')
+    limites = np.concatenate(([0], np.cumsum(conteos)))
+    resultado_grupos = []
+    for g in range(n_grupos):
+        filas = np.sort(orden[limites[g]:limites[g + 1]])
+        bloque = factores[filas]
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            percentiles = np.nanpercentile(bloque, PERCENTILES, axis=0)
+        resultado_grupos.append({
+            'grupo': int(grupos[g]),
+            'filas': int(conteos[g]),
+            'medias': dict(zip(
+                (f'factor_{i}' for i in FACTOR_NUMEROS), _a_lista(medias[g])
+            )),
+            'percentiles': {
+                f'p{p}': dict(zip((f'factor_{i}' for i in FACTOR_NUMEROS), _a_lista(fila)))
+                for p, fila in zip(PERCENTILES, percentiles)
+            },
+            'histograma_suma_8_19': histogramas[g].tolist(),
+        })
+
+    # Filas cercanas al tope (o sobre él), de mayor a menor suma
+    cercanas = np.flatnonzero(suma >= 1.0 - tolerancia)
+    cercanas = cercanas[np.argsort(-suma[cercanas], kind='stable')]
+    atipicas = [
+        {
+            'id': int(matriz.ids[i]),
+            'empresa': int(matriz.empresa[i]),
+            'ejercicio': int(matriz.ejercicio[i]),
+            'suma_8_19': round(float(suma[i]), 8),
+        }
+        for i in cercanas[:MAX_FILAS_ATIPICAS]
+    ]
+
+    return {
+        'version': matriz.version,
+        'agrupar': agrupar,
+        'filas': int(len(matriz)),
+        'cortes_histograma': [float(c) for c in CORTES_SUMA[:-1]],
+        'grupos': resultado_grupos,
+        'histograma_suma_8_19': np.bincount(tramos, minlength=n_tramos).tolist(),
+        'sobre_tope': int(np.count_nonzero(suma > CORTES_SUMA[-2])),
+        'cercanas_al_tope': int(len(cercanas)),
+        'filas_atipicas': atipicas,
+    }
@@ -0,0 +1,217 @@
+# miAppCalificacion/api.py
+"""
+API JSON para sistemas externos (integraciones de los corredores).
+
+Autenticación con token (`Authorization: Bearer <clave>`, ver miAppUsuario.TokenApi y el
+comando `token_api`); sin sesión, CSRF ni HTML.
+
+  - POST api/cargas/<factores|montos>/ recibe registros como NDJSON (un objeto JSON por
+    línea, Content-Type application/x-ndjson) o como JSON (una lista de objetos, o
+    {"registros": [...]}). Las llaves son los encabezados de la plantilla o sus claves
+    (ej. "Fecha Inicio" o "FECHA_INICIO"). El NDJSON se lee línea a línea mientras llega,
+    así que un cliente puede enviar un flujo largo sin que el servidor lo cargue completo.
+    Los registros se procesan en lotes de ?lote=N con la misma validación y upsert de
+    las cargas por archivo (cargas.py); la respuesta trae el resultado de cada lote.
+    Las llaves repetidas dentro de un lote se consolidan según ?duplicados=ultima|primera|rechazar.
+  - GET api/calificaciones/ lista CalificacionTributaria paginada por cursor (id
+    ascendente, ?cursor=<siguiente_cursor>&limite=N), con los filtros del listado.
+"""
+
+import hashlib
+import json
+
+from django.db.models import F
+from django.http import Http404, JsonResponse
+from django.views.decorators.http import require_GET, require_POST
+
+from miAppUsuario.models import Auditoria
+from miAppUsuario.utils import token_requerido
+from miProyecto.routers import lectura_en_replica
+
+from . import esquemas
+from .models import CalificacionTributaria, FACTOR_FIELDS
+from .utils import filtrar_calificaciones
+
+TAMANO_LOTE = 1000
+TAMANO_LOTE_MAXIMO = 5000
+LIMITE_PAGINA = 500
+LIMITE_PAGINA_MAXIMO = 5000
+
+CONTENT_TYPES_NDJSON = ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
+
+# tipo de la URL -> (esquema, nombre de la función de cargas.py, tipo de Auditoria, origen de las filas)
+TIPOS_CARGA = {
+    'factores': (esquemas.FACTOR, 'procesar_factores', Auditoria.TIPO_FACTOR, 'API Factor'),
+    'montos': (esquemas.MONTO, 'procesar_montos', Auditoria.TIPO_MONTO, 'API Monto'),
+}
+
+CAMPOS_LECTURA = (
+    'id', 'fecha_inicio_periodo', 'fecha_fin_periodo', 'monto_impuesto', 'estado', 'origen',
+    'ejercicio', 'mercado', 'instrumento', 'fecha_pago', 'secuencia', 'numero_dividendo',
+    'tipo_sociedad', 'valor_historico', 'actualizado_en',
+)
+
+
+def _entero(valor, por_defecto, maximo):
+    try:
+        return max(1, min(int(valor), maximo))
+    except (TypeError, ValueError):
+        return por_defecto
+
+
+def _lotes_ndjson(request, tamano, huella):
+    """
+    Lee el cuerpo línea a línea y entrega (número de la primera línea, registros, errores).
+
+    Una línea que no es un objeto JSON válido se informa como error de su lote y no
+    detiene la lectura.
+    """
+    registros, errores, primera = [], [], 1
+    for numero, linea in enumerate(request, start=1):
+        huella.update(linea)
+        if not linea.strip():
+            continue
+        try:
+            registro = json.loads(linea)
+            if not isinstance(registro, dict):
+                raise ValueError('se esperaba un objeto JSON')
+            registros.append(registro)
+        except ValueError as e:
+            errores.append(f'Fila {numero}: JSON inválido ({e}).')
+        if len(registros) >= tamano:
+            yield primera, registros, errores
+            registros, errores, primera = [], [], numero + 1
+    if registros or errores:
+        yield primera, registros, errores
+
+
+def _lotes_json(request, tamano, huella):
+    huella.update(request.body)
+    cuerpo = json.loads(request.body)
+    registros = cuerpo.get('registros') if isinstance(cuerpo, dict) else cuerpo
+    if not isinstance(registros, list) or not all(isinstance(registro, dict) for registro in registros):
+        raise ValueError('Se esperaba una lista de objetos JSON o {"registros": [...]}.')
+    for inicio in range(0, len(registros), tamano):
+        yield inicio + 1, registros[inicio:inicio + tamano], []
+
+
+@token_requerido(['Analista', 'Corredor'])
+@require_POST
+def cargar(request, tipo):
+    """Carga masiva de factores o montos desde NDJSON/JSON, con resultado por lote."""
+    if tipo not in TIPOS_CARGA:
+        raise Http404('Tipo de carga desconocido.')
+    esquema, funcion, tipo_auditoria, origen = TIPOS_CARGA[tipo]
+
+    if request.content_type in CONTENT_TYPES_NDJSON:
+        lector = _lotes_ndjson
+    elif request.content_type == 'application/json':
+        lector = _lotes_json
+    else:
+        return JsonResponse(
+            {'error': 'Content-Type debe ser application/x-ndjson o application/json.'}, status=415
+        )
+
+    # pandas se importa recién aquí, con la primera carga (ver importacion.py)
+    from . import cargas, importacion
+    procesar = getattr(cargas, funcion)
+    # Política para las llaves repetidas dentro de un mismo lote (por defecto IMPORTACION_DUPLICADOS)
+    duplicados = request.GET.get('duplicados') or None
+    if duplicados and duplicados not in importacion.POLITICAS_DUPLICADOS:
+        return JsonResponse(
+            {'error': f'duplicados debe ser uno de: {", ".join(importacion.POLITICAS_DUPLICADOS)}.'}, status=400
+        )
+
+    huella = hashlib.sha256()
+    auditoria = Auditoria.objects.create(
+        filename=f'API {tipo} ({request.content_type})', tipo=tipo_auditoria, usuario=request.user,
+    )
+    lotes, filas, pks = [], 0, []
+    try:
+        for numero_lote, (primera_fila, registros, errores_lectura) in enumerate(
+            lector(request, _entero(request.GET.get('lote'), TAMANO_LOTE, TAMANO_LOTE_MAXIMO), huella), start=1
+        ):
+            filas += len(registros)
+            resultado = cargas.ResultadoCarga(errores=list(errores_lectura))
+            if registros:
+                try:
+                    df = importacion.desde_registros(registros, esquema)
+                    procesado = procesar(
+                        df, request.user, origen=origen, primera_fila=primera_fila, duplicados=duplicados,
+                    )
+                except (ValueError, TypeError) as e:
+                    # Validación de todo el lote (columnas, suma de factores): no se procesó ninguna fila
+                    resultado.errores.append(str(e))
+                else:
+                    procesado.errores = resultado.errores + procesado.errores
+                    resultado = procesado
+            pks.extend(resultado.pks)
+            lotes.append({'lote': numero_lote, 'primera_fila': primera_fila, 'filas': len(registros),
+                          **resultado.como_dict()})
+    except ValueError as e:
+        # Cuerpo JSON mal formado: no hay lotes que procesar
+        auditoria.finalizar(0, 0, [str(e)])
+        return JsonResponse({'auditoria': auditoria.pk, 'error': f'JSON inválido: {e}'}, status=400)
+
+    advertencia = cargas.refrescar_snapshot(pks) if tipo == 'factores' else None
+
+    creados = sum(lote['creados'] for lote in lotes)
+    actualizados = sum(lote['actualizados'] for lote in lotes)
+    errores = [error for lote in lotes for error in lote['errores']]
+    auditoria.row_count = filas
+    auditoria.sha256 = huella.hexdigest()
+    auditoria.save(update_fields=['row_count', 'sha256'])
+    auditoria.finalizar(creados, actualizados, errores)
+
+    respuesta = {
+        'auditoria': auditoria.pk,
+        'filas': filas,
+        'creados': creados,
+        'actualizados': actualizados,
+        'errores': len(errores),
+        'consolidadas': sum(len(lote['consolidadas']) for lote in lotes),
+        'lotes': lotes,
+    }
+    if advertencia:
+        respuesta['advertencia'] = advertencia
+    return JsonResponse(respuesta)
+
+
+@token_requerido(['Analista', 'Gerente', 'Corredor'])
+@require_GET
+@lectura_en_replica
+def calificaciones(request):
+    """
+    Calificaciones en orden de id, paginadas por cursor (keyset).
+
+    A diferencia de OFFSET, cada página es una búsqueda por índice desde el último id
+    entregado, así que recorrer toda la tabla cuesta lo mismo en la primera página que
+    en la última. Acepta los filtros del listado (empresa, estado, desde, hasta) y
+    ?factores=1 para incluir los factores 8 al 37.
+    """
+    limite = _entero(request.GET.get('limite'), LIMITE_PAGINA, LIMITE_PAGINA_MAXIMO)
+    try:
+        cursor = int(request.GET.get('cursor') or 0)
+    except ValueError:
+        return JsonResponse({'error': "El parámetro 'cursor' no es válido."}, status=400)
+
+    campos = CAMPOS_LECTURA + (tuple(FACTOR_FIELDS) if request.GET.get('factores') == '1' else ())
+    filas = list(
+        filtrar_calificaciones(CalificacionTributaria.objects.all(), request.GET)
+        .filter(pk__gt=cursor)
+        .order_by('pk')
+        .values(*campos, id_fiscal_empresa=F('empresa_subsidiaria__identificacion_fiscal'))[:limite + 1]
+    )
+    # Se pide una fila extra sólo para saber si hay otra página
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        parametros = request.GET.copy()
+        parametros['cursor'] = filas[-1]['id']
+        siguiente = request.build_absolute_uri(f'{request.path}?{parametros.urlencode()}')
+
+    return JsonResponse({
+        'resultados': filas,
+        'siguiente_cursor': filas[-1]['id'] if siguiente else None,
+        'siguiente': siguiente,
+    })
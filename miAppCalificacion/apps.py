@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class MiappcalificacionConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'miAppCalificacion'
+
+    def ready(self):
+        # Registra los receptores que invalidan la caché de fragmentos
+        from . import signals  # noqa: F401
@@ -0,0 +1,86 @@
+# miAppCalificacion/archivo.py
+"""
+Archivo de periodos tributarios cerrados.
+
+La ley exige conservar diez ejercicios, pero casi todas las consultas tocan los dos
+últimos. `archivar_periodos()` mueve las calificaciones de periodos cerrados (y su
+histórico) a CalificacionArchivada / CalificacionHistoricoArchivado, de modo que la tabla
+activa y sus índices sólo contengan los periodos en uso.
+
+El traslado es por año y en bloque: un INSERT ... SELECT hacia la tabla de archivo y un
+DELETE en la tabla activa, en la misma transacción; ninguna fila pasa por Python. Si la
+tabla activa está particionada (particiones.py), la partición del año queda vacía y se
+elimina, lo que devuelve el espacio de inmediato en vez de esperar a VACUUM.
+
+El listado y la exportación leen también el archivo con ?incluir_archivo=1 (ver
+utils.incluye_archivo).
+"""
+
+from datetime import date
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import DateTimeField, Exists, OuterRef, Value
+from django.utils import timezone
+
+from . import particiones
+from .models import (
+    CalificacionArchivada, CalificacionHistorico, CalificacionHistoricoArchivado, CalificacionTributaria
+)
+from .utils import eliminar_desde_queryset, insertar_desde_queryset
+
+
+def fecha_corte(anios_vigentes, hoy=None):
+    """Primer día del ejercicio más antiguo que sigue vigente (ej. 2 años en 2026 -> 2025-01-01)."""
+    hoy = hoy or date.today()
+    return date(hoy.year - anios_vigentes + 1, 1, 1)
+
+
+def _copiar(origen, destino, queryset, columna_fecha):
+    """INSERT INTO destino SELECT <columnas de origen>, now() FROM queryset."""
+    campos = origen._meta.concrete_fields
+    filas = queryset.order_by().annotate(
+        _archivado=Value(timezone.now(), output_field=DateTimeField()),
+    ).values_list(*[campo.attname for campo in campos], '_archivado')
+    return insertar_desde_queryset(destino, [campo.name for campo in campos] + [columna_fecha], filas)
+
+
+def periodos_cerrados(corte, using=DEFAULT_DB_ALIAS):
+    """Calificaciones cuyo periodo terminó antes de `corte`."""
+    return CalificacionTributaria.objects.using(using).filter(
+        fecha_inicio_periodo__lt=corte, fecha_fin_periodo__lt=corte,
+    )
+
+
+def anios_por_archivar(corte, using=DEFAULT_DB_ALIAS):
+    return [fecha.year for fecha in periodos_cerrados(corte, using).dates('fecha_inicio_periodo', 'year')]
+
+
+def archivar_anio(anio, corte, using=DEFAULT_DB_ALIAS):
+    """
+    Mueve al archivo las calificaciones cerradas cuyo periodo comienza en `anio`.
+
+    El histórico se archiva después, para las filas del mismo año cuya calificación ya
+    no está en la tabla activa (archivada recién o eliminada antes). Retorna
+    (calificaciones archivadas, históricos archivados, pks con factores).
+    """
+    rango = {'fecha_inicio_periodo__gte': date(anio, 1, 1), 'fecha_inicio_periodo__lt': date(anio + 1, 1, 1)}
+    calificaciones = periodos_cerrados(corte, using).filter(**rango)
+
+    with transaction.atomic(using=using):
+        pks_con_factores = list(calificaciones.filter(ejercicio__isnull=False).values_list('pk', flat=True))
+        archivadas = _copiar(CalificacionTributaria, CalificacionArchivada, calificaciones, 'archivada_en')
+        # Un solo DELETE ... WHERE, sin cargar las filas por los receptores de post_delete
+        eliminar_desde_queryset(calificaciones, using)
+
+        historicos = CalificacionHistorico.objects.using(using).filter(**rango).filter(
+            ~Exists(CalificacionTributaria.objects.using(using).filter(pk=OuterRef('calificacion_id')))
+        )
+        historicos_archivados = _copiar(
+            CalificacionHistorico, CalificacionHistoricoArchivado, historicos, 'archivado_en'
+        )
+        eliminar_desde_queryset(historicos, using)
+
+    conexion = connections[using]
+    if particiones.esta_particionada(conexion):
+        particiones.eliminar_particion_vacia(conexion, anio)
+    return archivadas, historicos_archivados, pks_con_factores
@@ -0,0 +1,377 @@
+# miAppCalificacion/cargas.py
+"""
+Validación y upsert de las cargas masivas de factores (DJ 1949) y montos (DJ 1948).
+
+Reciben un DataFrame con las claves de esquemas.FACTOR / esquemas.MONTO como columnas,
+venga de un archivo (importacion.leer_archivo) o de registros JSON de la API
+(importacion.desde_registros), así que las vistas de carga y la API aplican exactamente
+las mismas reglas. Como importacion, se importa dentro de las funciones que lo usan
+para no cargar pandas al arrancar.
+"""
+
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import connections, DatabaseError, IntegrityError, router, transaction
+from django.db.models.sql import Query
+from django.utils import timezone
+
+from . import esquemas, importacion
+from .models import CalificacionTributaria, EmpresaSubsidiaria, FACTOR_FIELDS, periodo_ejercicio
+from .reglas import TOLERANCIA_SUMA
+from .versiones import incrementar_version, TABLA_CALIFICACIONES
+
+# Primer argumento de pg_advisory_xact_lock(int, int) para los bloqueos por empresa
+ESPACIO_BLOQUEO = 1948
+# Filas por INSERT ... ON CONFLICT en las cargas
+TAMANO_LOTE_UPSERT = 1000
+# Columnas que el ON CONFLICT actualiza en una fila existente de cada carga
+CAMPOS_MONTO = ['fecha_fin_periodo', 'monto_impuesto', 'estado', 'origen', 'usuario_modificador', 'actualizado_en']
+CAMPOS_FACTOR = [
+    'mercado', 'tipo_sociedad', 'valor_historico', 'origen', 'usuario_modificador', 'actualizado_en', *FACTOR_FIELDS,
+]
+# Llave de una fila de factores después de la empresa (restricción calif_factor_unica)
+CAMPOS_LLAVE_FACTOR = ('ejercicio', 'instrumento', 'fecha_pago', 'secuencia', 'numero_dividendo')
+
+
+@dataclass
+class ResultadoCarga:
+    creados: int = 0
+    actualizados: int = 0
+    errores: list = field(default_factory=list)
+    # Calificaciones creadas o actualizadas, para el refresco incremental del snapshot de factores
+    pks: list = field(default_factory=list)
+    # Filas descartadas por repetir la llave de otra fila del archivo (importacion.consolidar_duplicados)
+    consolidadas: list = field(default_factory=list)
+
+    def como_dict(self):
+        return {
+            'creados': self.creados, 'actualizados': self.actualizados, 'errores': self.errores,
+            'consolidadas': self.consolidadas,
+        }
+
+
+def _filas(df, primera_fila):
+    """
+    (número de fila para los mensajes, fila como dict) de cada fila del DataFrame.
+
+    El número sale del índice (0, 1, ... al leer), así sigue correspondiendo a la fila del
+    archivo después de consolidar los duplicados.
+    """
+    for indice, fila in zip(df.index, df.to_dict('records')):
+        yield primera_fila + indice, fila
+
+
+def _consolidar(df, esquema, duplicados, primera_fila, resultado, errores):
+    """Consolida las llaves repetidas del archivo según la política `duplicados` (o IMPORTACION_DUPLICADOS)."""
+    politica = duplicados or getattr(settings, 'IMPORTACION_DUPLICADOS', 'ultima')
+    df, consolidadas, rechazadas = importacion.consolidar_duplicados(df, esquema, politica, primera_fila)
+    resultado.consolidadas = [mensaje for _, mensaje in consolidadas]
+    errores.extend(rechazadas)
+    return df
+
+
+def _empresas(df):
+    """
+    Id de la subsidiaria de cada fila (None si su ID fiscal no existe), en el orden de df.
+
+    El ID se canoniza sobre toda la columna (importacion.canonizar_ids_fiscales) y se busca
+    con una sola consulta al índice único de identificacion_fiscal_canonica: un ID escrito
+    con otro formato que el registrado encuentra igual su subsidiaria.
+    """
+    canonicos = importacion.canonizar_ids_fiscales(df['ID_FISCAL_EMPRESA'])
+    empresas = dict(EmpresaSubsidiaria.objects.filter(
+        identificacion_fiscal_canonica__in=set(canonicos.dropna()),
+    ).values_list('identificacion_fiscal_canonica', 'pk'))
+    return [empresas.get(canonico) for canonico in canonicos.fillna('')]
+
+
+def bloquear_empresas(empresa_ids):
+    """
+    Toma, hasta el fin de la transacción en curso, un bloqueo consultivo por subsidiaria.
+
+    Dos cargas sólo se esperan si comparten alguna subsidiaria; como los bloqueos se toman
+    siempre en orden ascendente de id, no pueden quedar esperándose en ciclo (deadlock).
+    Las cargas que tocan subsidiarias distintas corren en paralelo sin esperar.
+    Fuera de PostgreSQL no hace nada (SQLite ya serializa las escrituras).
+    """
+    connection = connections[router.db_for_write(CalificacionTributaria)]
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        for empresa_id in sorted(set(empresa_ids)):
+            # Dos ids que coincidan módulo 2^31 sólo se serializan de más, no hay error
+            cursor.execute('SELECT pg_advisory_xact_lock(%s, %s)', [ESPACIO_BLOQUEO, empresa_id % 2 ** 31])
+
+
+def _restriccion(nombre):
+    return next(r for r in CalificacionTributaria._meta.constraints if r.name == nombre)
+
+
+def _upsert(objetos, restriccion, campos_actualizar):
+    """
+    INSERT ... ON CONFLICT (campos de `restriccion`) WHERE <su condición> DO UPDATE.
+
+    Las llaves de CalificacionTributaria son restricciones únicas condicionales (índices
+    parciales), y PostgreSQL y SQLite sólo las reconocen como destino del ON CONFLICT si
+    se repite su condición. bulk_create(update_conflicts=True) de Django 5.0 no la agrega,
+    por eso la sentencia se arma aquí con los mismos valores que usaría bulk_create.
+    Retorna el id de cada fila insertada o actualizada, en el orden de `objetos`.
+    """
+    opts = CalificacionTributaria._meta
+    connection = connections[router.db_for_write(CalificacionTributaria)]
+    q = connection.ops.quote_name
+    campos = [campo for campo in opts.concrete_fields if not campo.primary_key]
+
+    query = Query(CalificacionTributaria, alias_cols=False)
+    condicion, params_condicion = query.build_where(restriccion.condition).as_sql(
+        query.get_compiler(connection=connection), connection,
+    )
+    columnas = ', '.join(q(campo.column) for campo in campos)
+    llave = ', '.join(q(opts.get_field(nombre).column) for nombre in restriccion.fields)
+    actualizar = ', '.join(
+        f'{q(columna)} = EXCLUDED.{q(columna)}'
+        for columna in (opts.get_field(nombre).column for nombre in campos_actualizar)
+    )
+    fila = '(%s)' % ', '.join(['%s'] * len(campos))
+
+    ids = []
+    # SQLite limita los parámetros por sentencia; en PostgreSQL el lote va completo
+    lote = connection.ops.bulk_batch_size(campos, objetos) or len(objetos)
+    with connection.cursor() as cursor:
+        for inicio in range(0, len(objetos), lote):
+            parte = objetos[inicio:inicio + lote]
+            params = [
+                campo.get_db_prep_save(campo.pre_save(objeto, True), connection)
+                for objeto in parte for campo in campos
+            ]
+            cursor.execute(
+                f'INSERT INTO {q(opts.db_table)} ({columnas}) VALUES {", ".join([fila] * len(parte))} '
+                f'ON CONFLICT ({llave}) WHERE {condicion} DO UPDATE SET {actualizar} '
+                f'RETURNING {q(opts.pk.column)}',
+                params + list(params_condicion),
+            )
+            ids.extend(registro[0] for registro in cursor.fetchall())
+    return ids
+
+
+def validar_factores(df, primera_fila=2):
+    """
+    Validaciones de toda la carga de factores, antes de tocar la BD.
+
+    Lanza ValueError si faltan columnas o si algún registro tiene una suma de factores
+    8 al 19 mayor que 1; en ese caso no se procesa ninguna fila.
+    """
+    faltantes = esquemas.FACTOR.faltantes(df.columns)
+    if faltantes:
+        raise ValueError(f"Faltan las siguientes columnas requeridas: {', '.join(faltantes)}")
+
+    # Los factores ya vienen como float64 (valores inválidos como NaN)
+    suma = df[list(esquemas.FACTORES_SUMA)].sum(axis=1).to_numpy()
+    excedidas = (suma > TOLERANCIA_SUMA).nonzero()[0]
+    if len(excedidas):
+        raise ValueError(
+            f"Validación fallida: {len(excedidas)} registros tienen una suma de Factores 8 al 19 mayor que 1. "
+            f"Filas con error (muestra): {', '.join(str(primera_fila + posicion) for posicion in excedidas[:5])}"
+        )
+
+
+def _fila_factores(fila, origen, usuario):
+    """(llave sin la empresa, datos) de una fila de factores. Lanza ValueError/TypeError."""
+    ejercicio = int(fila['EJERCICIO'])
+    inicio, fin = periodo_ejercicio(ejercicio)
+    llave = {
+        'ejercicio': ejercicio,
+        'instrumento': importacion.a_texto(fila['INSTRUMENTO']),
+        'fecha_pago': importacion.a_fecha(fila['FECHA']),
+        'secuencia': int(fila['SECUENCIA']),
+        'numero_dividendo': int(fila['NUMERO_DE_DIVIDENDO']),
+    }
+    datos = {
+        'fecha_inicio_periodo': inicio,
+        'fecha_fin_periodo': fin,
+        'mercado': importacion.a_texto(fila['MERCADO']),
+        'tipo_sociedad': importacion.a_texto(fila['TIPO_SOCIEDAD']),
+        'valor_historico': importacion.a_decimal(fila['VALOR_HISTORICO']),
+        'origen': origen,
+        'usuario_modificador': usuario,
+    }
+    # Los 30 factores (8 al 37)
+    for numero_factor in range(8, 38):
+        datos[f'factor_{numero_factor}'] = importacion.a_decimal_o_nulo(fila.get(f'FACTOR_{numero_factor}'))
+    return llave, datos
+
+
+def procesar_factores(df, usuario, origen='Carga Masiva Factor', primera_fila=2, duplicados=None):
+    """
+    Crea o actualiza una calificación por fila de factores.
+
+    La llave es (empresa, ejercicio, instrumento, fecha de pago, secuencia, número de
+    dividendo); si se repite en el archivo, antes de tocar la BD se deja una sola fila
+    según la política `duplicados` (ver importacion.consolidar_duplicados).
+    Lanza ValueError si falla validar_factores o la política no existe. Como en
+    procesar_montos, toda la carga va en una transacción con los bloqueos de sus
+    subsidiarias y se escribe por lotes con INSERT ... ON CONFLICT sobre la restricción
+    única de la llave (calif_factor_unica, que sólo cubre las filas con ejercicio).
+    """
+    validar_factores(df, primera_fila)
+
+    resultado = ResultadoCarga()
+    errores = []
+    df = _consolidar(df, esquemas.FACTOR, duplicados, primera_fila, resultado, errores)
+    ahora = timezone.now()
+    filas = {}
+    for (numero, fila), empresa_id in zip(_filas(df, primera_fila), _empresas(df)):
+        if empresa_id is None:
+            id_fiscal = importacion.a_texto(fila['ID_FISCAL_EMPRESA'])
+            errores.append((numero, f"Fila {numero}: El ID Fiscal '{id_fiscal}' de la empresa no existe."))
+            continue
+        try:
+            llave, datos = _fila_factores(fila, origen, usuario)
+        except (ValueError, TypeError) as e:
+            # Errores de conversión (Decimal, Int, Fecha)
+            errores.append((numero, (
+                f"Fila {numero}: Error de formato de dato (Ej. Fecha, Número). Detalle: {str(e).splitlines()[0]}"
+            )))
+            continue
+        llave = {'empresa_subsidiaria_id': empresa_id, **llave}
+        filas[tuple(llave.values())] = (numero, llave, {**datos, 'actualizado_en': ahora})
+
+    with transaction.atomic():
+        bloquear_empresas(clave[0] for clave in filas)
+        existentes = set(CalificacionTributaria.objects.filter(
+            ejercicio__isnull=False,
+            empresa_subsidiaria_id__in={clave[0] for clave in filas},
+            ejercicio__in={clave[1] for clave in filas},
+        ).values_list('empresa_subsidiaria_id', *CAMPOS_LLAVE_FACTOR)) if filas else set()
+        _upsert_lotes(filas, usuario, 'calif_factor_unica', CAMPOS_FACTOR, existentes, resultado, errores)
+
+    # El upsert no dispara señales: se publica la versión de la tabla tras el commit
+    if resultado.pks:
+        incrementar_version(TABLA_CALIFICACIONES)
+    resultado.errores = [mensaje for _, mensaje in sorted(errores, key=lambda error: error[0])]
+    return resultado
+
+
+def _upsert_lotes(filas, usuario, restriccion, campos_actualizar, existentes, resultado, errores):
+    """
+    Escribe `filas` ({clave: (número, llave, datos)}) con _upsert, en lotes de TAMANO_LOTE_UPSERT.
+
+    La clave es la tupla de los valores de la llave, como las de `existentes` (llaves ya
+    guardadas), para contar creadas y actualizadas. El usuario creador no está entre los
+    campos actualizados: en una fila existente se conserva. Si un lote falla, se reintenta
+    fila por fila para registrar el error de cada una.
+    """
+    restriccion = _restriccion(restriccion)
+
+    def objeto(llave, datos):
+        return CalificacionTributaria(**llave, **datos, usuario_creador=usuario)
+
+    def contar(llaves, ids):
+        for llave, pk in zip(llaves, ids):
+            clave = tuple(llave.values())
+            if clave in existentes:
+                resultado.actualizados += 1
+            else:
+                resultado.creados += 1
+                existentes.add(clave)
+            resultado.pks.append(pk)
+
+    # Orden determinista: dos cargas con la misma llave la escriben en el mismo orden
+    ordenadas = [filas[clave] for clave in sorted(filas)]
+    for inicio in range(0, len(ordenadas), TAMANO_LOTE_UPSERT):
+        lote = ordenadas[inicio:inicio + TAMANO_LOTE_UPSERT]
+        try:
+            with transaction.atomic():
+                ids = _upsert([objeto(llave, datos) for _, llave, datos in lote], restriccion, campos_actualizar)
+            contar([llave for _, llave, _ in lote], ids)
+            continue
+        except DatabaseError:
+            pass
+        for numero, llave, datos in lote:
+            try:
+                with transaction.atomic():
+                    ids = _upsert([objeto(llave, datos)], restriccion, campos_actualizar)
+                contar([llave], ids)
+            except IntegrityError as e:
+                errores.append((numero, f"Fila {numero}: Error de integridad de datos: {str(e).splitlines()[0]}"))
+            except DatabaseError as e:
+                errores.append((numero, f"Fila {numero}: Error desconocido: {str(e).splitlines()[0]}"))
+
+
+def procesar_montos(df, usuario, origen='Carga Masiva Monto', primera_fila=2, duplicados=None):
+    """
+    Crea o actualiza una calificación por fila de montos (llave: Subsidiaria + Fecha de Inicio).
+
+    Lanza ValueError si faltan columnas o la política de duplicados no existe. Las llaves
+    repetidas en el archivo se consolidan antes, según `duplicados` (ver
+    importacion.consolidar_duplicados). Toda la carga va en una transacción: primero se
+    toman los bloqueos de las subsidiarias del archivo (bloquear_empresas) y luego se
+    escribe por lotes con INSERT ... ON CONFLICT sobre la restricción única de la llave
+    (calif_monto_unica, que sólo cubre las filas sin ejercicio).
+    """
+    faltantes = esquemas.MONTO.faltantes(df.columns)
+    if faltantes:
+        raise ValueError(f'El archivo debe contener las siguientes columnas requeridas: {", ".join(faltantes)}')
+
+    resultado = ResultadoCarga()
+    errores = []
+    df = _consolidar(df, esquemas.MONTO, duplicados, primera_fila, resultado, errores)
+    ahora = timezone.now()
+    filas = {}
+    for (numero, fila), empresa_id in zip(_filas(df, primera_fila), _empresas(df)):
+        if empresa_id is None:
+            id_fiscal = importacion.a_texto(fila['ID_FISCAL_EMPRESA'])
+            errores.append((numero, f"Fila {numero}: El ID Fiscal {id_fiscal} de la empresa no existe."))
+            continue
+        try:
+            llave = {
+                'empresa_subsidiaria_id': empresa_id,
+                'fecha_inicio_periodo': importacion.a_fecha(fila['FECHA_INICIO']),
+            }
+            datos = {
+                'fecha_fin_periodo': importacion.a_fecha(fila['FECHA_FIN']),
+                'monto_impuesto': importacion.a_decimal(fila['MONTO_IMPUESTO']),
+                'estado': importacion.a_texto(fila['ESTADO']),
+                'origen': origen,
+                'usuario_modificador': usuario,
+                'actualizado_en': ahora,
+            }
+        except (ValueError, TypeError) as e:
+            errores.append((numero, f"Fila {numero}: Error en formato (Fecha/Monto). Detalle: {e}"))
+            continue
+        # Ya consolidadas: cada llave llega una sola vez (ON CONFLICT no puede actualizar
+        # dos veces la misma fila en una sentencia)
+        filas[tuple(llave.values())] = (numero, llave, datos)
+
+    with transaction.atomic():
+        bloquear_empresas(clave[0] for clave in filas)
+        existentes = set(CalificacionTributaria.objects.filter(
+            ejercicio__isnull=True,
+            empresa_subsidiaria_id__in={clave[0] for clave in filas},
+            fecha_inicio_periodo__in={clave[1] for clave in filas},
+        ).values_list('empresa_subsidiaria_id', 'fecha_inicio_periodo')) if filas else set()
+        _upsert_lotes(filas, usuario, 'calif_monto_unica', CAMPOS_MONTO, existentes, resultado, errores)
+
+    # El upsert no dispara señales: se publica la versión de la tabla tras el commit
+    if resultado.pks:
+        incrementar_version(TABLA_CALIFICACIONES)
+    resultado.errores = [mensaje for _, mensaje in sorted(errores, key=lambda error: error[0])]
+    return resultado
+
+
+def refrescar_snapshot(pks):
+    """
+    Refresco incremental del snapshot columnar de factores tras una carga.
+
+    El snapshot es sólo para analítica: un fallo no invalida la carga. Retorna el
+    mensaje de error, o None si se actualizó (o no había nada que actualizar).
+    """
+    if not pks:
+        return None
+    try:
+        from . import matriz_factores
+        matriz_factores.actualizar_snapshot(pks)
+    except Exception as e:
+        return f'No se pudo actualizar el snapshot de factores: {e}'
+    return None
@@ -0,0 +1,120 @@
+# miAppCalificacion/condicional.py
+"""
+GET condicional (ETag / Last-Modified) para listados, exportaciones y plantillas.
+
+Los validadores salen de las versiones de tabla (versiones.py), que ya se leen de la
+caché en cada petición: si ninguna tabla mostrada cambió, la respuesta es un 304 sin
+consultar filas ni renderizar la plantilla. La versión es el time_ns del último cambio
+publicado (incluidas las eliminaciones, que un MAX(actualizado_en) no detectaría), así
+que también sirve de Last-Modified.
+
+El ETag además depende del usuario, de la URL completa (filtros incluidos), del token
+CSRF (los formularios de la página lo llevan) y de las plantillas desplegadas. Con
+mensajes pendientes no hay validadores: la página debe renderizarse para mostrarlos.
+"""
+
+import hashlib
+import io
+import os
+import time
+from datetime import datetime, timezone as dt_timezone
+from functools import lru_cache, wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.middleware.csrf import get_token
+from django.template.utils import get_app_template_dirs
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from .versiones import version_tabla
+
+
+@lru_cache(maxsize=None)
+def huella_plantillas():
+    """Huella de los archivos de plantilla (ruta, tamaño y fecha); cambia con cada despliegue que los toque."""
+    directorios = [d for motor in settings.TEMPLATES for d in motor.get('DIRS', [])]
+    directorios += list(get_app_template_dirs('templates'))
+    huella = hashlib.sha256()
+    for directorio in sorted(map(str, directorios)):
+        for raiz, _, archivos in sorted(os.walk(directorio)):
+            for nombre in sorted(archivos):
+                estado = os.stat(os.path.join(raiz, nombre))
+                huella.update(f'{raiz}/{nombre}:{estado.st_size}:{estado.st_mtime_ns}'.encode())
+    return huella.hexdigest()
+
+
+def _mensajes_pendientes(request):
+    # len() no marca los mensajes como leídos (iterarlos sí)
+    return hasattr(request, '_messages') and len(get_messages(request)) > 0
+
+
+def validadores(*tablas, vigencia=None):
+    """
+    Retorna (etag_func, last_modified_func) para django.views.decorators.http.condition.
+
+    `vigencia` (segundos) se usa en páginas con datos que cambian con el paso del tiempo
+    (ej. "registros de los últimos 7 días"): el ETag cambia al menos una vez por periodo.
+    """
+    def etag(request, *args, **kwargs):
+        if _mensajes_pendientes(request):
+            return None
+        # get_token crea el secreto CSRF si aún no existe, igual que lo haría el render;
+        # así el ETag de la primera visita ya coincide con el de las siguientes
+        get_token(request)
+        partes = [str(version_tabla(tabla)) for tabla in tablas] + [
+            str(request.user.pk),
+            request.get_full_path(),
+            request.META['CSRF_COOKIE'],
+            huella_plantillas(),
+        ]
+        if vigencia:
+            partes.append(str(int(time.time() // vigencia)))
+        return hashlib.sha256('|'.join(partes).encode()).hexdigest()[:32]
+
+    def ultima_modificacion(request, *args, **kwargs):
+        if _mensajes_pendientes(request) or vigencia:
+            return None
+        return datetime.fromtimestamp(max(version_tabla(tabla) for tabla in tablas) / 1e9, tz=dt_timezone.utc)
+
+    return etag, ultima_modificacion
+
+
+def _revalidar_siempre(vista):
+    @wraps(vista)
+    def envoltura(request, *args, **kwargs):
+        response = vista(request, *args, **kwargs)
+        # Sin esto el navegador podría reutilizar la página por heurística sin preguntar
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+    return envoltura
+
+
+def get_condicional(*tablas, vigencia=None):
+    """
+    Decorador: responde 304 si el cliente ya tiene la versión vigente de la página.
+
+    Va debajo de @lectura_en_replica (version_tabla puede fijar la primaria para la petición).
+    """
+    etag, ultima_modificacion = validadores(*tablas, vigencia=vigencia)
+
+    def decorador(vista):
+        return _revalidar_siempre(condition(etag_func=etag, last_modified_func=ultima_modificacion)(vista))
+    return decorador
+
+
+@lru_cache(maxsize=None)
+def _contenido_plantilla(esquema):
+    destino = io.StringIO()
+    esquema.escribir_plantilla(destino)
+    return destino.getvalue()
+
+
+def plantilla_condicional(esquema):
+    """Decorador para la descarga de la plantilla de `esquema`: su contenido sólo cambia con el código."""
+    def etag(request, *args, **kwargs):
+        return hashlib.sha256(_contenido_plantilla(esquema).encode()).hexdigest()[:32]
+
+    def decorador(vista):
+        return _revalidar_siempre(condition(etag_func=etag)(vista))
+    return decorador
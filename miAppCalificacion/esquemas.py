@@ -0,0 +1,159 @@
+# miAppCalificacion/esquemas.py
+"""
+Registro declarativo de las columnas de cada tipo de carga masiva.
+
+Cada esquema define, en un solo lugar, los encabezados de la plantilla, los alias que se
+aceptan en los archivos subidos, el dtype con que pandas debe leer cada columna y el
+valor de ejemplo de la plantilla. Lo usan el parser (importacion.leer_archivo), la
+validación de columnas de las vistas y las vistas que generan las plantillas.
+
+Los dtypes se declaran como texto para no importar pandas aquí (ver importacion.py):
+'category' para columnas con pocos valores distintos, numéricos de ancho fijo en vez de
+object, y 'datetime64[ns]' para las fechas (se leen con parse_dates). El ID fiscal se lee
+como 'string' desde el principio: si pandas lo infiriera como número perdería el formato
+(y los ceros a la izquierda) antes de canonizarlo (cargas._empresas).
+"""
+
+import csv
+import unicodedata
+from dataclasses import dataclass
+
+from .models import FACTOR_NUMEROS
+
+DTYPE_FECHA = 'datetime64[ns]'
+
+# Los factores se leen como float64: float32 no alcanza para los 8 decimales de DecimalField(12, 8)
+DTYPE_FACTOR = 'float64'
+
+# Factores 8 al 19, cuya suma no puede superar 1
+FACTORES_SUMA = tuple(f'FACTOR_{i}' for i in range(8, 20))
+
+
+def normalizar_encabezado(nombre):
+    """'Número de dividendo ' -> 'NUMERO_DE_DIVIDENDO' (sin tildes, mayúsculas, '_' por espacios)."""
+    sin_tildes = unicodedata.normalize('NFKD', str(nombre)).encode('ascii', 'ignore').decode('ascii')
+    return '_'.join(sin_tildes.upper().split())
+
+
+@dataclass(frozen=True)
+class Columna:
+    nombre: str
+    dtype: str
+    ejemplo: str = ''
+    alias: tuple = ()
+
+    @property
+    def clave(self):
+        """Nombre de la columna en el DataFrame una vez leído el archivo."""
+        return normalizar_encabezado(self.nombre)
+
+    @property
+    def es_fecha(self):
+        return self.dtype == DTYPE_FECHA
+
+    @property
+    def es_numerica(self):
+        return self.dtype.lower().startswith(('int', 'uint', 'float'))
+
+
+@dataclass(frozen=True)
+class Esquema:
+    tipo: str
+    columnas: tuple
+    archivo_plantilla: str = ''
+    # Claves de las columnas que identifican un registro (la llave del upsert en cargas.py)
+    llave: tuple = ()
+
+    @property
+    def encabezados(self):
+        return [columna.nombre for columna in self.columnas]
+
+    @property
+    def claves(self):
+        return [columna.clave for columna in self.columnas]
+
+    def columna(self, clave):
+        return next(columna for columna in self.columnas if columna.clave == clave)
+
+    def mapear_encabezados(self, encabezados):
+        """
+        Relaciona los encabezados de un archivo con las claves del esquema.
+
+        Retorna {encabezado del archivo: clave}; las columnas que no pertenecen al
+        esquema se omiten y no llegan a leerse.
+        """
+        mapeo = {}
+        for encabezado in encabezados:
+            clave = self.clave_de(encabezado)
+            if clave and clave not in mapeo.values():
+                mapeo[encabezado] = clave
+        return mapeo
+
+    def clave_de(self, encabezado):
+        """Clave de la columna a la que corresponde `encabezado` (nombre, alias o clave), o None."""
+        normalizado = normalizar_encabezado(encabezado)
+        for columna in self.columnas:
+            if normalizado == columna.clave or normalizado in map(normalizar_encabezado, columna.alias):
+                return columna.clave
+        return None
+
+    def faltantes(self, claves_presentes):
+        """Encabezados (tal como aparecen en la plantilla) de las columnas que no vienen en el archivo."""
+        presentes = set(claves_presentes)
+        return [columna.nombre for columna in self.columnas if columna.clave not in presentes]
+
+    def escribir_plantilla(self, destino):
+        """Escribe la plantilla CSV (formato regional: ';' y coma decimal) con una fila de ejemplo."""
+        writer = csv.writer(destino, delimiter=';')
+        writer.writerow(self.encabezados)
+        writer.writerow([columna.ejemplo for columna in self.columnas])
+
+
+FACTOR = Esquema(
+    tipo='factor',
+    archivo_plantilla='Plantilla_Carga_Masiva_Factores.csv',
+    llave=('ID_FISCAL_EMPRESA', 'EJERCICIO', 'INSTRUMENTO', 'FECHA', 'SECUENCIA', 'NUMERO_DE_DIVIDENDO'),
+    columnas=(
+        Columna('ID Fiscal Empresa', 'string', '76000000-1', alias=('ID Fiscal', 'RUT Empresa')),
+        Columna('Ejercicio', 'int16', '2025'),
+        Columna('Mercado', 'category', 'CHILE'),
+        Columna('Instrumento', 'category', 'ACCION'),
+        Columna('Fecha', DTYPE_FECHA, '2025-01-01', alias=('Fecha Pago',)),
+        Columna('Secuencia', 'int32', '1'),
+        Columna('Numero de dividendo', 'int32', '0', alias=('Dividendo',)),
+        Columna('Tipo sociedad', 'category', 'SA'),
+        Columna('Valor Historico', 'float64', '1000,00'),
+    ) + tuple(
+        # Ejemplo: los factores 8 al 19 reparten 1 en partes iguales, el resto en cero
+        Columna(f'Factor {i}', DTYPE_FACTOR, f'{1 / len(FACTORES_SUMA):.5f}'.replace('.', ',') if i < 20 else '0,00000')
+        for i in FACTOR_NUMEROS
+    ),
+)
+
+# DJ 1948
+MONTO = Esquema(
+    tipo='monto',
+    archivo_plantilla='Plantilla_Montos_Tributarios.csv',
+    llave=('ID_FISCAL_EMPRESA', 'FECHA_INICIO'),
+    columnas=(
+        Columna('ID Fiscal Empresa', 'string', '76000000-1', alias=('ID Fiscal', 'RUT Empresa')),
+        Columna('Fecha Inicio', DTYPE_FECHA, '2025-01-01', alias=('Fecha Inicio Periodo',)),
+        Columna('Fecha Fin', DTYPE_FECHA, '2025-03-31', alias=('Fecha Fin Periodo',)),
+        Columna('Monto Impuesto', 'float64', '5500000,00', alias=('Monto',)),
+        Columna('Estado', 'category', 'Vigente'),
+    ),
+)
+
+USUARIOS = Esquema(
+    tipo='usuarios',
+    columnas=(
+        Columna('nombre', 'string', 'Juan'),
+        Columna('apellido', 'string', 'Pérez'),
+        Columna('email', 'string', 'juan.perez@ejemplo.cl', alias=('correo',)),
+        Columna('telefono', 'string', '+56911111111', alias=('teléfono',)),
+        Columna('edad', 'Int16', '30'),
+        Columna('rol_id', 'int64', '1'),
+        Columna('pais_id', 'int64', '1'),
+        Columna('contraseña', 'string', '', alias=('password',)),
+    ),
+)
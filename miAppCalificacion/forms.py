@@ -1,5 +1,6 @@
 from django import forms
 from .models import CalificacionTributaria, EmpresaSubsidiaria
+from .widgets import AutocompleteSelect
 
 class CalificacionForm(forms.ModelForm):
     """
@@ -8,10 +9,13 @@ class CalificacionForm(forms.ModelForm):
     class Meta:
         model = CalificacionTributaria
         # Se excluyen los campos de auditoría (usuario_creador, modificador) 
-        # porque se llenan automáticamente en la vista (views.py)
-        exclude = ('usuario_creador', 'usuario_modificador')
+        # porque se llenan automáticamente en la vista (views.py). El origen también lo fija la vista.
+        exclude = ('usuario_creador', 'usuario_modificador', 'origen')
         
         widgets = {
             'fecha_inicio_periodo': forms.DateInput(attrs={'type': 'date'}),
             'fecha_fin_periodo': forms.DateInput(attrs={'type': 'date'}),
+            'fecha_pago': forms.DateInput(attrs={'type': 'date'}),
+            # Evita renderizar un <option> por cada subsidiaria existente
+            'empresa_subsidiaria': AutocompleteSelect('calificaciones:autocompletar_empresas'),
         }
\ No newline at end of file
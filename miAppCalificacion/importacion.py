@@ -0,0 +1,244 @@
+# miAppCalificacion/importacion.py
+"""
+Pipeline de lectura y conversión de los archivos de carga masiva.
+
+Este es el único módulo que importa pandas (y, a través de él, NumPy). Las vistas lo
+importan dentro de la función que lo usa (`from miAppCalificacion import importacion`),
+así que arrancar un worker o ejecutar `manage.py` no paga el costo de importar pandas:
+se carga recién con la primera carga masiva. El comando `perfil_arranque` verifica que
+siga siendo así.
+"""
+
+import os
+from decimal import Decimal
+
+import pandas as pd
+
+EXTENSIONES_CSV = ('.csv',)
+EXTENSIONES_EXCEL = ('.xlsx', '.xls')
+
+
+class FormatoNoSoportado(ValueError):
+    """La extensión del archivo no corresponde a CSV ni a Excel."""
+
+
+def _origen(archivo):
+    """Ruta en disco del archivo cuando la tiene (pandas lo lee desde ahí), o el archivo mismo."""
+    if hasattr(archivo, 'temporary_file_path'):
+        return archivo.temporary_file_path()
+    try:
+        return archivo.path
+    except (AttributeError, NotImplementedError):
+        return archivo
+
+
+def _lector(extension):
+    if extension in EXTENSIONES_CSV:
+        return lambda origen, **kwargs: pd.read_csv(origen, sep=';', decimal=',', encoding='utf-8', **kwargs)
+    return pd.read_excel
+
+
+def _leer_tipado(lector, origen, mapeo, esquema):
+    """
+    Lee sólo las columnas del esquema con sus dtypes declarados.
+
+    Si algún valor no calza con el tipo (ej. texto en una columna numérica) se vuelve a
+    leer con las columnas numéricas como texto y se convierten con errors='coerce': los
+    valores inválidos quedan nulos y se reportan al procesar la fila, como antes.
+    """
+    columnas = {encabezado: esquema.columna(clave) for encabezado, clave in mapeo.items()}
+    fechas = [encabezado for encabezado, columna in columnas.items() if columna.es_fecha]
+    dtypes = {encabezado: columna.dtype for encabezado, columna in columnas.items() if not columna.es_fecha}
+    try:
+        return lector(origen, usecols=list(columnas), dtype=dtypes, parse_dates=fechas)
+    except (ValueError, TypeError):
+        pass
+
+    if hasattr(origen, 'seek'):
+        origen.seek(0)
+    numericas = [encabezado for encabezado, columna in columnas.items() if columna.es_numerica]
+    df = lector(
+        origen, usecols=list(columnas), parse_dates=fechas,
+        dtype={**dtypes, **{encabezado: 'string' for encabezado in numericas}},
+    )
+    for encabezado in numericas:
+        df[encabezado] = _a_numerico(df[encabezado], columnas[encabezado].dtype)
+    return df
+
+
+def _a_numerico(serie, dtype):
+    """Convierte a `dtype` una columna de texto o mixta; los valores inválidos quedan nulos."""
+    # Coma decimal del formato regional antes de convertir
+    valores = pd.to_numeric(serie.astype('string').str.replace(',', '.', regex=False), errors='coerce')
+    try:
+        return valores.astype(dtype)
+    except (ValueError, TypeError):
+        # Ej. decimales en una columna entera: queda en float64 y falla al procesar la fila
+        return valores
+
+
+def leer_archivo(archivo, esquema, extensiones=EXTENSIONES_CSV + EXTENSIONES_EXCEL):
+    """
+    Lee un archivo subido (CSV regional o Excel) según `esquema` (ver esquemas.py).
+
+    `archivo` puede ser un UploadedFile o un FieldFile (ej. Auditoria.file); si está en
+    disco se le pasa la ruta a pandas en vez de cargar su contenido en memoria.
+    Los CSV se leen con el formato regional del proyecto: separador punto y coma y
+    coma decimal. Sólo se leen las columnas del esquema, con sus dtypes, y el DataFrame
+    resultante usa las claves del esquema como nombres de columna (ej. 'FECHA_INICIO').
+    Lanza FormatoNoSoportado si la extensión no está en `extensiones`.
+    """
+    extension = os.path.splitext(archivo.name)[1].lower()
+    if extension not in extensiones:
+        raise FormatoNoSoportado(extension)
+    lector = _lector(extension)
+    origen = _origen(archivo)
+
+    # Primero sólo los encabezados, para traducir alias y elegir columnas y dtypes
+    mapeo = esquema.mapear_encabezados(lector(origen, nrows=0).columns)
+    if hasattr(origen, 'seek'):
+        origen.seek(0)
+    return _leer_tipado(lector, origen, mapeo, esquema).rename(columns=mapeo)
+
+
+def desde_registros(registros, esquema):
+    """
+    DataFrame tipado según `esquema` a partir de registros JSON (lista de dicts).
+
+    Es el equivalente de leer_archivo para la API: las llaves de cada registro pueden
+    ser los encabezados de la plantilla, sus alias o las claves del esquema, y el
+    resultado tiene las mismas columnas y dtypes que un archivo leído, así que pasa por
+    la misma validación (ver cargas.py). Las fechas se esperan en ISO 8601; los valores
+    que no calzan con el tipo quedan nulos y se reportan al procesar la fila.
+    """
+    # Las llaves se traducen registro a registro: un mismo lote puede mezclar estilos
+    claves = {}
+    filas = []
+    for registro in registros:
+        fila = {}
+        for llave, valor in registro.items():
+            if llave not in claves:
+                claves[llave] = esquema.clave_de(llave)
+            if claves[llave]:
+                fila[claves[llave]] = valor
+        filas.append(fila)
+    presentes = set(claves.values())
+    df = pd.DataFrame.from_records(filas, columns=[clave for clave in esquema.claves if clave in presentes])
+    for clave in df.columns:
+        columna = esquema.columna(clave)
+        if columna.es_fecha:
+            df[clave] = pd.to_datetime(df[clave], errors='coerce', format='ISO8601')
+        elif columna.es_numerica:
+            df[clave] = _a_numerico(df[clave], columna.dtype)
+        else:
+            df[clave] = df[clave].astype(columna.dtype)
+    return df
+
+
+POLITICAS_DUPLICADOS = ('ultima', 'primera', 'rechazar')
+
+
+def canonizar_ids_fiscales(serie):
+    """
+    models.canonizar_id_fiscal sobre toda la columna, con operaciones vectorizadas de texto.
+
+    Las celdas vacías (o sin letras ni dígitos) quedan nulas. Un archivo repite pocos IDs
+    en muchas filas: se canoniza cada valor distinto una vez y se expande con sus códigos.
+    """
+    codigos, distintos = pd.factorize(serie.astype('string'))
+    texto = pd.Series(distintos, dtype='string').str.strip()
+    # Un ID que llegó como número (celda numérica de Excel, número en el JSON de la API)
+    texto = texto.str.replace(r'^(\d+)\.0$', r'\1', regex=True)
+    canonicos = texto.str.upper().str.replace(r'[^0-9A-Z]', '', regex=True).str.lstrip('0')
+    # Las celdas vacías tienen código -1: toman el nulo agregado al final
+    canonicos = pd.concat([canonicos.mask(canonicos == ''), pd.Series([pd.NA], dtype='string')], ignore_index=True)
+    return pd.Series(canonicos.to_numpy()[codigos], index=serie.index, dtype='string')
+
+
+def _llaves(df, esquema):
+    """Columnas de la llave del esquema, normalizadas como las compara cargas.py al procesar las filas."""
+    llaves = {}
+    for clave in esquema.llave:
+        columna = esquema.columna(clave)
+        if clave == 'ID_FISCAL_EMPRESA':
+            llaves[clave] = canonizar_ids_fiscales(df[clave])
+        elif columna.es_fecha:
+            llaves[clave] = pd.to_datetime(df[clave], errors='coerce').dt.normalize()
+        elif columna.es_numerica:
+            llaves[clave] = df[clave]
+        else:
+            llaves[clave] = df[clave].astype('string').str.strip()
+    return pd.DataFrame(llaves, index=df.index)
+
+
+def consolidar_duplicados(df, esquema, politica='ultima', primera_fila=2):
+    """
+    Deja una sola fila por llave (esquema.llave) antes de que la carga llegue a la BD.
+
+    La detección es vectorizada, en una pasada sobre todo el DataFrame. Políticas:
+    'ultima' conserva la última fila de cada llave repetida (lo mismo que procesarlas en
+    orden), 'primera' la primera y 'rechazar' descarta todas las filas de la llave. Las
+    filas con algún componente de la llave vacío o inválido no se consolidan: fallan
+    después, cada una con su error.
+
+    El número de fila de los mensajes es `primera_fila` + índice del DataFrame, que
+    conserva las filas descartadas. Retorna (DataFrame consolidado, [(fila, mensaje)]
+    de las filas descartadas por 'ultima'/'primera', [(fila, mensaje)] de las rechazadas).
+    """
+    if politica not in POLITICAS_DUPLICADOS:
+        raise ValueError(
+            f'Política de duplicados desconocida: {politica} (use {", ".join(POLITICAS_DUPLICADOS)}).'
+        )
+    llaves = _llaves(df, esquema)
+    repetidas = llaves.duplicated(keep=False) & llaves.notna().all(axis=1)
+    if not repetidas.any():
+        return df, [], []
+
+    filas = pd.Series(df.index[repetidas.to_numpy()] + primera_fila, index=df.index[repetidas.to_numpy()])
+    grupos = filas.groupby([llaves.loc[repetidas, clave] for clave in esquema.llave], sort=False)
+    if politica == 'rechazar':
+        primeras, cantidades = grupos.transform('first'), grupos.transform('size')
+        rechazadas = [
+            (numero, f'Fila {numero}: La llave se repite en {cantidad} filas del archivo (la primera es la '
+                     f'fila {primera}); se rechazan todas.')
+            for numero, primera, cantidad in zip(filas, primeras, cantidades)
+        ]
+        return df[~repetidas], [], rechazadas
+
+    conservadas = grupos.transform('last' if politica == 'ultima' else 'first')
+    descartar = filas != conservadas
+    consolidadas = [
+        (numero, f'Fila {numero}: Misma llave que la fila {conservada}; se usó la fila {conservada}.')
+        for numero, conservada in zip(filas[descartar], conservadas[descartar])
+    ]
+    return df.drop(index=filas.index[descartar.to_numpy()]), consolidadas, []
+
+
+def a_fecha(valor):
+    """Convierte un valor de celda (texto, fecha de Excel, Timestamp) en `date`."""
+    fecha = pd.to_datetime(valor)
+    if pd.isna(fecha):
+        raise ValueError('Fecha vacía o inválida')
+    return fecha.date()
+
+
+def a_decimal(valor):
+    """Decimal del valor de la celda; una celda vacía o inválida es un error de la fila."""
+    if pd.isna(valor):
+        raise ValueError('Número vacío o inválido')
+    return Decimal(str(valor))
+
+
+def a_decimal_o_nulo(valor):
+    """Decimal del valor de la celda, o None si la celda está vacía (NaN/None)."""
+    return Decimal(str(valor)) if pd.notna(valor) else None
+
+
+def a_entero_o_nulo(valor):
+    """Entero del valor de la celda, o None si la celda está vacía."""
+    return None if pd.isna(valor) else int(valor)
+
+
+def a_texto(valor):
+    """Texto de la celda sin espacios alrededor; '' si la celda está vacía."""
+    return '' if pd.isna(valor) else str(valor).strip()
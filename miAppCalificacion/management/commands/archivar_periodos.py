@@ -0,0 +1,65 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from miAppCalificacion import archivo
+from miAppCalificacion.versiones import incrementar_version, TABLA_CALIFICACIONES
+
+
+class Command(BaseCommand):
+    help = (
+        'Mueve las calificaciones de periodos cerrados (y su histórico) a las tablas de archivo, '
+        'un año por transacción. Por defecto conserva en la tabla activa el ejercicio actual y el anterior.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--anios-vigentes', type=int, default=2,
+                            help='Ejercicios que se mantienen en la tabla activa, contando el actual (por defecto 2).')
+        parser.add_argument('--corte', default=None,
+                            help='Fecha YYYY-MM-DD: archiva los periodos terminados antes de ella (reemplaza --anios-vigentes).')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Sólo informa cuántas calificaciones se archivarían por año.')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        if options['corte']:
+            try:
+                corte = datetime.strptime(options['corte'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('--corte debe tener el formato YYYY-MM-DD.')
+        else:
+            if options['anios_vigentes'] < 1:
+                raise CommandError('--anios-vigentes debe ser al menos 1.')
+            corte = archivo.fecha_corte(options['anios_vigentes'])
+
+        base = options['database']
+        anios = archivo.anios_por_archivar(corte, base)
+        if not anios:
+            self.stdout.write(f'No hay periodos cerrados antes de {corte:%Y-%m-%d}.')
+            return
+
+        if options['dry_run']:
+            for anio in anios:
+                total = archivo.periodos_cerrados(corte, base).filter(fecha_inicio_periodo__year=anio).count()
+                self.stdout.write(f'{anio}: {total} calificaciones por archivar')
+            return
+
+        pks_con_factores = []
+        total = 0
+        for anio in anios:
+            archivadas, historicos, pks = archivo.archivar_anio(anio, corte, base)
+            pks_con_factores.extend(pks)
+            total += archivadas
+            self.stdout.write(f'{anio}: {archivadas} calificaciones y {historicos} históricos archivados')
+
+        # El DELETE en bloque no dispara señales: se invalida la caché del listado explícitamente
+        incrementar_version(TABLA_CALIFICACIONES)
+
+        if pks_con_factores:
+            from miAppCalificacion import matriz_factores
+            if matriz_factores.version_actual():
+                matriz_factores.actualizar_snapshot(pks_con_factores)
+                self.stdout.write('Snapshot de factores actualizado.')
+
+        self.stdout.write(self.style.SUCCESS(f'{total} calificaciones archivadas (corte {corte:%Y-%m-%d}).'))
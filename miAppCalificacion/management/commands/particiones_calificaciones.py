@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from miAppCalificacion import particiones
+
+
+class Command(BaseCommand):
+    help = (
+        'Crea las particiones anuales faltantes de CalificacionTributaria (año actual y siguientes) '
+        'y mueve a ellas las filas que hayan quedado en la partición DEFAULT. Pensado para cron, '
+        'por ejemplo una vez al mes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--anios-adelante', type=int, default=1,
+                            help='Cantidad de años futuros con partición creada de antemano (por defecto 1).')
+        parser.add_argument('--activar', action='store_true',
+                            help='Particiona la tabla si aún no lo está (copia todas las filas; usar en mantención).')
+        parser.add_argument('--desactivar', action='store_true',
+                            help='Vuelve a una tabla sin particiones.')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        conexion = connections[options['database']]
+        if conexion.vendor != 'postgresql':
+            raise CommandError('El particionamiento sólo está disponible en PostgreSQL.')
+
+        if options['desactivar']:
+            if particiones.esta_particionada(conexion):
+                particiones.desparticionar(conexion)
+                self.stdout.write(self.style.SUCCESS('La tabla ya no está particionada.'))
+            else:
+                self.stdout.write('La tabla no estaba particionada.')
+            return
+
+        if not particiones.esta_particionada(conexion):
+            if not options['activar']:
+                raise CommandError(
+                    'La tabla no está particionada. Use --activar (o CALIFICACIONES_PARTICIONADAS=True al migrar).'
+                )
+            particiones.particionar(conexion, options['anios_adelante'])
+            self.stdout.write(self.style.SUCCESS('Tabla particionada por año.'))
+
+        creadas = particiones.asegurar_particiones(conexion, options['anios_adelante'])
+        for nombre in creadas:
+            self.stdout.write(f'Partición creada: {nombre}')
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(particiones.particiones_existentes(conexion))} particiones; {len(creadas)} nuevas.'
+        ))
@@ -0,0 +1,122 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Lo que hace un worker antes de atender su primera petición: cargar la aplicación WSGI
+# y resolver las URLs (lo que importa todas las vistas, formularios y widgets).
+_ARRANQUE_WORKER = """
+import json, sys
+from django.core.wsgi import get_wsgi_application
+get_wsgi_application()
+from django.urls import get_resolver
+get_resolver().url_patterns
+rss_kb = 0
+try:
+    with open('/proc/self/status') as estado:
+        for linea in estado:
+            if linea.startswith('VmRSS:'):
+                rss_kb = int(linea.split()[1])
+except OSError:
+    import resource
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({'rss_kb': rss_kb, 'modulos': sorted(sys.modules)}))
+"""
+
+PROHIBIDOS_POR_DEFECTO = 'pandas,numpy,openpyxl'
+
+
+def _parsear_importtime(salida):
+    """
+    Interpreta la salida de `python -X importtime` y retorna {módulo de primer nivel: µs acumulados}.
+
+    Sólo se consideran las líneas sin sangría (importaciones de primer nivel), cuya suma
+    es el tiempo total de importación sin contar dos veces los submódulos.
+    """
+    tiempos = {}
+    for linea in salida.splitlines():
+        if not linea.startswith('import time:') or 'cumulative' in linea:
+            continue
+        _, _, datos = linea.partition(':')
+        _, acumulado, modulo = datos.split('|', 2)
+        # Formato: ' modulo' en primer nivel; cada nivel de anidación agrega dos espacios
+        if not modulo[1:].startswith(' '):
+            tiempos[modulo.strip()] = tiempos.get(modulo.strip(), 0) + int(acumulado)
+    return tiempos
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide el arranque de un worker (tiempo de importación con -X importtime y RSS base) '
+        'y falla si supera los límites o si se importan dependencias pesadas al iniciar.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=3,
+                            help='Cantidad de arranques a medir; se informa la mediana.')
+        parser.add_argument('--max-importacion-ms', type=float, default=None,
+                            help='Tiempo máximo de importación permitido (mediana, en ms).')
+        parser.add_argument('--max-rss-mb', type=float, default=None,
+                            help='RSS máximo permitido tras el arranque (mediana, en MB).')
+        parser.add_argument('--prohibidos', default=PROHIBIDOS_POR_DEFECTO,
+                            help='Módulos que no deben importarse al arrancar, separados por coma.')
+        parser.add_argument('--top', type=int, default=15,
+                            help='Cantidad de módulos más costosos a listar.')
+        parser.add_argument('--json', action='store_true', help='Imprime el resultado como JSON.')
+
+    def _medir(self):
+        entorno = dict(os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE)
+        proceso = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', _ARRANQUE_WORKER],
+            capture_output=True, text=True, env=entorno, cwd=str(settings.BASE_DIR),
+        )
+        if proceso.returncode != 0:
+            raise CommandError(f'El arranque del worker falló:\n{proceso.stderr[-2000:]}')
+        resultado = json.loads(proceso.stdout.strip().splitlines()[-1])
+        resultado['tiempos'] = _parsear_importtime(proceso.stderr)
+        return resultado
+
+    def handle(self, *args, **options):
+        mediciones = [self._medir() for _ in range(max(options['repeticiones'], 1))]
+
+        importacion_ms = statistics.median(sum(m['tiempos'].values()) for m in mediciones) / 1000
+        rss_mb = statistics.median(m['rss_kb'] for m in mediciones) / 1024
+        ultima = mediciones[-1]
+        mas_costosos = sorted(ultima['tiempos'].items(), key=lambda item: item[1], reverse=True)[:options['top']]
+
+        prohibidos = [nombre.strip() for nombre in options['prohibidos'].split(',') if nombre.strip()]
+        cargados = sorted(nombre for nombre in prohibidos if nombre in ultima['modulos'])
+
+        resumen = {
+            'importacion_ms': round(importacion_ms, 1),
+            'rss_mb': round(rss_mb, 1),
+            'modulos_cargados': len(ultima['modulos']),
+            'prohibidos_cargados': cargados,
+            'mas_costosos': [{'modulo': modulo, 'ms': round(us / 1000, 1)} for modulo, us in mas_costosos],
+        }
+
+        if options['json']:
+            self.stdout.write(json.dumps(resumen, indent=2))
+        else:
+            self.stdout.write(
+                f"Importación: {resumen['importacion_ms']} ms | RSS: {resumen['rss_mb']} MB | "
+                f"Módulos: {resumen['modulos_cargados']}"
+            )
+            for fila in resumen['mas_costosos']:
+                self.stdout.write(f"  {fila['ms']:>8} ms  {fila['modulo']}")
+
+        fallas = []
+        if cargados:
+            fallas.append(f"se importan al arrancar: {', '.join(cargados)}")
+        if options['max_importacion_ms'] is not None and importacion_ms > options['max_importacion_ms']:
+            fallas.append(f"importación {importacion_ms:.1f} ms > {options['max_importacion_ms']} ms")
+        if options['max_rss_mb'] is not None and rss_mb > options['max_rss_mb']:
+            fallas.append(f"RSS {rss_mb:.1f} MB > {options['max_rss_mb']} MB")
+        if fallas:
+            raise CommandError('Regresión en el arranque: ' + '; '.join(fallas))
+
+        self.stdout.write(self.style.SUCCESS('Arranque dentro de los límites.'))
@@ -0,0 +1,46 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from miAppCalificacion import trabajos
+from miAppUsuario.models import Auditoria
+
+
+class Command(BaseCommand):
+    help = (
+        'Ejecuta los trabajos de cargas por lote que quedaron pendientes (ej. si el proceso web '
+        'se reinició antes de importarlos), con IMPORTACION_WORKERS en paralelo. Antes recupera '
+        'los que quedaron importándose sin latido (su proceso murió): vuelven a pendientes o, '
+        'tras IMPORTACION_MAX_INTENTOS, quedan fallidos.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--minutos', type=int, default=5,
+            help=(
+                'Sólo trabajos pendientes desde hace al menos estos minutos, o importándose sin '
+                'latido desde hace estos minutos (por defecto 5).'
+            ),
+        )
+
+    def handle(self, *args, **options):
+        limite = timezone.now() - timedelta(minutes=options['minutos'])
+        reiniciados, fallidos = trabajos.reclamar_huerfanos(limite)
+        if reiniciados or fallidos:
+            self.stdout.write(
+                f'Trabajos interrumpidos: {reiniciados} vuelven a pendientes, {fallidos} marcados como fallidos.'
+            )
+        ids = list(
+            Auditoria.objects.filter(
+                lote__isnull=False, status=Auditoria.STATUS_PENDING, uploaded_at__lte=limite,
+            ).order_by('pk').values_list('pk', flat=True)
+        )
+        if not ids:
+            self.stdout.write('No hay trabajos pendientes.')
+            return
+
+        ejecutados = trabajos.ejecutar_y_esperar(ids)
+        self.stdout.write(self.style.SUCCESS(
+            f'{ejecutados} de {len(ids)} trabajos ejecutados (el resto ya lo había tomado otro proceso).'
+        ))
@@ -0,0 +1,200 @@
+import importlib.util
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from miAppCalificacion import prueba_carga
+from miAppCalificacion.models import EmpresaSubsidiaria
+
+# servidor -> (módulo que debe estar instalado, comando; {direccion} y {procesos} se reemplazan)
+SERVIDORES = {
+    'runserver': ('django', ['-m', 'django', 'runserver', '--noreload', '{direccion}']),
+    'gunicorn': ('gunicorn', ['-m', 'gunicorn', 'miProyecto.wsgi:application', '-b', '{direccion}', '-w', '{procesos}']),
+    'uvicorn': ('uvicorn', [
+        '-m', 'uvicorn', 'miProyecto.asgi:application', '--host', '{host}', '--port', '{puerto}', '--workers', '{procesos}',
+    ]),
+}
+
+# Parámetros que deben coincidir para que dos reportes sean comparables
+PARAMETROS_COMPARABLES = ('mezcla', 'usuarios', 'duracion', 'pausa', 'semilla', 'filas_carga', 'servidor', 'procesos')
+
+
+class Command(BaseCommand):
+    help = (
+        'Prueba de carga de punta a punta: usuarios virtuales inician sesión, recorren el listado '
+        'de calificaciones y de usuarios y suben archivos de factores y montos contra un servidor '
+        'local (WSGI o ASGI). Reporta p50/p95/p99, peticiones por segundo y tasa de error por '
+        'endpoint, y compara con un reporte anterior. Las cargas escriben en la base: usar en staging.'
+    )
+
+    def add_arguments(self, parser):
+        destino = parser.add_mutually_exclusive_group(required=True)
+        destino.add_argument('--url', help='Servidor ya levantado, ej. http://127.0.0.1:8000')
+        destino.add_argument('--servidor', choices=sorted(SERVIDORES),
+                             help='Levanta este servidor con la configuración actual durante la prueba.')
+        parser.add_argument('--puerto', type=int, default=8765, help='Puerto del servidor levantado (por defecto 8765).')
+        parser.add_argument('--procesos', type=int, default=4, help='Workers de gunicorn/uvicorn (por defecto 4).')
+        parser.add_argument('--credencial', action='append', required=True, metavar='EMAIL:CLAVE',
+                            help='Cuenta con que inician sesión los usuarios virtuales (se reparten en turno). Repetible.')
+        parser.add_argument('--mezcla', default='consulta=7,carga_factores=2,carga_montos=1',
+                            help=f'Pesos por escenario ({", ".join(prueba_carga.ESCENARIOS)}).')
+        parser.add_argument('--usuarios', type=int, default=20, help='Usuarios virtuales concurrentes (por defecto 20).')
+        parser.add_argument('--duracion', type=float, default=60, help='Segundos medidos (por defecto 60).')
+        parser.add_argument('--calentamiento', type=float, default=10,
+                            help='Segundos iniciales que no se cuentan (por defecto 10).')
+        parser.add_argument('--rampa', type=float, default=5,
+                            help='Segundos en que se reparten los inicios de sesión (por defecto 5).')
+        parser.add_argument('--pausa', type=float, default=1.0,
+                            help='Pausa media entre pasos, en segundos; 0 para carga máxima (por defecto 1).')
+        parser.add_argument('--semilla', type=int, default=1)
+        parser.add_argument('--filas-carga', type=int, default=100, help='Filas de cada archivo subido (por defecto 100).')
+        parser.add_argument('--id-fiscal', action='append', default=[],
+                            help='ID fiscal usado en los archivos subidos (repetible; por defecto 50 de la base).')
+        parser.add_argument('--timeout', type=float, default=60)
+        parser.add_argument('--salida', help='Archivo JSON donde se guarda el reporte.')
+        parser.add_argument('--comparar', help='Reporte JSON anterior contra el que se compara.')
+
+    def handle(self, *args, **options):
+        try:
+            mezcla = prueba_carga.leer_mezcla(options['mezcla'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        credenciales = []
+        for credencial in options['credencial']:
+            email, separador, clave = credencial.partition(':')
+            if not separador:
+                raise CommandError(f'Credencial sin ":" (se espera EMAIL:CLAVE): {credencial}')
+            credenciales.append((email, clave))
+        if options['usuarios'] < 1 or options['duracion'] <= 0:
+            raise CommandError('--usuarios y --duracion deben ser positivos.')
+
+        ids_fiscales = options['id_fiscal']
+        if not ids_fiscales and any(mezcla.get(n) for n in ('carga_factores', 'carga_montos')):
+            ids_fiscales = list(EmpresaSubsidiaria.objects.order_by('pk').values_list('identificacion_fiscal', flat=True)[:50])
+            if not ids_fiscales:
+                raise CommandError('No hay subsidiarias para los archivos de carga; indique --id-fiscal.')
+
+        anterior = None
+        if options['comparar']:
+            with open(options['comparar'], encoding='utf-8') as archivo:
+                anterior = json.load(archivo)
+
+        proceso = None
+        url = options['url']
+        if options['servidor']:
+            proceso, url = self._levantar(options['servidor'], options['puerto'], options['procesos'])
+        try:
+            self.stdout.write(
+                f'{options["usuarios"]} usuarios virtuales contra {url} durante '
+                f'{options["calentamiento"]:g} + {options["duracion"]:g} s...'
+            )
+            asignados, resumen = prueba_carga.correr(
+                url, credenciales, mezcla, options['usuarios'], options['duracion'],
+                calentamiento=options['calentamiento'], pausa=options['pausa'], semilla=options['semilla'],
+                ids_fiscales=ids_fiscales, filas_carga=options['filas_carga'], timeout=options['timeout'],
+                rampa=options['rampa'],
+            )
+        finally:
+            if proceso:
+                proceso.terminate()
+                proceso.wait(timeout=30)
+
+        reporte = {
+            'parametros': {
+                'fecha': timezone.now().isoformat(),
+                'commit': self._commit(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'servidor': options['servidor'] or url,
+                'procesos': options['procesos'] if options['servidor'] in ('gunicorn', 'uvicorn') else None,
+                'mezcla': mezcla,
+                'escenarios': {n: asignados.count(n) for n in sorted(set(asignados))},
+                'usuarios': options['usuarios'],
+                'duracion': options['duracion'],
+                'calentamiento': options['calentamiento'],
+                'pausa': options['pausa'],
+                'semilla': options['semilla'],
+                'filas_carga': options['filas_carga'],
+            },
+            'endpoints': resumen,
+        }
+        self._imprimir(resumen, anterior)
+        if anterior:
+            distintos = [p for p in PARAMETROS_COMPARABLES if anterior['parametros'].get(p) != reporte['parametros'][p]]
+            if distintos:
+                self.stdout.write(self.style.WARNING(
+                    f'Los reportes difieren en {", ".join(distintos)}: la comparación no es directa.'
+                ))
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                json.dump(reporte, archivo, indent=2, ensure_ascii=False)
+            self.stdout.write(f'Reporte guardado en {options["salida"]}.')
+
+        total = resumen['TOTAL']
+        estilo = self.style.SUCCESS if not total['errores'] else self.style.WARNING
+        self.stdout.write(estilo(
+            f'{total["peticiones"]} peticiones, {total["por_segundo"]} por segundo, '
+            f'{total["errores"]} errores ({100 * total["tasa_error"]:.2f} %).'
+        ))
+
+    def _levantar(self, servidor, puerto, procesos):
+        modulo, argumentos = SERVIDORES[servidor]
+        if importlib.util.find_spec(modulo) is None:
+            raise CommandError(f'{modulo} no está instalado (pip install {modulo}).')
+        host = '127.0.0.1'
+        valores = {'direccion': f'{host}:{puerto}', 'host': host, 'puerto': str(puerto), 'procesos': str(procesos)}
+        comando = [sys.executable] + [a.format(**valores) for a in argumentos]
+        entorno = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'miProyecto.settings')}
+        proceso = subprocess.Popen(
+            comando, cwd=settings.BASE_DIR, env=entorno, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        limite = time.monotonic() + 60
+        while time.monotonic() < limite:
+            if proceso.poll() is not None:
+                raise CommandError(f'{servidor} terminó al iniciar (código {proceso.returncode}): {" ".join(comando)}')
+            try:
+                socket.create_connection((host, puerto), timeout=1).close()
+                return proceso, f'http://{host}:{puerto}'
+            except OSError:
+                time.sleep(0.2)
+        proceso.terminate()
+        raise CommandError(f'{servidor} no respondió en {host}:{puerto} después de 60 s.')
+
+    def _commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                capture_output=True, text=True, timeout=10,
+            ).stdout.strip() or None
+        except OSError:
+            return None
+
+    def _imprimir(self, resumen, anterior):
+        columnas = ('peticiones', 'por_segundo', 'tasa_error', 'p50_ms', 'p95_ms', 'p99_ms')
+        self.stdout.write(f'{"endpoint":<40}' + ''.join(f'{c:>13}' for c in columnas))
+        for endpoint, fila in resumen.items():
+            self.stdout.write(f'{endpoint:<40}' + ''.join(f'{self._valor(fila[c]):>13}' for c in columnas))
+            previa = (anterior or {}).get('endpoints', {}).get(endpoint)
+            if previa:
+                self.stdout.write(f'{"  vs. anterior":<40}' + ''.join(
+                    f'{self._variacion(previa.get(c), fila[c]):>13}' for c in columnas
+                ))
+
+    @staticmethod
+    def _valor(valor):
+        return '-' if valor is None else f'{valor:g}'
+
+    @staticmethod
+    def _variacion(antes, ahora):
+        if not antes or ahora is None:
+            return '-'
+        return f'{100 * (ahora - antes) / antes:+.1f}%'
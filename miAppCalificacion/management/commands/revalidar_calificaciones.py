@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Count
+
+from miAppCalificacion import reglas
+from miAppCalificacion.models import ViolacionRegla
+
+
+class Command(BaseCommand):
+    help = (
+        'Revalida todas las calificaciones contra las reglas de negocio (suma de factores, '
+        'factores y montos negativos, periodos invertidos) y guarda las violaciones en '
+        'ViolacionRegla. Pensado para ejecutarse cada noche desde cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tamano-bloque', type=int, default=reglas.TAMANO_BLOQUE,
+                            help=f'Filas leídas por consulta (por defecto {reglas.TAMANO_BLOQUE}).')
+        parser.add_argument('--conservar', type=int, default=7,
+                            help='Revalidaciones que se conservan, contando la nueva (por defecto 7).')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS,
+                            help='BD de lectura (ej. la réplica); el reporte se escribe siempre en default.')
+
+    def handle(self, *args, **options):
+        if options['tamano_bloque'] < 1 or options['conservar'] < 1:
+            raise CommandError('--tamano-bloque y --conservar deben ser al menos 1.')
+
+        def progreso(filas, violaciones):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'  {filas} filas revisadas, {violaciones} violaciones')
+
+        inicio = time.perf_counter()
+        revalidacion = reglas.revalidar(options['tamano_bloque'], options['database'], progreso)
+        segundos = time.perf_counter() - inicio
+
+        etiquetas = dict(ViolacionRegla.REGLA_CHOICES)
+        por_regla = revalidacion.violaciones.values_list('regla').annotate(total=Count('pk')).order_by('regla')
+        for regla, total in por_regla:
+            self.stdout.write(f'{etiquetas.get(regla, regla)}: {total}')
+
+        eliminadas = reglas.depurar(options['conservar'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Revalidación {revalidacion.pk}: {revalidacion.filas_revisadas} filas revisadas en {segundos:.1f} s, '
+            f'{revalidacion.total_violaciones} violaciones. {eliminadas} revalidaciones antiguas eliminadas.'
+        ))
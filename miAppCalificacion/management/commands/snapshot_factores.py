@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from miAppCalificacion import matriz_factores
+
+
+class Command(BaseCommand):
+    help = 'Regenera el snapshot columnar (.npy) de la matriz de factores 8 al 37.'
+
+    def handle(self, *args, **options):
+        version = matriz_factores.generar_snapshot()
+        matriz = matriz_factores.cargar_matriz()
+        self.stdout.write(self.style.SUCCESS(
+            f'Snapshot {version} generado con {len(matriz)} filas.'
+        ))
@@ -0,0 +1,72 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from miAppCalificacion import volcado
+from miAppCalificacion.versiones import (
+    incrementar_version, TABLA_CALIFICACIONES, TABLA_CATALOGOS, TABLA_EMPRESAS, TABLA_USUARIOS,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Vuelca o restaura los datos del proyecto (usuarios, roles, países, monedas, tasas, '
+        'subsidiarias, calificaciones e históricos) con COPY de PostgreSQL, varias tablas a la vez. '
+        'Reemplaza a dumpdata/loaddata para refrescar staging desde producción. Importar VACÍA '
+        'las tablas de destino (y, en cascada, los tokens de la API y el log del admin).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('accion', choices=['exportar', 'importar'])
+        parser.add_argument('directorio', help='Directorio del volcado (un archivo por tabla y manifest.json).')
+        parser.add_argument('--formato', choices=volcado.FORMATOS, default='binary',
+                            help='binary (más rápido) o csv (legible y tolerante a cambios de tipo). Sólo al exportar.')
+        parser.add_argument('--workers', type=int, default=4, help='Tablas procesadas a la vez (por defecto 4).')
+        parser.add_argument('--anonimizar', action='store_true',
+                            help='Reemplaza los datos personales de los usuarios al exportar.')
+        parser.add_argument('--noinput', '--no-input', action='store_false', dest='interactive',
+                            help='No pide confirmación antes de vaciar las tablas al importar.')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError('--workers debe ser al menos 1.')
+
+        def progreso(tabla, filas):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'  {tabla}: {filas} filas')
+
+        inicio = time.perf_counter()
+        try:
+            if options['accion'] == 'exportar':
+                manifiesto = volcado.exportar(
+                    options['directorio'], options['formato'], options['workers'],
+                    options['anonimizar'], options['database'], progreso,
+                )
+            else:
+                if options['interactive']:
+                    respuesta = input(
+                        f'Se vaciarán las tablas de la base "{options["database"]}" y se cargará el volcado '
+                        f'de {options["directorio"]}. Escriba "si" para continuar: '
+                    )
+                    if respuesta.strip().lower() not in ('si', 'sí'):
+                        raise CommandError('Importación cancelada.')
+                manifiesto = volcado.importar(options['directorio'], options['workers'], options['database'], progreso)
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+        segundos = time.perf_counter() - inicio
+
+        total = sum(tabla['filas'] for tabla in manifiesto['tablas'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{options["accion"].capitalize()}: {len(manifiesto["tablas"])} tablas, {total} filas '
+            f'en {segundos:.1f} s (formato {manifiesto["formato"]}'
+            f'{", anonimizado" if manifiesto["anonimizado"] else ""}).'
+        ))
+
+        if options['accion'] == 'importar' and options['database'] == DEFAULT_DB_ALIAS:
+            # COPY no dispara señales: se invalidan las cachés y se regenera el snapshot de factores
+            incrementar_version(TABLA_CALIFICACIONES, TABLA_USUARIOS, TABLA_EMPRESAS, TABLA_CATALOGOS)
+            from miAppCalificacion import matriz_factores
+            if matriz_factores.version_actual():
+                self.stdout.write(f'Snapshot de factores {matriz_factores.generar_snapshot()} regenerado.')
@@ -0,0 +1,307 @@
+# miAppCalificacion/matriz_factores.py
+"""
+Snapshot columnar de la matriz de factores (Factor 8 al 37) para analítica.
+
+Cada snapshot es un directorio con un archivo .npy por columna:
+
+    ids.npy          int64            PK de CalificacionTributaria
+    empresa.npy      int64            empresa_subsidiaria_id
+    ejercicio.npy    int32            -1 si es nulo
+    instrumento.npy  int32            código en instrumentos.json, -1 si está vacío
+    fecha.npy        datetime64[D]    fecha_pago, NaT si es nula
+    secuencia.npy    int32            -1 si es nula
+    factores.npy     float64 (n, 30)  NaN si el factor es nulo
+
+El archivo `actual.json` apunta al directorio vigente y se reemplaza de forma atómica,
+por lo que los lectores nunca ven un snapshot a medio escribir. `cargar_matriz()` abre
+las columnas con mmap: los arreglos se leen directo del disco sin copiarlos a memoria.
+
+Los refrescos (generar_snapshot, actualizar_snapshot) se serializan con un bloqueo de
+archivo (flock sobre `.bloqueo` en el directorio base), que vale entre los hilos y los
+procesos de la máquina: vistas, API, trabajos y comandos pueden llamarlos sin coordinarse.
+Al publicar se conserva la versión reemplazada (un lector puede haber leído actual.json
+y aún no abrir sus columnas) y se borran sólo las anteriores a ella.
+"""
+
+import contextlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    # Sin flock (Windows) los refrescos sólo se serializan dentro del proceso
+    fcntl = None
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from .models import CalificacionTributaria, FACTOR_FIELDS
+
+COLUMNAS_CLAVE = ('ids', 'empresa', 'ejercicio', 'instrumento', 'fecha', 'secuencia')
+DTYPES = {
+    'ids': np.int64,
+    'empresa': np.int64,
+    'ejercicio': np.int32,
+    'instrumento': np.int32,
+    'fecha': 'datetime64[D]',
+    'secuencia': np.int32,
+}
+N_FACTORES = len(FACTOR_FIELDS)
+
+# Filas por lote al leer de la BD y al copiar entre snapshots
+TAMANO_LOTE = 20000
+# Lecturas completas de la tabla antes de desistir si su tamaño sigue cambiando
+INTENTOS_SNAPSHOT = 3
+
+_lock = threading.Lock()
+_VERSION = re.compile(r'v(\d+)')
+
+_CAMPOS_CONSULTA = (
+    'pk', 'empresa_subsidiaria_id', 'ejercicio', 'instrumento', 'fecha_pago', 'secuencia', *FACTOR_FIELDS
+)
+
+
+class _SnapshotDesfasado(Exception):
+    """La tabla cambió de tamaño mientras se generaba el snapshot."""
+
+
+class MatrizFactores:
+    """Columnas del snapshot (arreglos NumPy de solo lectura, mapeados a memoria)."""
+
+    def __init__(self, directorio, version, instrumentos):
+        self.version = version
+        self.instrumentos = instrumentos
+        for nombre in COLUMNAS_CLAVE + ('factores',):
+            setattr(self, nombre, np.load(os.path.join(directorio, f'{nombre}.npy'), mmap_mode='r'))
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def _directorio_base():
+    return str(getattr(settings, 'FACTORES_SNAPSHOT_DIR', settings.BASE_DIR / 'snapshots' / 'factores'))
+
+
+def _leer_actual():
+    try:
+        with open(os.path.join(_directorio_base(), 'actual.json'), encoding='utf-8') as archivo:
+            return json.load(archivo)
+    except FileNotFoundError:
+        return None
+
+
+@contextlib.contextmanager
+def _bloqueo():
+    """Bloqueo exclusivo de los refrescos del snapshot (ver el docstring del módulo)."""
+    base = _directorio_base()
+    os.makedirs(base, exist_ok=True)
+    with _lock, open(os.path.join(base, '.bloqueo'), 'a') as archivo:
+        if fcntl is not None:
+            fcntl.flock(archivo, fcntl.LOCK_EX)
+        # Cerrar el archivo libera el flock
+        yield
+
+
+def _versiones(base):
+    """{número: nombre} de los directorios de snapshot en `base`."""
+    return {
+        int(coincidencia.group(1)): nombre
+        for nombre in os.listdir(base)
+        for coincidencia in [_VERSION.fullmatch(nombre)] if coincidencia
+    }
+
+
+def version_actual():
+    """Versión del snapshot vigente (cambia en cada refresco), o None si aún no existe."""
+    actual = _leer_actual()
+    return actual['version'] if actual else None
+
+
+def cargar_matriz():
+    """Abre el snapshot vigente sin copiarlo a memoria. Retorna None si aún no se ha generado."""
+    for _ in range(INTENTOS_SNAPSHOT):
+        actual = _leer_actual()
+        if actual is None:
+            return None
+        try:
+            return MatrizFactores(
+                os.path.join(_directorio_base(), actual['version']), actual['version'], actual['instrumentos']
+            )
+        except FileNotFoundError:
+            # Entre leer actual.json y abrir las columnas se publicaron dos versiones más
+            continue
+    raise RuntimeError('El snapshot de factores cambió mientras se abría; reintente.')
+
+
+class _Escritor:
+    """Escribe un snapshot nuevo columna a columna en un directorio versionado."""
+
+    def __init__(self, filas, instrumentos):
+        self.base = _directorio_base()
+        self.version = f'v{time.time_ns()}'
+        self.directorio = os.path.join(self.base, self.version)
+        self.instrumentos = instrumentos
+        self.filas = filas
+        self.posicion = 0
+        os.makedirs(self.directorio)
+        self.columnas = {
+            nombre: np.lib.format.open_memmap(
+                os.path.join(self.directorio, f'{nombre}.npy'), mode='w+', dtype=dtype, shape=(filas,)
+            )
+            for nombre, dtype in DTYPES.items()
+        }
+        self.columnas['factores'] = np.lib.format.open_memmap(
+            os.path.join(self.directorio, 'factores.npy'), mode='w+', dtype=np.float64, shape=(filas, N_FACTORES)
+        )
+
+    def agregar(self, bloque):
+        n = len(bloque['ids'])
+        if self.posicion + n > self.filas:
+            raise _SnapshotDesfasado()
+        for nombre, columna in self.columnas.items():
+            columna[self.posicion:self.posicion + n] = bloque[nombre]
+        self.posicion += n
+
+    def descartar(self):
+        del self.columnas
+        shutil.rmtree(self.directorio, ignore_errors=True)
+
+    def publicar(self):
+        if self.posicion != self.filas:
+            raise _SnapshotDesfasado()
+        for columna in self.columnas.values():
+            columna.flush()
+        del self.columnas
+
+        anterior = _leer_actual()
+        descriptor, temporal = tempfile.mkstemp(prefix='actual.json.', suffix='.tmp', dir=self.base)
+        with open(descriptor, 'w', encoding='utf-8') as archivo:
+            json.dump({
+                'version': self.version,
+                'filas': self.filas,
+                'instrumentos': self.instrumentos,
+                'generado': timezone.now().isoformat(),
+            }, archivo)
+        os.replace(temporal, os.path.join(self.base, 'actual.json'))
+
+        # Se conserva la versión reemplazada; las anteriores a ella (y los restos de
+        # refrescos interrumpidos) ya no las puede estar abriendo nadie. Los lectores que
+        # aún las tengan mapeadas siguen funcionando: en Linux los archivos borrados
+        # permanecen accesibles mientras estén abiertos.
+        if anterior:
+            limite = int(_VERSION.fullmatch(anterior['version']).group(1))
+            for numero, nombre in _versiones(self.base).items():
+                if numero < limite:
+                    shutil.rmtree(os.path.join(self.base, nombre), ignore_errors=True)
+        return self.version
+
+
+def _bloques_desde_bd(queryset, instrumentos):
+    """Convierte filas de la BD en bloques columnares, actualizando el vocabulario de instrumentos."""
+    codigos = {nombre: codigo for codigo, nombre in enumerate(instrumentos)}
+    filas = queryset.order_by('pk').values_list(*_CAMPOS_CONSULTA).iterator(chunk_size=TAMANO_LOTE)
+
+    while True:
+        lote = [fila for _, fila in zip(range(TAMANO_LOTE), filas)]
+        if not lote:
+            return
+        ids, empresas, ejercicios, instrumentos_lote, fechas, secuencias = [], [], [], [], [], []
+        factores = np.empty((len(lote), N_FACTORES), dtype=np.float64)
+        for i, (pk, empresa, ejercicio, instrumento, fecha, secuencia, *valores) in enumerate(lote):
+            ids.append(pk)
+            empresas.append(empresa)
+            ejercicios.append(-1 if ejercicio is None else ejercicio)
+            if instrumento:
+                if instrumento not in codigos:
+                    codigos[instrumento] = len(instrumentos)
+                    instrumentos.append(instrumento)
+                instrumentos_lote.append(codigos[instrumento])
+            else:
+                instrumentos_lote.append(-1)
+            fechas.append(fecha)
+            secuencias.append(-1 if secuencia is None else secuencia)
+            factores[i] = [np.nan if valor is None else float(valor) for valor in valores]
+        yield {
+            'ids': np.asarray(ids, dtype=np.int64),
+            'empresa': np.asarray(empresas, dtype=np.int64),
+            'ejercicio': np.asarray(ejercicios, dtype=np.int32),
+            'instrumento': np.asarray(instrumentos_lote, dtype=np.int32),
+            'fecha': np.array(fechas, dtype='datetime64[D]'),
+            'secuencia': np.asarray(secuencias, dtype=np.int32),
+            'factores': factores,
+        }
+
+
+def _filas_con_factores():
+    # Sólo las filas provenientes de la carga de factores forman parte de la matriz
+    return CalificacionTributaria.objects.filter(ejercicio__isnull=False)
+
+
+def generar_snapshot():
+    """Reconstruye el snapshot completo leyendo la BD por lotes (memoria constante)."""
+    with _bloqueo():
+        return _generar()
+
+
+def _generar():
+    queryset = _filas_con_factores()
+    for _ in range(INTENTOS_SNAPSHOT):
+        instrumentos = []
+        escritor = _Escritor(queryset.count(), instrumentos)
+        try:
+            for bloque in _bloques_desde_bd(queryset, instrumentos):
+                escritor.agregar(bloque)
+            return escritor.publicar()
+        except _SnapshotDesfasado:
+            # Se insertaron o eliminaron filas entre el count() y la lectura: se reintenta
+            escritor.descartar()
+    raise RuntimeError(
+        f'La tabla de calificaciones cambió durante {INTENTOS_SNAPSHOT} lecturas seguidas; no se generó el snapshot.'
+    )
+
+
+def actualizar_snapshot(pks):
+    """
+    Refresco incremental tras una importación.
+
+    Sólo se consultan en la BD las filas de `pks` (creadas, modificadas o eliminadas);
+    el resto se copia por bloques desde el snapshot vigente sin pasar por el ORM.
+    """
+    with _bloqueo():
+        return _actualizar(pks)
+
+
+def _actualizar(pks):
+    matriz = cargar_matriz()
+    if matriz is None:
+        return _generar()
+
+    pks = np.unique(np.asarray(list(pks), dtype=np.int64))
+    instrumentos = list(matriz.instrumentos)
+    nuevos = []
+    for inicio in range(0, len(pks), TAMANO_LOTE):
+        lote_pks = pks[inicio:inicio + TAMANO_LOTE].tolist()
+        nuevos.extend(_bloques_desde_bd(_filas_con_factores().filter(pk__in=lote_pks), instrumentos))
+
+    conservar = ~np.isin(matriz.ids, pks)
+    total = int(conservar.sum()) + sum(len(bloque['ids']) for bloque in nuevos)
+    escritor = _Escritor(total, instrumentos)
+
+    for inicio in range(0, len(matriz), TAMANO_LOTE):
+        mascara = conservar[inicio:inicio + TAMANO_LOTE]
+        escritor.agregar({
+            nombre: getattr(matriz, nombre)[inicio:inicio + TAMANO_LOTE][mascara]
+            for nombre in COLUMNAS_CLAVE + ('factores',)
+        })
+    for bloque in nuevos:
+        escritor.agregar(bloque)
+
+    del matriz
+    return escritor.publicar()
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+# Índices para el autocompletado (campo__istartswith). En PostgreSQL la búsqueda se traduce
+# a UPPER(campo::text) LIKE 'ABC%', que sólo usa un índice sobre esa misma expresión con
+# text_pattern_ops. Otros motores (ej. SQLite en desarrollo) no soportan esa sintaxis.
+INDICES = [
+    ('empresa_nombre_prefijo_idx', 'miAppCalificacion_empresasubsidiaria', 'nombre_legal'),
+    ('pais_nombre_prefijo_idx', 'miAppCalificacion_pais', 'nombre'),
+]
+
+
+def crear_indices(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for nombre, tabla, campo in INDICES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{nombre}" ON "{tabla}" (UPPER("{campo}"::text) text_pattern_ops)'
+        )
+
+
+def eliminar_indices(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for nombre, _, _ in INDICES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{nombre}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miAppCalificacion', '0003_calificacion_factores'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indices, eliminar_indices),
+    ]
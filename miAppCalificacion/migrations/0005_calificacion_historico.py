@@ -0,0 +1,37 @@
+# Generated by Django 5.0.6 on 2026-10-18 22:17
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miAppCalificacion', '0004_indices_prefijo'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CalificacionHistorico',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('calificacion_id', models.BigIntegerField(db_index=True, verbose_name='ID Calificación')),
+                ('fecha_inicio_periodo', models.DateField()),
+                ('monto_impuesto', models.DecimalField(blank=True, decimal_places=2, max_digits=18, null=True)),
+                ('accion', models.CharField(choices=[('ESTADO', 'Cambio de estado'), ('ELIMINACION', 'Eliminación')], max_length=20)),
+                ('estado_anterior', models.CharField(blank=True, max_length=20)),
+                ('estado_nuevo', models.CharField(blank=True, max_length=20)),
+                ('modified_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('empresa_subsidiaria', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='historicos_calificacion', to='miAppCalificacion.empresasubsidiaria', verbose_name='Empresa Subsidiaria')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='historicos_calificacion', to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Histórico de Calificación',
+                'verbose_name_plural': 'Históricos de Calificaciones',
+                'ordering': ['-modified_at'],
+            },
+        ),
+    ]
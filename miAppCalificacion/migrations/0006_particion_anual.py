@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.db import migrations
+
+# Particionamiento anual de CalificacionTributaria (ver miAppCalificacion/particiones.py).
+# Es opcional: sólo se aplica en PostgreSQL con CALIFICACIONES_PARTICIONADAS=True. Si se
+# activa después de migrar, usar `manage.py particiones_calificaciones --activar`.
+
+
+def particionar(apps, schema_editor):
+    from miAppCalificacion import particiones
+
+    conexion = schema_editor.connection
+    if conexion.vendor != 'postgresql' or not getattr(settings, 'CALIFICACIONES_PARTICIONADAS', False):
+        return
+    if not particiones.esta_particionada(conexion):
+        particiones.particionar(conexion)
+
+
+def desparticionar(apps, schema_editor):
+    from miAppCalificacion import particiones
+
+    conexion = schema_editor.connection
+    if particiones.esta_particionada(conexion):
+        particiones.desparticionar(conexion)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miAppCalificacion', '0005_calificacion_historico'),
+    ]
+
+    operations = [
+        migrations.RunPython(particionar, desparticionar),
+    ]
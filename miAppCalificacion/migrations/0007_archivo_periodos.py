@@ -0,0 +1,95 @@
+# Generated by Django 5.0.6 on 2026-10-18 22:35
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miAppCalificacion', '0006_particion_anual'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CalificacionHistoricoArchivado',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('archivado_en', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Archivado en')),
+                ('calificacion_id', models.BigIntegerField(db_index=True, verbose_name='ID Calificación')),
+                ('fecha_inicio_periodo', models.DateField()),
+                ('monto_impuesto', models.DecimalField(blank=True, decimal_places=2, max_digits=18, null=True)),
+                ('accion', models.CharField(choices=[('ESTADO', 'Cambio de estado'), ('ELIMINACION', 'Eliminación')], max_length=20)),
+                ('estado_anterior', models.CharField(blank=True, max_length=20)),
+                ('estado_nuevo', models.CharField(blank=True, max_length=20)),
+                ('modified_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('empresa_subsidiaria', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='miAppCalificacion.empresasubsidiaria', verbose_name='Empresa Subsidiaria')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Histórico de Calificación Archivado',
+                'verbose_name_plural': 'Históricos de Calificaciones Archivados',
+            },
+        ),
+        migrations.CreateModel(
+            name='CalificacionArchivada',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('archivada_en', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Archivada en')),
+                ('fecha_inicio_periodo', models.DateField()),
+                ('fecha_fin_periodo', models.DateField()),
+                ('monto_impuesto', models.DecimalField(decimal_places=2, max_digits=18, verbose_name='Monto del Impuesto')),
+                ('estado', models.CharField(max_length=20, verbose_name='Estado')),
+                ('origen', models.CharField(blank=True, default='', max_length=50, verbose_name='Origen del Registro')),
+                ('ejercicio', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Ejercicio')),
+                ('mercado', models.CharField(blank=True, default='', max_length=50, verbose_name='Mercado')),
+                ('instrumento', models.CharField(blank=True, default='', max_length=50, verbose_name='Instrumento')),
+                ('fecha_pago', models.DateField(blank=True, null=True, verbose_name='Fecha de Pago')),
+                ('secuencia', models.PositiveIntegerField(blank=True, null=True, verbose_name='Secuencia')),
+                ('numero_dividendo', models.PositiveIntegerField(blank=True, null=True, verbose_name='Número de Dividendo')),
+                ('tipo_sociedad', models.CharField(blank=True, default='', max_length=50, verbose_name='Tipo de Sociedad')),
+                ('valor_historico', models.DecimalField(blank=True, decimal_places=2, max_digits=18, null=True, verbose_name='Valor Histórico')),
+                ('factor_8', models.DecimalField(blank=True, decimal_places=8, max_digits=12, null=True, verbose_name='Factor 8')),
+                ('factor_9', models.DecimalField(blank=True, decimal_places=8, max_digits=12, null=True, verbose_name='Factor 9')),
+                ('factor_10', models.DecimalField(blank=True, decimal_places=8, max_digits=12, null=True, verbose_name='Factor 10')),
+                ('factor_11', models.DecimalField(blank=True, decimal_places=8, max_digits=12, null=True, verbose_name='Factor 11')),
+                ('factor_12', models.DecimalField(blank=True, decimal_places=8, max_digits=12, null=True, verbose_name='Factor 12')),
+                ('factor_13', models.DecimalField(blank=True, decimal_places=8, max_digits=12, null=True, verbose_name='Factor 13')),
+                ('factor_14', models.DecimalField(blank=True, decimal_places=8, max_digits=12, null=True, verbose_name='Factor 14')),
+                ('factor_15', models.DecimalField(blank=True, decimal_places=8, max_digits=12, null=True, verbose_name='Factor 15')),
+                ('factor_16', models.DecimalField(blank=True, decimal_places=8, max_digits=12, null=True, verbose_name='Factor 16')),
+                ('factor_17', models.DecimalField(blank=True, decimal_places=8, max_digits=12, null=True, verbose_name='Factor 17')),
+                ('factor_18', models.DecimalField(blank=True, decimal_places=8, max_digits=12, null=True, verbose_name='Factor 18')),
+                ('factor_19', models.DecimalField(blank=True, decimal_places=8, max_digits=12, null=True, verbose_name='Factor 19')),
+                ('factor_20', models.DecimalField(blank=True, decimal_places=8, max_digits=12, null=True, verbose_name='Factor 20')),
+                ('factor_21', models.DecimalField(blank=True, decimal_places=8, max_digits=12, null=True, verbose_name='Factor 21')),
+                ('factor_22', models.DecimalField(blank=True, decimal_places=8, max_digits=12, null=True, verbose_name='Factor 22')),
+                ('factor_23', models.DecimalField(blank=True, decimal_places=8, max_digits=12, null=True, verbose_name='Factor 23')),
+                ('factor_24', models.DecimalField(blank=True, decimal_places=8, max_digits=12, null=True, verbose_name='Factor 24')),
+                ('factor_25', models.DecimalField(blank=True, decimal_places=8, max_digits=12, null=True, verbose_name='Factor 25')),
+                ('factor_26', models.DecimalField(blank=True, decimal_places=8, max_digits=12, null=True, verbose_name='Factor 26')),
+                ('factor_27', models.DecimalField(blank=True, decimal_places=8, max_digits=12, null=True, verbose_name='Factor 27')),
+                ('factor_28', models.DecimalField(blank=True, decimal_places=8, max_digits=12, null=True, verbose_name='Factor 28')),
+                ('factor_29', models.DecimalField(blank=True, decimal_places=8, max_digits=12, null=True, verbose_name='Factor 29')),
+                ('factor_30', models.DecimalField(blank=True, decimal_places=8, max_digits=12, null=True, verbose_name='Factor 30')),
+                ('factor_31', models.DecimalField(blank=True, decimal_places=8, max_digits=12, null=True, verbose_name='Factor 31')),
+                ('factor_32', models.DecimalField(blank=True, decimal_places=8, max_digits=12, null=True, verbose_name='Factor 32')),
+                ('factor_33', models.DecimalField(blank=True, decimal_places=8, max_digits=12, null=True, verbose_name='Factor 33')),
+                ('factor_34', models.DecimalField(blank=True, decimal_places=8, max_digits=12, null=True, verbose_name='Factor 34')),
+                ('factor_35', models.DecimalField(blank=True, decimal_places=8, max_digits=12, null=True, verbose_name='Factor 35')),
+                ('factor_36', models.DecimalField(blank=True, decimal_places=8, max_digits=12, null=True, verbose_name='Factor 36')),
+                ('factor_37', models.DecimalField(blank=True, decimal_places=8, max_digits=12, null=True, verbose_name='Factor 37')),
+                ('empresa_subsidiaria', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='miAppCalificacion.empresasubsidiaria', verbose_name='Empresa Subsidiaria')),
+                ('usuario_creador', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Usuario Creador')),
+                ('usuario_modificador', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Usuario Modificador')),
+            ],
+            options={
+                'verbose_name': 'Calificación Archivada',
+                'verbose_name_plural': 'Calificaciones Archivadas',
+                'indexes': [models.Index(fields=['empresa_subsidiaria', 'fecha_inicio_periodo'], name='calif_archivada_empresa_idx')],
+            },
+        ),
+    ]
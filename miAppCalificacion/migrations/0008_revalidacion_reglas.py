@@ -0,0 +1,46 @@
+# Generated by Django 5.0.6 on 2026-10-18 22:50
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miAppCalificacion', '0007_archivo_periodos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Revalidacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('iniciada_en', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Iniciada en')),
+                ('terminada_en', models.DateTimeField(blank=True, null=True, verbose_name='Terminada en')),
+                ('filas_revisadas', models.PositiveBigIntegerField(default=0, verbose_name='Filas revisadas')),
+                ('total_violaciones', models.PositiveBigIntegerField(default=0, verbose_name='Violaciones')),
+            ],
+            options={
+                'verbose_name': 'Revalidación',
+                'verbose_name_plural': 'Revalidaciones',
+                'ordering': ['-iniciada_en'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ViolacionRegla',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('calificacion_id', models.BigIntegerField(db_index=True, verbose_name='ID Calificación')),
+                ('regla', models.CharField(choices=[('SUMA_FACTORES', 'Suma de factores 8 al 19 mayor que 1'), ('FACTOR_NEGATIVO', 'Factor negativo'), ('PERIODO_INVERTIDO', 'Fecha de fin anterior a la de inicio'), ('MONTO_NEGATIVO', 'Monto de impuesto negativo')], max_length=30, verbose_name='Regla')),
+                ('valor', models.FloatField(blank=True, null=True, verbose_name='Valor')),
+                ('empresa_subsidiaria', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='violaciones_regla', to='miAppCalificacion.empresasubsidiaria', verbose_name='Empresa Subsidiaria')),
+                ('revalidacion', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='violaciones', to='miAppCalificacion.revalidacion', verbose_name='Revalidación')),
+            ],
+            options={
+                'verbose_name': 'Violación de Regla',
+                'verbose_name_plural': 'Violaciones de Reglas',
+                'indexes': [models.Index(fields=['revalidacion', 'regla'], name='violacion_regla_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.0.6 on 2026-10-18 22:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+# Búsqueda por prefijo del ID fiscal en el admin; ver 0004_indices_prefijo.py
+INDICES = [
+    ('empresa_idfiscal_prefijo_idx', 'miAppCalificacion_empresasubsidiaria', 'identificacion_fiscal'),
+]
+
+
+def crear_indices(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for nombre, tabla, campo in INDICES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{nombre}" ON "{tabla}" (UPPER("{campo}"::text) text_pattern_ops)'
+        )
+
+
+def eliminar_indices(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for nombre, _, _ in INDICES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{nombre}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miAppCalificacion', '0008_revalidacion_reglas'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='calificaciontributaria',
+            index=models.Index(fields=['fecha_inicio_periodo'], name='calif_fecha_inicio_idx'),
+        ),
+        migrations.RunPython(crear_indices, eliminar_indices),
+    ]
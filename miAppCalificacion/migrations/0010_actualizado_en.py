@@ -0,0 +1,23 @@
+# Generated by Django 5.0.6 on 2026-10-18 23:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miAppCalificacion', '0009_indices_admin'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='calificacionarchivada',
+            name='actualizado_en',
+            field=models.DateTimeField(auto_now=True, verbose_name='Actualizado en'),
+        ),
+        migrations.AddField(
+            model_name='calificaciontributaria',
+            name='actualizado_en',
+            field=models.DateTimeField(auto_now=True, verbose_name='Actualizado en'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+import re
+
+from django.db import migrations, models
+
+
+def _canonizar(valor):
+    # Copia de models.canonizar_id_fiscal al momento de esta migración
+    texto = str(valor).strip()
+    if re.fullmatch(r'\d+\.0', texto):
+        texto = texto[:-2]
+    return re.sub(r'[^0-9A-Z]', '', texto.upper()).lstrip('0')
+
+
+def poblar(apps, schema_editor):
+    EmpresaSubsidiaria = apps.get_model('miAppCalificacion', 'EmpresaSubsidiaria')
+    empresas = list(EmpresaSubsidiaria.objects.only('pk', 'identificacion_fiscal'))
+    por_canonica = {}
+    for empresa in empresas:
+        empresa.identificacion_fiscal_canonica = _canonizar(empresa.identificacion_fiscal)
+        por_canonica.setdefault(empresa.identificacion_fiscal_canonica, []).append(empresa.identificacion_fiscal)
+    # Dos subsidiarias con el mismo ID en distinto formato (o un ID sin letras ni dígitos)
+    # deben corregirse a mano antes de migrar: no se elige cuál es la correcta
+    conflictos = {canonica: ids for canonica, ids in por_canonica.items() if len(ids) > 1 or not canonica}
+    if conflictos:
+        raise RuntimeError(
+            'Subsidiarias con el mismo ID fiscal canónico: '
+            + '; '.join(f'{canonica or "(vacío)"}: {", ".join(ids)}' for canonica, ids in conflictos.items())
+        )
+    EmpresaSubsidiaria.objects.bulk_update(empresas, ['identificacion_fiscal_canonica'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miAppCalificacion', '0010_actualizado_en'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='empresasubsidiaria',
+            name='identificacion_fiscal_canonica',
+            field=models.CharField(editable=False, max_length=50, null=True),
+        ),
+        migrations.RunPython(poblar, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='empresasubsidiaria',
+            name='identificacion_fiscal_canonica',
+            field=models.CharField(editable=False, max_length=50, unique=True),
+        ),
+    ]
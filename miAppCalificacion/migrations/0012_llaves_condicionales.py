@@ -0,0 +1,43 @@
+# Generated by Django 5.0.6 on 2026-10-18 23:34
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miAppCalificacion', '0011_identificacion_fiscal_canonica'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='calificaciontributaria',
+            unique_together=set(),
+        ),
+        migrations.AlterField(
+            model_name='calificacionarchivada',
+            name='estado',
+            field=models.CharField(blank=True, default='', max_length=20, verbose_name='Estado'),
+        ),
+        migrations.AlterField(
+            model_name='calificacionarchivada',
+            name='monto_impuesto',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=18, null=True, verbose_name='Monto del Impuesto'),
+        ),
+        migrations.AlterField(
+            model_name='calificaciontributaria',
+            name='estado',
+            field=models.CharField(blank=True, default='', max_length=20, verbose_name='Estado'),
+        ),
+        migrations.AlterField(
+            model_name='calificaciontributaria',
+            name='monto_impuesto',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=18, null=True, verbose_name='Monto del Impuesto'),
+        ),
+        migrations.AddConstraint(
+            model_name='calificaciontributaria',
+            constraint=models.UniqueConstraint(condition=models.Q(('ejercicio__isnull', True)), fields=('empresa_subsidiaria', 'fecha_inicio_periodo'), name='calif_monto_unica'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.6 on 2026-10-18 23:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miAppCalificacion', '0012_llaves_condicionales'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='calificaciontributaria',
+            constraint=models.UniqueConstraint(condition=models.Q(('ejercicio__isnull', False)), fields=('empresa_subsidiaria', 'ejercicio', 'instrumento', 'fecha_pago', 'secuencia', 'numero_dividendo', 'fecha_inicio_periodo'), name='calif_factor_unica'),
+        ),
+    ]
@@ -1,17 +1,27 @@
+import re
+from datetime import date
+
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.utils import timezone
 from miAppUsuario.models import Usuario
 
 # Create your models here.
 class CalificacionTributaria(models.Model):
     fecha_inicio_periodo = models.DateField()
     fecha_fin_periodo = models.DateField()
+    # Monto y estado son de la carga de Montos (DJ 1948): una fila de factores no los tiene
     monto_impuesto = models.DecimalField(
         max_digits = 18,
         decimal_places = 2,
+        null = True,
+        blank = True,
         verbose_name = "Monto del Impuesto"
     )
     estado = models.CharField(
         max_length = 20,
+        blank = True,
+        default = '',
         verbose_name = "Estado"
     )
     usuario_creador = models.ForeignKey(
@@ -33,15 +43,107 @@ class CalificacionTributaria(models.Model):
         on_delete = models.CASCADE,
         verbose_name = 'Empresa Subsidiaria'
     )
+    origen = models.CharField(
+        max_length = 50,
+        blank = True,
+        default = '',
+        verbose_name = "Origen del Registro"
+    )
+
+    # Datos de la carga de Factores (DJ 1949)
+    ejercicio = models.PositiveSmallIntegerField(null=True, blank=True, verbose_name="Ejercicio")
+    mercado = models.CharField(max_length=50, blank=True, default='', verbose_name="Mercado")
+    instrumento = models.CharField(max_length=50, blank=True, default='', verbose_name="Instrumento")
+    fecha_pago = models.DateField(null=True, blank=True, verbose_name="Fecha de Pago")
+    secuencia = models.PositiveIntegerField(null=True, blank=True, verbose_name="Secuencia")
+    numero_dividendo = models.PositiveIntegerField(null=True, blank=True, verbose_name="Número de Dividendo")
+    tipo_sociedad = models.CharField(max_length=50, blank=True, default='', verbose_name="Tipo de Sociedad")
+    valor_historico = models.DecimalField(
+        max_digits = 18,
+        decimal_places = 2,
+        null = True,
+        blank = True,
+        verbose_name = "Valor Histórico"
+    )
+    # Las actualizaciones con update() deben asignarla explícitamente (ver acciones.py)
+    actualizado_en = models.DateTimeField(auto_now=True, verbose_name="Actualizado en")
 
     class Meta:
         verbose_name = "Calificación Tributaria"
         verbose_name_plural = "Calificaciones Tributarias"
-        unique_together = ('empresa_subsidiaria', 'fecha_inicio_periodo')
+        # Una fila de montos por subsidiaria y periodo; las de factores (con ejercicio) tienen
+        # su propia llave. Ambas incluyen fecha_inicio_periodo, la columna de partición (particiones.py)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['empresa_subsidiaria', 'fecha_inicio_periodo'],
+                condition=models.Q(ejercicio__isnull=True),
+                name='calif_monto_unica',
+            ),
+            # fecha_inicio_periodo se deriva del ejercicio (periodo_ejercicio): no cambia la llave
+            models.UniqueConstraint(
+                fields=[
+                    'empresa_subsidiaria', 'ejercicio', 'instrumento', 'fecha_pago', 'secuencia',
+                    'numero_dividendo', 'fecha_inicio_periodo',
+                ],
+                condition=models.Q(ejercicio__isnull=False),
+                name='calif_factor_unica',
+            ),
+        ]
+        # Orden del listado y filtro por ejercicio del admin (el índice único empieza por la empresa)
+        indexes = [
+            models.Index(fields=['fecha_inicio_periodo'], name='calif_fecha_inicio_idx'),
+        ]
+
+    def clean(self):
+        super().clean()
+        if self.ejercicio is None and self.monto_impuesto is None:
+            raise ValidationError({'monto_impuesto': 'Una calificación sin ejercicio (de montos) requiere el monto del impuesto.'})
+
+
+
+# Factores 8 al 37 (30 columnas idénticas), se agregan en un ciclo para no repetir 30 definiciones
+FACTOR_NUMEROS = range(8, 38)
+FACTOR_FIELDS = [f'factor_{i}' for i in FACTOR_NUMEROS]
+
+for _numero, _nombre in zip(FACTOR_NUMEROS, FACTOR_FIELDS):
+    CalificacionTributaria.add_to_class(_nombre, models.DecimalField(
+        max_digits = 12,
+        decimal_places = 8,
+        null = True,
+        blank = True,
+        verbose_name = f"Factor {_numero}"
+    ))
+
+def periodo_ejercicio(ejercicio):
+    """(inicio, fin) del periodo de una fila de factores: el año calendario de su ejercicio."""
+    return date(ejercicio, 1, 1), date(ejercicio, 12, 31)
+
+
+def canonizar_id_fiscal(valor):
+    """
+    Forma canónica de un ID fiscal: '76.000.000-k' y '076000000K' -> '76000000K'.
+
+    Mayúsculas, sólo letras y dígitos (sin puntos, guiones ni espacios) y sin ceros a la
+    izquierda. Un número entero leído como decimal ('76000000.0') pierde el '.0'. Un ID
+    sin letras ni dígitos distintos de cero ('0', '-') queda en '': clean() lo rechaza.
+    Hay dos copias que deben comportarse igual (ver CanonizarIdFiscalTests): la versión
+    vectorizada para las cargas, importacion.canonizar_ids_fiscales, y la de la migración
+    0011, que no puede importar el modelo.
+    """
+    texto = str(valor).strip()
+    if re.fullmatch(r'\d+\.0', texto):
+        texto = texto[:-2]
+    return re.sub(r'[^0-9A-Z]', '', texto.upper()).lstrip('0')
+
 
 class EmpresaSubsidiaria(models.Model):
     nombre_legal = models.CharField(max_length=255, unique=True)
     identificacion_fiscal = models.CharField(max_length=50, unique=True)
+    # canonizar_id_fiscal(identificacion_fiscal): las cargas resuelven la subsidiaria por
+    # este índice, así un ID escrito con otro formato (puntos, guion, dígito verificador en
+    # minúscula) es la misma subsidiaria. Sólo save() la mantiene al día: bulk_create,
+    # bulk_update y QuerySet.update() no pasan por save() y deben asignarla ellos mismos
+    identificacion_fiscal_canonica = models.CharField(max_length=50, unique=True, editable=False)
     actividad_principal = models.CharField(max_length=255)
     regimen_fiscal = models.CharField(max_length=100)
     pais_operacion = models.ForeignKey('Pais', on_delete=models.PROTECT)
@@ -52,6 +154,26 @@ class EmpresaSubsidiaria(models.Model):
     def __str__(self):
         return self.nombre_legal
 
+    def clean(self):
+        super().clean()
+        canonica = canonizar_id_fiscal(self.identificacion_fiscal)
+        if not canonica:
+            raise ValidationError({'identificacion_fiscal': 'El ID fiscal debe contener letras o dígitos.'})
+        # El campo no está en los formularios: su unicidad se valida aquí, contra el ID visible
+        if EmpresaSubsidiaria.objects.filter(identificacion_fiscal_canonica=canonica).exclude(pk=self.pk).exists():
+            raise ValidationError({'identificacion_fiscal': 'Ya existe una subsidiaria con este ID fiscal (con otro formato).'})
+
+    def save(self, *args, **kwargs):
+        """
+        Recalcula identificacion_fiscal_canonica. Es el único lugar donde se sincroniza:
+        las escrituras masivas (bulk_create, bulk_update, QuerySet.update) no la tocan.
+        """
+        self.identificacion_fiscal_canonica = canonizar_id_fiscal(self.identificacion_fiscal)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'identificacion_fiscal' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'identificacion_fiscal_canonica'}
+        super().save(*args, **kwargs)
+
 class Pais(models.Model):
     nombre = models.CharField(
         max_length = 50,
@@ -131,4 +253,175 @@ class TasaDeCambio(models.Model):
         unique_together = ('moneda_origen', 'moneda_destino', 'fecha')
 
     def __str__(self):
-        return f"1 {self.moneda_origen.codigo_iso} = {self.valor_tasa} {self.moneda_destino.codigo_iso} ({self.fecha})"
\ No newline at end of file
+        return f"1 {self.moneda_origen.codigo_iso} = {self.valor_tasa} {self.moneda_destino.codigo_iso} ({self.fecha})"
+
+class CalificacionHistorico(models.Model):
+    """
+    Registro de cambios sobre CalificacionTributaria (acciones masivas).
+
+    `calificacion_id` no es una llave foránea para que el histórico sobreviva a la
+    eliminación de la calificación que describe.
+    """
+    ACCION_ESTADO = 'ESTADO'
+    ACCION_ELIMINACION = 'ELIMINACION'
+
+    ACCION_CHOICES = [
+        (ACCION_ESTADO, 'Cambio de estado'),
+        (ACCION_ELIMINACION, 'Eliminación'),
+    ]
+
+    calificacion_id = models.BigIntegerField(db_index=True, verbose_name="ID Calificación")
+    empresa_subsidiaria = models.ForeignKey(
+        'EmpresaSubsidiaria',
+        on_delete = models.CASCADE,
+        related_name = 'historicos_calificacion',
+        verbose_name = 'Empresa Subsidiaria'
+    )
+    fecha_inicio_periodo = models.DateField()
+    monto_impuesto = models.DecimalField(max_digits=18, decimal_places=2, null=True, blank=True)
+    accion = models.CharField(max_length=20, choices=ACCION_CHOICES)
+    estado_anterior = models.CharField(max_length=20, blank=True)
+    estado_nuevo = models.CharField(max_length=20, blank=True)
+    usuario = models.ForeignKey(
+        Usuario,
+        on_delete = models.SET_NULL,
+        null = True,
+        blank = True,
+        related_name = 'historicos_calificacion',
+        verbose_name = 'Usuario'
+    )
+    modified_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-modified_at']
+        verbose_name = "Histórico de Calificación"
+        verbose_name_plural = "Históricos de Calificaciones"
+
+    def __str__(self):
+        return f"{self.get_accion_display()} de calificación {self.calificacion_id} en {self.modified_at}"
+
+
+# --- Archivo de periodos cerrados (ver management/commands/archivar_periodos.py) ---
+
+def _copiar_campos(origen, destino):
+    """
+    Agrega a `destino` una copia de cada columna de `origen` (salvo la llave primaria).
+
+    Las llaves foráneas copiadas no crean relación inversa (related_name='+'), para no
+    chocar con los nombres que ya usa el modelo original.
+    """
+    for campo in origen._meta.concrete_fields:
+        if campo.primary_key:
+            continue
+        if campo.is_relation:
+            # deconstruct() de una FK necesita el registro de apps listo; aquí aún no lo está
+            copia = models.ForeignKey(
+                campo.remote_field.model,
+                on_delete = campo.remote_field.on_delete,
+                related_name = '+',
+                null = campo.null,
+                blank = campo.blank,
+                verbose_name = campo.verbose_name,
+            )
+        else:
+            _, _, args, kwargs = campo.deconstruct()
+            copia = campo.__class__(*args, **kwargs)
+        destino.add_to_class(campo.name, copia)
+
+
+class CalificacionArchivada(models.Model):
+    """
+    Calificaciones de periodos cerrados movidas fuera de la tabla activa.
+
+    Tiene las mismas columnas que CalificacionTributaria (se copian al definir el modelo)
+    y conserva su id original, así que una fila archivada se puede rastrear en el histórico.
+    """
+    id = models.BigIntegerField(primary_key=True, verbose_name="ID")
+    archivada_en = models.DateTimeField(default=timezone.now, verbose_name="Archivada en")
+
+    class Meta:
+        verbose_name = "Calificación Archivada"
+        verbose_name_plural = "Calificaciones Archivadas"
+        # Con nombre explícito: las columnas se agregan después de crear la clase
+        indexes = [
+            models.Index(fields=['empresa_subsidiaria', 'fecha_inicio_periodo'], name='calif_archivada_empresa_idx'),
+        ]
+
+
+class CalificacionHistoricoArchivado(models.Model):
+    """Histórico de las calificaciones archivadas, con las columnas de CalificacionHistorico."""
+    id = models.BigIntegerField(primary_key=True, verbose_name="ID")
+    archivado_en = models.DateTimeField(default=timezone.now, verbose_name="Archivado en")
+
+    class Meta:
+        verbose_name = "Histórico de Calificación Archivado"
+        verbose_name_plural = "Históricos de Calificaciones Archivados"
+
+
+_copiar_campos(CalificacionTributaria, CalificacionArchivada)
+_copiar_campos(CalificacionHistorico, CalificacionHistoricoArchivado)
+
+
+# --- Revalidación periódica de las reglas de negocio (ver reglas.py) ---
+
+class Revalidacion(models.Model):
+    """Una ejecución del comando revalidar_calificaciones."""
+    iniciada_en = models.DateTimeField(default=timezone.now, verbose_name="Iniciada en")
+    terminada_en = models.DateTimeField(null=True, blank=True, verbose_name="Terminada en")
+    filas_revisadas = models.PositiveBigIntegerField(default=0, verbose_name="Filas revisadas")
+    total_violaciones = models.PositiveBigIntegerField(default=0, verbose_name="Violaciones")
+
+    class Meta:
+        ordering = ['-iniciada_en']
+        verbose_name = "Revalidación"
+        verbose_name_plural = "Revalidaciones"
+
+    def __str__(self):
+        return f"Revalidación del {self.iniciada_en}: {self.total_violaciones} violaciones"
+
+
+class ViolacionRegla(models.Model):
+    """
+    Calificación que no cumple una regla de negocio en una revalidación.
+
+    Como en CalificacionHistorico, `calificacion_id` no es una llave foránea: el reporte
+    se conserva aunque la calificación se corrija, se archive o se elimine.
+    """
+    REGLA_SUMA_FACTORES = 'SUMA_FACTORES'
+    REGLA_FACTOR_NEGATIVO = 'FACTOR_NEGATIVO'
+    REGLA_PERIODO_INVERTIDO = 'PERIODO_INVERTIDO'
+    REGLA_MONTO_NEGATIVO = 'MONTO_NEGATIVO'
+
+    REGLA_CHOICES = [
+        (REGLA_SUMA_FACTORES, 'Suma de factores 8 al 19 mayor que 1'),
+        (REGLA_FACTOR_NEGATIVO, 'Factor negativo'),
+        (REGLA_PERIODO_INVERTIDO, 'Fecha de fin anterior a la de inicio'),
+        (REGLA_MONTO_NEGATIVO, 'Monto de impuesto negativo'),
+    ]
+
+    revalidacion = models.ForeignKey(
+        Revalidacion,
+        on_delete = models.CASCADE,
+        related_name = 'violaciones',
+        verbose_name = 'Revalidación'
+    )
+    calificacion_id = models.BigIntegerField(db_index=True, verbose_name="ID Calificación")
+    empresa_subsidiaria = models.ForeignKey(
+        'EmpresaSubsidiaria',
+        on_delete = models.CASCADE,
+        related_name = 'violaciones_regla',
+        verbose_name = 'Empresa Subsidiaria'
+    )
+    regla = models.CharField(max_length=30, choices=REGLA_CHOICES, verbose_name="Regla")
+    # El valor que incumple la regla (la suma, el factor, los días del periodo o el monto)
+    valor = models.FloatField(null=True, blank=True, verbose_name="Valor")
+
+    class Meta:
+        verbose_name = "Violación de Regla"
+        verbose_name_plural = "Violaciones de Reglas"
+        indexes = [
+            models.Index(fields=['revalidacion', 'regla'], name='violacion_regla_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_regla_display()} en calificación {self.calificacion_id}"
@@ -0,0 +1,243 @@
+# miAppCalificacion/particiones.py
+"""
+Particionamiento anual (PostgreSQL) de CalificacionTributaria por fecha_inicio_periodo.
+
+Es opcional (CALIFICACIONES_PARTICIONADAS=True o `particiones_calificaciones --activar`).
+Con la tabla particionada:
+
+  - hay una partición por año (<tabla>_y2024, <tabla>_y2025, ...) más una partición
+    DEFAULT que recibe cualquier fecha sin partición propia, así que un INSERT nunca falla;
+  - la llave primaria pasa a ser (id, fecha_inicio_periodo), porque PostgreSQL exige que
+    incluya la columna de partición. Ninguna tabla tiene FK hacia CalificacionTributaria
+    (CalificacionHistorico guarda el id como entero), y Django sigue usando sólo `id`;
+  - las llaves únicas (índices parciales de montos y de factores, ver Meta.constraints)
+    incluyen la columna de partición, así que el INSERT ... ON CONFLICT de las cargas
+    masivas funciona igual y además sólo toca la partición del año. Se copian como
+    índices (no son restricciones), con su condición.
+
+`asegurar_particiones()` crea las particiones que falten (el comando se programa en cron) y
+mueve a ellas las filas que hayan caído en DEFAULT.
+"""
+
+from datetime import date
+
+from django.db import transaction
+
+from .models import CalificacionTributaria
+
+TABLA = CalificacionTributaria._meta.db_table
+COLUMNA = 'fecha_inicio_periodo'
+
+
+def _q(connection, nombre):
+    return connection.ops.quote_name(nombre)
+
+
+def nombre_particion(anio):
+    return f'{TABLA}_y{anio}'
+
+
+def nombre_default():
+    return f'{TABLA}_default'
+
+
+def esta_particionada(connection):
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))',
+            [_q(connection, TABLA)],
+        )
+        return cursor.fetchone()[0]
+
+
+def particiones_existentes(connection):
+    """Nombres de las particiones actuales de la tabla."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT hija.relname FROM pg_inherits
+            JOIN pg_class hija ON hija.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = to_regclass(%s)
+            ORDER BY hija.relname
+            """,
+            [_q(connection, TABLA)],
+        )
+        return [fila[0] for fila in cursor.fetchall()]
+
+
+def _definiciones(cursor, connection):
+    """
+    Índices y restricciones (unique, FK) de la tabla, para recrearlos tras copiarla.
+
+    Las definiciones se leen con el nombre actual de la tabla, que es el mismo que tendrá
+    la tabla nueva. La llave primaria se omite: cambia entre una y otra versión.
+    """
+    tabla = _q(connection, TABLA)
+    cursor.execute(
+        """
+        SELECT pg_get_indexdef(i.indexrelid) FROM pg_index i
+        WHERE i.indrelid = to_regclass(%s)
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint k WHERE k.conindid = i.indexrelid)
+        """,
+        [tabla],
+    )
+    # Los índices de una tabla particionada se describen como "ON ONLY tabla"
+    indices = [fila[0].replace(' ON ONLY ', ' ON ') for fila in cursor.fetchall()]
+    cursor.execute(
+        """
+        SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint
+        WHERE conrelid = to_regclass(%s) AND contype IN ('u', 'f')
+        """,
+        [tabla],
+    )
+    restricciones = cursor.fetchall()
+    return indices, restricciones
+
+
+def _recrear(cursor, connection, indices, restricciones):
+    tabla = _q(connection, TABLA)
+    for nombre, _, definicion in restricciones:
+        cursor.execute(f'ALTER TABLE {tabla} ADD CONSTRAINT {_q(connection, nombre)} {definicion}')
+    for definicion in indices:
+        cursor.execute(definicion)
+
+
+def _crear_particion_anual(cursor, connection, anio):
+    """
+    Crea la partición de `anio` moviendo a ella las filas de ese año que estén en DEFAULT.
+
+    PostgreSQL no permite crear una partición si DEFAULT tiene filas de su rango, por eso
+    se crea como tabla suelta, se le copian esas filas y recién entonces se adjunta.
+    """
+    tabla = _q(connection, TABLA)
+    particion = _q(connection, nombre_particion(anio))
+    default = _q(connection, nombre_default())
+    columna = _q(connection, COLUMNA)
+    desde, hasta = date(anio, 1, 1), date(anio + 1, 1, 1)
+
+    cursor.execute(f'CREATE TABLE {particion} (LIKE {tabla} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+    cursor.execute(
+        f'WITH movidas AS (DELETE FROM {default} WHERE {columna} >= %s AND {columna} < %s RETURNING *) '
+        f'INSERT INTO {particion} SELECT * FROM movidas',
+        [desde, hasta],
+    )
+    cursor.execute(
+        f'ALTER TABLE {tabla} ATTACH PARTITION {particion} FOR VALUES FROM (%s) TO (%s)',
+        [desde, hasta],
+    )
+
+
+def _anios(cursor, connection, tabla, anios_adelante):
+    """Años con filas en `tabla` más el año actual y los `anios_adelante` siguientes."""
+    columna = _q(connection, COLUMNA)
+    cursor.execute(f'SELECT DISTINCT EXTRACT(YEAR FROM {columna})::int FROM {tabla}')
+    anio_actual = date.today().year
+    return sorted({fila[0] for fila in cursor.fetchall()} | set(range(anio_actual, anio_actual + anios_adelante + 1)))
+
+
+def asegurar_particiones(connection, anios_adelante=1):
+    """
+    Crea las particiones faltantes para el año actual, los `anios_adelante` siguientes y
+    cualquier año que tenga filas en DEFAULT. Retorna los nombres de las particiones creadas.
+    """
+    existentes = set(particiones_existentes(connection))
+    with connection.cursor() as cursor:
+        anios = _anios(cursor, connection, _q(connection, nombre_default()), anios_adelante)
+
+    creadas = []
+    for anio in anios:
+        if nombre_particion(anio) in existentes:
+            continue
+        # Cada partición en su propia transacción: ATTACH bloquea la tabla por un momento
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            _crear_particion_anual(cursor, connection, anio)
+        creadas.append(nombre_particion(anio))
+    return creadas
+
+
+def eliminar_particion_vacia(connection, anio):
+    """
+    Elimina la partición de `anio` si no le quedan filas (ej. tras archivar ese año).
+
+    Retorna True si se eliminó. Una fila que llegue después para ese año cae en DEFAULT.
+    """
+    if nombre_particion(anio) not in particiones_existentes(connection):
+        return False
+    particion = _q(connection, nombre_particion(anio))
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        # El bloqueo impide que entre una fila entre la verificación y el DROP
+        cursor.execute(f'LOCK TABLE {particion} IN ACCESS EXCLUSIVE MODE')
+        cursor.execute(f'SELECT EXISTS (SELECT 1 FROM {particion})')
+        if cursor.fetchone()[0]:
+            return False
+        cursor.execute(f'ALTER TABLE {_q(connection, TABLA)} DETACH PARTITION {particion}')
+        cursor.execute(f'DROP TABLE {particion}')
+    return True
+
+
+def particionar(connection, anios_adelante=1):
+    """Convierte la tabla en una tabla particionada por año, copiando todas sus filas."""
+    tabla = _q(connection, TABLA)
+    legado = _q(connection, f'{TABLA}_legado')
+    columna = _q(connection, COLUMNA)
+    secuencia = _q(connection, f'{TABLA}_id_seq')
+
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        indices, restricciones = _definiciones(cursor, connection)
+        for nombre, tipo, definicion in restricciones:
+            if tipo == 'u' and COLUMNA not in definicion:
+                raise ValueError(
+                    f'La restricción única {nombre} no incluye {COLUMNA}; PostgreSQL no la permite en una tabla particionada.'
+                )
+
+        anios = _anios(cursor, connection, tabla, anios_adelante)
+
+        cursor.execute(f'ALTER TABLE {tabla} RENAME TO {legado}')
+        cursor.execute(
+            f'CREATE TABLE {tabla} (LIKE {legado} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+            f'PARTITION BY RANGE ({columna})'
+        )
+        cursor.execute(f'CREATE TABLE {_q(connection, nombre_default())} PARTITION OF {tabla} DEFAULT')
+        for anio in anios:
+            cursor.execute(
+                f'CREATE TABLE {_q(connection, nombre_particion(anio))} PARTITION OF {tabla} '
+                f'FOR VALUES FROM (%s) TO (%s)',
+                [date(anio, 1, 1), date(anio + 1, 1, 1)],
+            )
+        cursor.execute(f'INSERT INTO {tabla} SELECT * FROM {legado}')
+        # Con la tabla anterior se eliminan también su secuencia IDENTITY y los nombres de sus índices
+        cursor.execute(f'DROP TABLE {legado}')
+
+        cursor.execute(f'ALTER TABLE {tabla} ADD PRIMARY KEY ("id", {columna})')
+        _recrear(cursor, connection, indices, restricciones)
+
+        # IDENTITY no se hereda con LIKE: el id pasa a una secuencia propia que continúa la numeración
+        cursor.execute(f'CREATE SEQUENCE {secuencia} OWNED BY {tabla}."id"')
+        cursor.execute(f"SELECT setval('{secuencia}', COALESCE(MAX(\"id\"), 0) + 1, false) FROM {tabla}")
+        cursor.execute(f"ALTER TABLE {tabla} ALTER COLUMN \"id\" SET DEFAULT nextval('{secuencia}')")
+
+
+def desparticionar(connection):
+    """Vuelve a una tabla normal con llave primaria (id) e IDENTITY, como la crea Django."""
+    tabla = _q(connection, TABLA)
+    legado = _q(connection, f'{TABLA}_legado')
+
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        indices, restricciones = _definiciones(cursor, connection)
+
+        cursor.execute(f'ALTER TABLE {tabla} RENAME TO {legado}')
+        cursor.execute(f'CREATE TABLE {tabla} (LIKE {legado} INCLUDING CONSTRAINTS)')
+        cursor.execute(f'INSERT INTO {tabla} SELECT * FROM {legado}')
+        # Elimina también las particiones y la secuencia propia del id
+        cursor.execute(f'DROP TABLE {legado} CASCADE')
+
+        cursor.execute(f'ALTER TABLE {tabla} ADD PRIMARY KEY ("id")')
+        _recrear(cursor, connection, indices, restricciones)
+
+        cursor.execute(f'ALTER TABLE {tabla} ALTER COLUMN "id" ADD GENERATED BY DEFAULT AS IDENTITY')
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence(%s, 'id'), COALESCE(MAX(\"id\"), 0) + 1, false) FROM {tabla}",
+            [tabla],
+        )
@@ -0,0 +1,301 @@
+# miAppCalificacion/prueba_carga.py
+"""
+Generador de carga de punta a punta para dimensionar un despliegue (comando prueba_carga).
+
+Cada usuario virtual es un hilo con su propia sesión (cookies y token CSRF) que inicia
+sesión por login_view y repite el recorrido de su escenario: hojear el listado de
+calificaciones y el de usuarios, o además subir archivos de factores o montos por las
+mismas vistas que usan los analistas. Entre paso y paso espera un tiempo de "lectura"
+exponencial. Todo es HTTP real contra un servidor corriendo (runserver, gunicorn o
+uvicorn), así se mide la pila completa: middleware, sesión, plantillas y base de datos.
+
+Para que dos corridas sean comparables, la asignación de escenarios, las pausas y los
+archivos subidos salen de una semilla fija, las peticiones del calentamiento no se
+cuentan y el reporte guarda los parámetros junto a los resultados.
+
+Las cargas escriben en la base: usar contra staging (ver volcado_datos), no producción.
+"""
+
+import http.cookiejar
+import math
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from dataclasses import dataclass, field
+from datetime import date
+
+from django.urls import reverse
+
+from . import esquemas
+
+PERCENTILES = (50, 95, 99)
+
+
+@dataclass(frozen=True)
+class Paso:
+    """
+    Una petición del recorrido.
+
+    `url` es el nombre de la URL y también el del endpoint en el reporte; `carga` es el
+    tipo de archivo a subir, si hay; `estados` son los códigos HTTP que cuentan como éxito.
+    """
+    url: str
+    parametros: tuple = ()
+    carga: str = ''
+    estados: tuple = (200,)
+
+
+def _listado(*parametros):
+    return Paso('calificaciones:calificacion_list', parametros)
+
+
+# Las vistas de carga redirigen al listado cuando procesan el archivo y vuelven a mostrar
+# el formulario (200) cuando lo rechazan
+ESCENARIOS = {
+    'consulta': (
+        _listado(),
+        _listado(('estado', 'Vigente')),
+        _listado(('desde', f'{date.today().year - 1}-01-01')),
+        Paso('usuarios:read'),
+    ),
+    'carga_factores': (
+        _listado(),
+        Paso('calificaciones:bulk_upload_factor', carga='factor', estados=(302,)),
+        _listado(),
+    ),
+    'carga_montos': (
+        _listado(),
+        Paso('calificaciones:bulk_upload_monto', carga='monto', estados=(302,)),
+        _listado(),
+    ),
+}
+
+
+def leer_mezcla(texto):
+    """'consulta=7,carga_factores=2' -> {'consulta': 7, 'carga_factores': 2}. Lanza ValueError."""
+    mezcla = {}
+    for parte in filter(None, (p.strip() for p in texto.split(','))):
+        nombre, _, peso = parte.partition('=')
+        nombre = nombre.strip()
+        if nombre not in ESCENARIOS:
+            raise ValueError(f'Escenario desconocido: {nombre} (disponibles: {", ".join(ESCENARIOS)}).')
+        try:
+            mezcla[nombre] = float(peso) if peso else 1.0
+        except ValueError:
+            raise ValueError(f'Peso inválido para {nombre}: {peso}')
+        if mezcla[nombre] < 0:
+            raise ValueError(f'Peso negativo para {nombre}.')
+    if not mezcla or not sum(mezcla.values()):
+        raise ValueError('La mezcla no tiene escenarios con peso.')
+    return mezcla
+
+
+def archivo_carga(tipo, ids_fiscales, filas, rng):
+    """CSV regional (';' y coma decimal) válido para la plantilla de `tipo`, con `filas` filas."""
+    esquema = esquemas.FACTOR if tipo == 'factor' else esquemas.MONTO
+    anio = date.today().year - 1
+    lineas = [';'.join(esquema.encabezados)]
+    for i in range(filas):
+        valores = {columna.clave: columna.ejemplo for columna in esquema.columnas}
+        valores['ID_FISCAL_EMPRESA'] = rng.choice(ids_fiscales)
+        if tipo == 'factor':
+            valores['EJERCICIO'] = str(anio)
+            valores['SECUENCIA'] = str(i + 1)
+            valores['FECHA'] = date(anio, rng.randint(1, 12), rng.randint(1, 28)).isoformat()
+        else:
+            # Un trimestre por fila; las filas repetidas actualizan, como un reenvío real
+            mes = 1 + 3 * rng.randrange(4)
+            valores['FECHA_INICIO'] = date(anio, mes, 1).isoformat()
+            valores['FECHA_FIN'] = date(anio, mes + 2, 28).isoformat()
+            valores['MONTO_IMPUESTO'] = f'{rng.uniform(1e5, 1e8):.2f}'.replace('.', ',')
+        lineas.append(';'.join(valores[clave] for clave in esquema.claves))
+    return ('\n'.join(lineas) + '\n').encode('utf-8')
+
+
+def _multipart(campos, archivos):
+    """Codifica un formulario multipart/form-data; retorna (cuerpo, content-type)."""
+    limite = uuid.uuid4().hex
+    partes = []
+    for nombre, valor in campos.items():
+        partes.append(f'--{limite}\r\nContent-Disposition: form-data; name="{nombre}"\r\n\r\n{valor}\r\n'.encode())
+    for nombre, (archivo, contenido) in archivos.items():
+        partes.append(
+            f'--{limite}\r\nContent-Disposition: form-data; name="{nombre}"; filename="{archivo}"\r\n'
+            f'Content-Type: text/csv\r\n\r\n'.encode() + contenido + b'\r\n'
+        )
+    partes.append(f'--{limite}--\r\n'.encode())
+    return b''.join(partes), f'multipart/form-data; boundary={limite}'
+
+
+class _SinRedirecciones(urllib.request.HTTPRedirectHandler):
+    # Se mide cada respuesta por separado; además login_view redirige a admin_dashboard,
+    # que cierra la sesión de quien no es Administrador
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+@dataclass
+class Resultados:
+    """Latencias (segundos) y errores por endpoint, compartidos entre los hilos."""
+    latencias: dict = field(default_factory=dict)
+    errores: dict = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def registrar(self, endpoint, segundos, ok):
+        with self.lock:
+            self.latencias.setdefault(endpoint, []).append(segundos)
+            self.errores.setdefault(endpoint, 0)
+            if not ok:
+                self.errores[endpoint] += 1
+
+
+class UsuarioVirtual:
+    def __init__(self, base, email, clave, escenario, archivos, pausa, rng, timeout):
+        self.base = base.rstrip('/')
+        self.email = email
+        self.clave = clave
+        self.escenario = escenario
+        self.archivos = archivos
+        self.pausa = pausa
+        self.rng = rng
+        self.timeout = timeout
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(self.cookies), _SinRedirecciones(),
+        )
+
+    def _csrf(self):
+        return next((c.value for c in self.cookies if c.name == 'csrftoken'), '')
+
+    def _pedir(self, url, datos=None, content_type=None):
+        """Retorna (código HTTP, segundos). Los errores de red cuentan como código 0."""
+        peticion = urllib.request.Request(self.base + url, data=datos)
+        if datos is not None:
+            peticion.add_header('Content-Type', content_type)
+            peticion.add_header('X-CSRFToken', self._csrf())
+            peticion.add_header('Referer', self.base + url)
+        inicio = time.perf_counter()
+        try:
+            with self.opener.open(peticion, timeout=self.timeout) as respuesta:
+                respuesta.read()
+                codigo = respuesta.status
+        except urllib.error.HTTPError as e:
+            e.read()
+            codigo = e.code
+        except (urllib.error.URLError, OSError):
+            codigo = 0
+        return codigo, time.perf_counter() - inicio
+
+    def iniciar_sesion(self, resultados, contar):
+        url = reverse('login')
+        # El GET entrega la cookie csrftoken que exige el POST
+        self._pedir(url)
+        datos = urllib.parse.urlencode({
+            'email': self.email, 'contraseña': self.clave, 'csrfmiddlewaretoken': self._csrf(),
+        }).encode()
+        codigo, segundos = self._pedir(url, datos, 'application/x-www-form-urlencoded')
+        # Credenciales inválidas vuelven a mostrar el formulario (200) sin sesión
+        ok = codigo == 302 and any(c.name == 'sessionid' for c in self.cookies)
+        if contar:
+            resultados.registrar('login', segundos, ok)
+        return ok
+
+    def ejecutar(self, paso):
+        url = reverse(paso.url)
+        if paso.parametros:
+            url += '?' + urllib.parse.urlencode(paso.parametros)
+        if not paso.carga:
+            return self._pedir(url)
+        self._pedir(url)
+        cuerpo, content_type = _multipart(
+            {'csrfmiddlewaretoken': self._csrf()}, {'file': (f'carga_{paso.carga}.csv', self.archivos[paso.carga])},
+        )
+        return self._pedir(url, cuerpo, content_type)
+
+    def correr(self, resultados, fin_calentamiento, fin):
+        if not self.iniciar_sesion(resultados, contar=True):
+            return
+        while time.monotonic() < fin:
+            for paso in ESCENARIOS[self.escenario]:
+                if time.monotonic() >= fin:
+                    return
+                codigo, segundos = self.ejecutar(paso)
+                if time.monotonic() >= fin_calentamiento:
+                    resultados.registrar(paso.url, segundos, codigo in paso.estados)
+                if self.pausa:
+                    time.sleep(min(self.rng.expovariate(1 / self.pausa), max(0.0, fin - time.monotonic())))
+
+
+def percentil(ordenados, p):
+    """Percentil por rango más cercano sobre una lista ordenada."""
+    if not ordenados:
+        return None
+    return ordenados[max(0, math.ceil(p / 100 * len(ordenados)) - 1)]
+
+
+def resumir(resultados, duracion):
+    """{endpoint: métricas} en milisegundos, más la fila 'TOTAL'."""
+    def metricas(latencias, errores):
+        ordenadas = sorted(latencias)
+        fila = {
+            'peticiones': len(ordenadas),
+            'errores': errores,
+            'tasa_error': round(errores / len(ordenadas), 4) if ordenadas else 0.0,
+            'por_segundo': round(len(ordenadas) / duracion, 2) if duracion else 0.0,
+            'media_ms': round(1000 * sum(ordenadas) / len(ordenadas), 1) if ordenadas else None,
+            'max_ms': round(1000 * ordenadas[-1], 1) if ordenadas else None,
+        }
+        for p in PERCENTILES:
+            valor = percentil(ordenadas, p)
+            fila[f'p{p}_ms'] = round(1000 * valor, 1) if valor is not None else None
+        return fila
+
+    resumen = {
+        endpoint: metricas(latencias, resultados.errores[endpoint])
+        for endpoint, latencias in sorted(resultados.latencias.items())
+    }
+    resumen['TOTAL'] = metricas(
+        [s for latencias in resultados.latencias.values() for s in latencias], sum(resultados.errores.values()),
+    )
+    return resumen
+
+
+def correr(base, credenciales, mezcla, usuarios, duracion, calentamiento=0.0, pausa=1.0,
+           semilla=1, ids_fiscales=(), filas_carga=100, timeout=60.0, rampa=0.0):
+    """
+    Lanza `usuarios` usuarios virtuales durante `calentamiento` + `duracion` segundos.
+
+    Retorna (escenarios asignados, resumen por endpoint). Las peticiones del calentamiento
+    (y los inicios de sesión, que ocurren al comienzo) no se cuentan en el resumen salvo 'login'.
+    """
+    rng = random.Random(semilla)
+    nombres = sorted(mezcla)
+    asignados = rng.choices(nombres, weights=[mezcla[n] for n in nombres], k=usuarios)
+    resultados = Resultados()
+
+    inicio = time.monotonic()
+    fin_calentamiento = inicio + calentamiento
+    fin = fin_calentamiento + duracion
+    hilos = []
+    for i, escenario in enumerate(asignados):
+        rng_usuario = random.Random(f'{semilla}-{i}')
+        archivos = {}
+        if any(paso.carga for paso in ESCENARIOS[escenario]):
+            archivos = {tipo: archivo_carga(tipo, list(ids_fiscales), filas_carga, rng_usuario) for tipo in ('factor', 'monto')}
+        email, clave = credenciales[i % len(credenciales)]
+        usuario = UsuarioVirtual(base, email, clave, escenario, archivos, pausa, rng_usuario, timeout)
+        hilo = threading.Thread(target=usuario.correr, args=(resultados, fin_calentamiento, fin),
+                                name=f'usuario-virtual-{i}', daemon=True)
+        hilos.append(hilo)
+    for hilo in hilos:
+        hilo.start()
+        # La rampa reparte los inicios de sesión en vez de lanzarlos todos a la vez
+        if rampa:
+            time.sleep(rampa / len(hilos))
+    for hilo in hilos:
+        hilo.join()
+    return asignados, resumir(resultados, duracion)
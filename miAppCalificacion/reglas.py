@@ -0,0 +1,151 @@
+# miAppCalificacion/reglas.py
+"""
+Reglas de negocio de CalificacionTributaria evaluadas en bloque con NumPy.
+
+La carga de factores valida la suma de factores al importar, pero las ediciones
+manuales (CalificacionForm) y los datos anteriores a esa validación nunca se revisan.
+`revalidar()` recorre toda la tabla por bloques de TAMANO_BLOQUE filas, paginando por
+id (cada bloque es una búsqueda por índice, sin cursor abierto durante todo el
+recorrido), y evalúa cada regla como una operación sobre columnas completas del bloque
+en vez de fila por fila. Los incumplimientos quedan en ViolacionRegla, agrupados por
+ejecución (Revalidacion).
+
+Los decimales se convierten a float en la misma consulta (CAST), así que NumPy recibe
+números y nulos (NaN) sin pasar cada valor por Decimal.
+"""
+
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import FloatField
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from .models import FACTOR_FIELDS, CalificacionTributaria, Revalidacion, ViolacionRegla
+from .utils import eliminar_desde_queryset
+
+TAMANO_BLOQUE = 50000
+
+# Tolerancia de punto flotante para la regla "suma de factores 8 al 19 <= 1"
+TOLERANCIA_SUMA = 1.00000001
+# Columnas de los factores 8 al 19 dentro de la matriz de factores (8 al 37)
+COLUMNAS_SUMA = slice(0, 12)
+
+
+@dataclass(frozen=True)
+class Regla:
+    codigo: str
+    # Recibe el bloque y retorna (máscara de filas que incumplen, valor de cada fila)
+    evaluar: Callable
+
+
+def _suma_factores(bloque):
+    # Los factores nulos no suman, igual que en la carga (pandas omite NaN)
+    suma = np.nansum(bloque['factores'][:, COLUMNAS_SUMA], axis=1)
+    return suma > TOLERANCIA_SUMA, suma
+
+
+def _factor_negativo(bloque):
+    factores = bloque['factores']
+    # NaN < 0 es False: los factores nulos no cuentan
+    negativos = factores < 0
+    return negativos.any(axis=1), np.where(negativos, factores, 0).min(axis=1)
+
+
+def _periodo_invertido(bloque):
+    dias = (bloque['fin'] - bloque['inicio']).astype(np.float64)
+    # Las comparaciones con NaT (fecha nula) son False
+    return bloque['fin'] < bloque['inicio'], dias
+
+
+def _monto_negativo(bloque):
+    return bloque['monto'] < 0, bloque['monto']
+
+
+REGLAS = (
+    Regla(ViolacionRegla.REGLA_SUMA_FACTORES, _suma_factores),
+    Regla(ViolacionRegla.REGLA_FACTOR_NEGATIVO, _factor_negativo),
+    Regla(ViolacionRegla.REGLA_PERIODO_INVERTIDO, _periodo_invertido),
+    Regla(ViolacionRegla.REGLA_MONTO_NEGATIVO, _monto_negativo),
+)
+
+
+def _consulta(using):
+    flotantes = {f'_{campo}': Cast(campo, FloatField()) for campo in ('monto_impuesto', *FACTOR_FIELDS)}
+    campos = ('pk', 'empresa_subsidiaria_id', 'fecha_inicio_periodo', 'fecha_fin_periodo', *flotantes)
+    return CalificacionTributaria.objects.using(using).annotate(**flotantes).order_by('pk').values_list(*campos)
+
+
+def bloques(tamano=TAMANO_BLOQUE, using=DEFAULT_DB_ALIAS):
+    """Calificaciones como bloques columnares de hasta `tamano` filas, en orden de id."""
+    consulta = _consulta(using)
+    ultimo = 0
+    while True:
+        filas = list(consulta.filter(pk__gt=ultimo)[:tamano])
+        if not filas:
+            return
+        ultimo = filas[-1][0]
+        columnas = np.array(filas, dtype=object)
+        yield {
+            'ids': columnas[:, 0].astype(np.int64),
+            'empresa': columnas[:, 1].astype(np.int64),
+            'inicio': np.array(columnas[:, 2].tolist(), dtype='datetime64[D]'),
+            'fin': np.array(columnas[:, 3].tolist(), dtype='datetime64[D]'),
+            'monto': columnas[:, 4].astype(np.float64),
+            'factores': columnas[:, 5:].astype(np.float64),
+        }
+
+
+def evaluar(bloque, reglas=REGLAS):
+    """Violaciones de un bloque: (código de regla, índices de las filas, valores) por regla."""
+    for regla in reglas:
+        mascara, valores = regla.evaluar(bloque)
+        indices = np.flatnonzero(mascara)
+        if len(indices):
+            yield regla.codigo, indices, valores[indices]
+
+
+def revalidar(tamano=TAMANO_BLOQUE, using=DEFAULT_DB_ALIAS, progreso=None):
+    """
+    Evalúa todas las reglas sobre toda la tabla y registra una Revalidacion con sus violaciones.
+
+    `using` es la BD de lectura (ej. la réplica); el reporte se escribe en 'default'.
+    `progreso`, si se indica, se llama tras cada bloque con (filas revisadas, violaciones).
+    """
+    revalidacion = Revalidacion.objects.create()
+    for bloque in bloques(tamano, using):
+        violaciones = [
+            ViolacionRegla(
+                revalidacion=revalidacion, calificacion_id=int(bloque['ids'][i]),
+                empresa_subsidiaria_id=int(bloque['empresa'][i]), regla=codigo,
+                valor=None if np.isnan(valor) else float(valor),
+            )
+            for codigo, indices, valores in evaluar(bloque)
+            for i, valor in zip(indices, valores)
+        ]
+        revalidacion.filas_revisadas += len(bloque['ids'])
+        revalidacion.total_violaciones += len(violaciones)
+        # Los totales se guardan por bloque: una ejecución en curso (o cortada) muestra su avance
+        with transaction.atomic():
+            ViolacionRegla.objects.bulk_create(violaciones, batch_size=5000)
+            revalidacion.save(update_fields=['filas_revisadas', 'total_violaciones'])
+        if progreso:
+            progreso(revalidacion.filas_revisadas, revalidacion.total_violaciones)
+
+    revalidacion.terminada_en = timezone.now()
+    revalidacion.save(update_fields=['terminada_en'])
+    return revalidacion
+
+
+def depurar(conservar):
+    """Elimina las revalidaciones más antiguas, dejando las `conservar` más recientes."""
+    antiguas = list(Revalidacion.objects.order_by('-iniciada_en').values_list('pk', flat=True)[conservar:])
+    if not antiguas:
+        return 0
+    with transaction.atomic():
+        # Un solo DELETE ... WHERE, sin cargar las violaciones a memoria
+        eliminar_desde_queryset(ViolacionRegla.objects.filter(revalidacion_id__in=antiguas))
+        Revalidacion.objects.filter(pk__in=antiguas).delete()
+    return len(antiguas)
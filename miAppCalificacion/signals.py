@@ -0,0 +1,32 @@
+# miAppCalificacion/signals.py
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import CalificacionTributaria, EmpresaSubsidiaria, Moneda, Pais, TasaDeCambio
+from .versiones import (
+    incrementar_version, TABLA_CALIFICACIONES, TABLA_USUARIOS, TABLA_EMPRESAS, TABLA_CATALOGOS
+)
+
+
+@receiver([post_save, post_delete], sender=CalificacionTributaria)
+def invalidar_tabla_calificaciones(sender, **kwargs):
+    incrementar_version(TABLA_CALIFICACIONES)
+
+
+@receiver([post_save, post_delete], sender=EmpresaSubsidiaria)
+def invalidar_tablas_por_empresa(sender, **kwargs):
+    # El listado muestra el nombre de la subsidiaria, por eso también lo invalida
+    incrementar_version(TABLA_EMPRESAS, TABLA_CALIFICACIONES)
+
+
+@receiver([post_save, post_delete], sender=Pais)
+def invalidar_tablas_por_pais(sender, **kwargs):
+    incrementar_version(TABLA_CATALOGOS, TABLA_USUARIOS)
+
+
+@receiver([post_save, post_delete], sender=Moneda)
+@receiver([post_save, post_delete], sender=TasaDeCambio)
+def invalidar_catalogo_monedas(sender, **kwargs):
+    # El listado ofrece las monedas y la exportación convierte con las tasas (GET condicional)
+    incrementar_version(TABLA_CATALOGOS)
@@ -0,0 +1,50 @@
+// Carga perezosa de opciones para los <select data-autocompletar-url> (AutocompleteSelect).
+(function () {
+    function iniciar(select) {
+        var buscador = document.createElement('input');
+        buscador.type = 'search';
+        buscador.className = select.className;
+        buscador.placeholder = 'Escriba para buscar...';
+        buscador.setAttribute('autocomplete', 'off');
+        select.parentNode.insertBefore(buscador, select);
+
+        var temporizador = null;
+        var ultimaConsulta = null;
+
+        function cargar(texto) {
+            if (texto === ultimaConsulta) {
+                return;
+            }
+            ultimaConsulta = texto;
+            var url = select.dataset.autocompletarUrl + '?q=' + encodeURIComponent(texto);
+            fetch(url, {credentials: 'same-origin'})
+                .then(function (respuesta) { return respuesta.json(); })
+                .then(function (datos) {
+                    var seleccionado = select.value;
+                    // Se conserva la opción vacía y la seleccionada; el resto se reemplaza
+                    Array.from(select.options).forEach(function (opcion) {
+                        if (opcion.value !== '' && opcion.value !== seleccionado) {
+                            opcion.remove();
+                        }
+                    });
+                    datos.resultados.forEach(function (item) {
+                        if (String(item.id) !== seleccionado) {
+                            select.add(new Option(item.texto, item.id));
+                        }
+                    });
+                });
+        }
+
+        buscador.addEventListener('input', function () {
+            clearTimeout(temporizador);
+            temporizador = setTimeout(function () { cargar(buscador.value.trim()); }, 250);
+        });
+        // Las primeras opciones se piden recién cuando el usuario interactúa con el campo
+        select.addEventListener('focus', function () { cargar(buscador.value.trim()); });
+        buscador.addEventListener('focus', function () { cargar(buscador.value.trim()); });
+    }
+
+    document.addEventListener('DOMContentLoaded', function () {
+        document.querySelectorAll('select[data-autocompletar-url]').forEach(iniciar);
+    });
+})();
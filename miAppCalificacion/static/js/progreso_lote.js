@@ -0,0 +1,36 @@
+// Actualiza la página de progreso de un lote con los eventos del servidor (vista eventos_lote).
+(function () {
+    var script = document.currentScript;
+    if (!script || !window.EventSource) {
+        // Sin EventSource se recarga como lo hacía el <meta refresh>
+        setTimeout(function () { location.reload(); }, 3000);
+        return;
+    }
+    var fuente = new EventSource(script.dataset.eventosUrl);
+
+    function actualizar(datos) {
+        Object.keys(datos.totales).forEach(function (clave) {
+            document.querySelectorAll('[data-total="' + clave + '"]').forEach(function (elemento) {
+                elemento.textContent = datos.totales[clave];
+            });
+        });
+        datos.archivos.forEach(function (archivo) {
+            var fila = document.querySelector('[data-trabajo="' + archivo.pk + '"]');
+            if (!fila) {
+                return;
+            }
+            fila.querySelectorAll('[data-campo]').forEach(function (celda) {
+                celda.textContent = archivo[celda.dataset.campo];
+            });
+        });
+    }
+
+    fuente.addEventListener('progreso', function (evento) {
+        actualizar(JSON.parse(evento.data));
+    });
+    fuente.addEventListener('fin', function () {
+        // La página completa muestra el resumen final y el detalle de los errores
+        fuente.close();
+        location.reload();
+    });
+})();
@@ -0,0 +1,274 @@
+# miAppCalificacion/subidas.py
+"""
+Recepción de los archivos de carga masiva.
+
+`ArchivoImportacionHandler` reemplaza a los upload handlers por defecto en las vistas de
+importación: escribe el cuerpo de la petición directo a un archivo temporal en disco a
+medida que llega, calculando en la misma pasada el SHA-256 y la cantidad de filas (CSV),
+y deja de guardar la subida apenas se supera IMPORTACION_MAX_BYTES. La memoria usada no
+depende del tamaño del archivo y el parser recibe una ruta, no un bloque de bytes. Una
+petición cuyo Content-Length ya supera el límite se responde con 413 sin leer el cuerpo
+(con_subida_a_disco).
+
+Las cargas por lote (varios archivos o un zip) se registran con `registrar_lote`: cada
+archivo queda como un trabajo de importación pendiente que ejecuta trabajos.py.
+"""
+
+import hashlib
+import os
+import tempfile
+import uuid
+import zipfile
+from functools import wraps
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.uploadhandler import StopUpload, TemporaryFileUploadHandler
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+
+from miAppUsuario.models import Auditoria
+
+# Holgura para los campos del formulario y los separadores multipart que acompañan al archivo
+MARGEN_MULTIPART = 64 * 1024
+
+EXTENSIONES_IMPORTACION = ('.csv', '.xlsx', '.xls')
+BLOQUE_LECTURA = 64 * 1024
+
+
+def _limite_bytes():
+    return getattr(settings, 'IMPORTACION_MAX_BYTES', 50 * 1024 * 1024)
+
+
+def _limite_archivos():
+    return getattr(settings, 'IMPORTACION_MAX_ARCHIVOS', 50)
+
+
+class _Huella:
+    """SHA-256 y filas de datos (CSV) de un archivo, calculados bloque a bloque."""
+
+    def __init__(self, es_csv):
+        self.hash = hashlib.sha256()
+        self.es_csv = es_csv
+        self.saltos = 0
+        self.ultimo_byte = b''
+
+    def update(self, bloque):
+        self.hash.update(bloque)
+        if self.es_csv and bloque:
+            self.saltos += bloque.count(b'\n')
+            self.ultimo_byte = bloque[-1:]
+
+    @property
+    def filas(self):
+        """Filas sin el encabezado; None si no es CSV."""
+        if not self.es_csv:
+            return None
+        lineas = self.saltos + (1 if self.ultimo_byte not in (b'', b'\n') else 0)
+        return max(lineas - 1, 0)
+
+
+def _mensaje_limite(max_bytes):
+    return f'El archivo supera el tamaño máximo permitido ({max_bytes / (1024 * 1024):g} MB).'
+
+
+def _es_csv(nombre):
+    return os.path.splitext(nombre or '')[1].lower() == '.csv'
+
+
+class ArchivoImportacionHandler(TemporaryFileUploadHandler):
+    """
+    Guarda el archivo en disco por bloques, calculando hash y filas mientras se recibe.
+
+    El archivo resultante (TemporaryUploadedFile) queda con dos atributos extra:
+    `sha256` (hex) y `filas` (filas de datos sin el encabezado; None si no es CSV).
+    Si un archivo supera el límite mientras se recibe, se descarta, se deja el motivo en
+    `request.subida_rechazada` y el resto del cuerpo se lee sin guardarlo, para que la
+    vista pueda responder con su mensaje (cortar la conexión dejaría al navegador sin
+    respuesta).
+    """
+
+    def __init__(self, request=None, max_bytes=None, max_archivos=1):
+        super().__init__(request)
+        self.max_bytes = max_bytes or _limite_bytes()
+        self.max_archivos = max_archivos
+
+    def _rechazar(self, mensaje=None):
+        self.request.subida_rechazada = mensaje or _mensaje_limite(self.max_bytes)
+        raise StopUpload(connection_reset=False)
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        self.archivos = 0
+
+    def new_file(self, *args, **kwargs):
+        self.archivos += 1
+        if self.archivos > self.max_archivos:
+            self._rechazar(f'Se permiten como máximo {self.max_archivos} archivos por carga.')
+        super().new_file(*args, **kwargs)
+        self.recibidos = 0
+        self.huella = _Huella(_es_csv(self.file_name))
+
+    def receive_data_chunk(self, raw_data, start):
+        self.recibidos += len(raw_data)
+        if self.recibidos > self.max_bytes:
+            self._rechazar()
+        self.huella.update(raw_data)
+        self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        archivo = super().file_complete(file_size)
+        archivo.sha256 = self.huella.hash.hexdigest()
+        archivo.filas = self.huella.filas
+        return archivo
+
+
+def con_subida_a_disco(vista=None, *, varios_archivos=False):
+    """
+    Instala ArchivoImportacionHandler en la vista.
+
+    Los upload handlers deben cambiarse antes de que algo lea request.POST, y el
+    middleware CSRF lo lee en process_view; por eso la vista queda exenta en el middleware
+    y la verificación CSRF se hace aquí, después de instalar el handler. Con
+    varios_archivos=True se aceptan hasta IMPORTACION_MAX_ARCHIVOS archivos por petición,
+    cada uno con el límite de tamaño de siempre.
+
+    Si el Content-Length ya supera el límite (la suma de todos los archivos permitidos más
+    el margen del multipart), se responde 413 sin leer el cuerpo ni llegar a la vista.
+    """
+    if vista is None:
+        return lambda vista: con_subida_a_disco(vista, varios_archivos=varios_archivos)
+    protegida = csrf_protect(vista)
+
+    @wraps(vista)
+    def envoltura(request, *args, **kwargs):
+        max_archivos = _limite_archivos() if varios_archivos else 1
+        if request.method == 'POST':
+            try:
+                largo = int(request.META.get('CONTENT_LENGTH') or 0)
+            except ValueError:
+                largo = 0
+            if largo > _limite_bytes() * max_archivos + MARGEN_MULTIPART:
+                return HttpResponse(_mensaje_limite(_limite_bytes()), status=413, content_type='text/plain; charset=utf-8')
+        request.upload_handlers = [ArchivoImportacionHandler(request, max_archivos=max_archivos)]
+        return protegida(request, *args, **kwargs)
+
+    return csrf_exempt(envoltura)
+
+
+def motivo_rechazo(request):
+    """Mensaje si el handler cortó la subida por tamaño, o None si el archivo llegó completo."""
+    request.FILES  # fuerza el parseo del cuerpo (lo normal es que CSRF ya lo haya hecho)
+    return getattr(request, 'subida_rechazada', None)
+
+
+def registrar_auditoria(request, archivo, tipo, filas_leidas=0):
+    """
+    Crea el registro de Auditoria de una carga y mueve el archivo temporal a Auditoria.file.
+
+    Con FileSystemStorage el archivo temporal se renombra (no se copia), así que el
+    archivo no vuelve a leerse completo en ningún momento. `filas_leidas` se usa cuando
+    el handler no pudo contar filas durante la subida (archivos Excel).
+    """
+    filas = getattr(archivo, 'filas', None)
+    auditoria = Auditoria(
+        filename=archivo.name[:255],
+        sha256=getattr(archivo, 'sha256', ''),
+        row_count=filas if filas is not None else filas_leidas,
+        tipo=tipo,
+        usuario=request.user if request.user.is_authenticated else None,
+    )
+    auditoria.file.save(archivo.name, archivo, save=False)
+    auditoria.save()
+    return auditoria
+
+
+def miembros_zip(archivo, max_miembros=None):
+    """
+    Archivos importables (CSV/Excel) dentro de un zip, como (nombre, ZipInfo) sin extraerlos.
+
+    Se omiten carpetas y archivos de otro tipo. Lanza ValueError si el zip está dañado o
+    tiene más miembros de los permitidos; el tamaño real de cada miembro se controla al
+    extraerlo (ver registrar_lote), porque el que declara el zip puede ser falso.
+    """
+    max_miembros = max_miembros or _limite_archivos()
+    try:
+        zip_ = zipfile.ZipFile(archivo)
+    except zipfile.BadZipFile:
+        raise ValueError(f'{archivo.name}: no es un archivo zip válido.')
+    miembros = [
+        info for info in zip_.infolist()
+        if not info.is_dir() and os.path.splitext(info.filename)[1].lower() in EXTENSIONES_IMPORTACION
+        and not os.path.basename(info.filename).startswith('.')
+    ]
+    if len(miembros) > max_miembros:
+        raise ValueError(f'{archivo.name}: contiene {len(miembros)} archivos; el máximo es {max_miembros}.')
+    return zip_, miembros
+
+
+def _extraer(zip_, info, max_bytes):
+    """
+    Copia un miembro del zip a un archivo temporal, con su huella.
+
+    Se lee por bloques y se corta apenas supera `max_bytes` descomprimido (zip bomb).
+    """
+    huella = _Huella(_es_csv(info.filename))
+    destino = tempfile.TemporaryFile()
+    leidos = 0
+    with zip_.open(info) as origen:
+        for bloque in iter(lambda: origen.read(BLOQUE_LECTURA), b''):
+            leidos += len(bloque)
+            if leidos > max_bytes:
+                destino.close()
+                raise ValueError(
+                    f'{info.filename}: supera el tamaño máximo permitido ({max_bytes / (1024 * 1024):g} MB).'
+                )
+            huella.update(bloque)
+            destino.write(bloque)
+    destino.seek(0)
+    return destino, huella
+
+
+def registrar_lote(request, archivos, tipo):
+    """
+    Crea un trabajo de importación (Auditoria pendiente) por cada archivo subido o
+    miembro de un zip, todos con el mismo `lote`.
+
+    Retorna (lote, auditorias creadas, archivos rechazados con su motivo). Los trabajos
+    se ejecutan aparte (ver trabajos.py).
+    """
+    lote = uuid.uuid4()
+    max_bytes = _limite_bytes()
+    auditorias, rechazados = [], []
+
+    def crear(nombre, contenido, sha256, filas):
+        auditoria = Auditoria(
+            filename=nombre[:255], sha256=sha256, row_count=filas or 0, tipo=tipo, lote=lote,
+            usuario=request.user if request.user.is_authenticated else None,
+        )
+        auditoria.file.save(nombre, contenido, save=False)
+        auditoria.save()
+        auditorias.append(auditoria)
+
+    for archivo in archivos:
+        extension = os.path.splitext(archivo.name)[1].lower()
+        if extension in EXTENSIONES_IMPORTACION:
+            crear(archivo.name, archivo, getattr(archivo, 'sha256', ''), getattr(archivo, 'filas', None))
+        elif extension == '.zip':
+            try:
+                zip_, miembros = miembros_zip(archivo)
+            except ValueError as e:
+                rechazados.append(str(e))
+                continue
+            with zip_:
+                for info in miembros:
+                    try:
+                        temporal, huella = _extraer(zip_, info, max_bytes)
+                    except ValueError as e:
+                        rechazados.append(str(e))
+                        continue
+                    with temporal:
+                        nombre = os.path.basename(info.filename)
+                        crear(nombre, File(temporal, name=nombre), huella.hash.hexdigest(), huella.filas)
+        else:
+            rechazados.append(f'{archivo.name}: formato no soportado (use CSV, Excel o zip).')
+    return lote, auditorias, rechazados
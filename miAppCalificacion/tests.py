@@ -1,3 +1,469 @@
-from django.test import TestCase
+import importlib
+import io
+import shutil
+import tempfile
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from miAppUsuario.models import Auditoria, Rol, Usuario
+
+from . import cargas, esquemas, trabajos, utils
+from .models import CalificacionTributaria, EmpresaSubsidiaria, Moneda, Pais, TasaDeCambio, canonizar_id_fiscal
+
+
+def plantilla(esquema, filas):
+    """CSV regional con los encabezados de `esquema` y una fila por dict {clave: valor}."""
+    destino = io.StringIO()
+    esquema.escribir_plantilla(destino)
+    lineas = destino.getvalue().splitlines()[:1]
+    ejemplo = {columna.clave: columna.ejemplo for columna in esquema.columnas}
+    for fila in filas:
+        lineas.append(';'.join(str({**ejemplo, **fila}[clave]) for clave in esquema.claves))
+    return '\n'.join(lineas).encode()
+
+
+class DatosBase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        moneda = Moneda.objects.create(codigo_iso='CLP', nombre='Peso chileno')
+        cls.pais = Pais.objects.create(nombre='Chile', codigo_iso='CL', moneda_local=moneda)
+        cls.rol = Rol.objects.create(nombre='Analista', descripcion='Analista')
+        cls.usuario = Usuario.objects.create_user(
+            'analista@ejemplo.cl', 'clave-segura-123', rol_usuario=cls.rol, pais_usuario=cls.pais, first_name='Ana',
+        )
+        cls.empresa = EmpresaSubsidiaria.objects.create(
+            nombre_legal='ACME', identificacion_fiscal='76.000.000-1',
+            actividad_principal='Comercio', regimen_fiscal='General', pais_operacion=cls.pais,
+        )
+
+    def setUp(self):
+        # Auditoria guarda los archivos subidos y la carga de factores refresca el snapshot
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio, ignore_errors=True)
+        ajustes = self.settings(MEDIA_ROOT=directorio, FACTORES_SNAPSHOT_DIR=f'{directorio}/snapshot')
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+
+def registros(esquema, filas):
+    """DataFrame de una carga por API: cada fila es la del ejemplo de la plantilla con `filas` encima."""
+    from . import importacion
+
+    ejemplo = {columna.clave: columna.ejemplo.replace(',', '.') for columna in esquema.columnas}
+    return importacion.desde_registros([{**ejemplo, **fila} for fila in filas], esquema)
+
+
+class ConsolidarDuplicadosTests(SimpleTestCase):
+    def setUp(self):
+        # Filas 2 y 4: la misma llave en distinto formato; filas 5 y 6: sin ID, no se consolidan
+        self.df = registros(esquemas.MONTO, [
+            {'ID_FISCAL_EMPRESA': '76000000-1', 'MONTO_IMPUESTO': '1'},
+            {'ID_FISCAL_EMPRESA': '76000000-1', 'FECHA_INICIO': '2025-04-01', 'MONTO_IMPUESTO': '2'},
+            {'ID_FISCAL_EMPRESA': '76.000.000-1', 'MONTO_IMPUESTO': '3'},
+            {'ID_FISCAL_EMPRESA': '', 'MONTO_IMPUESTO': '4'},
+            {'ID_FISCAL_EMPRESA': '', 'MONTO_IMPUESTO': '5'},
+        ])
+
+    def consolidar(self, politica, primera_fila=2):
+        from . import importacion
+
+        return importacion.consolidar_duplicados(self.df, esquemas.MONTO, politica, primera_fila)
+
+    def test_ultima_conserva_la_ultima_fila_de_la_llave(self):
+        df, consolidadas, rechazadas = self.consolidar('ultima')
+
+        self.assertEqual(list(df['MONTO_IMPUESTO']), [2, 3, 4, 5])
+        self.assertEqual(consolidadas, [(2, 'Fila 2: Misma llave que la fila 4; se usó la fila 4.')])
+        self.assertEqual(rechazadas, [])
+
+    def test_primera_conserva_la_primera_fila_de_la_llave(self):
+        df, consolidadas, _ = self.consolidar('primera')
+
+        self.assertEqual(list(df['MONTO_IMPUESTO']), [1, 2, 4, 5])
+        self.assertEqual(consolidadas, [(4, 'Fila 4: Misma llave que la fila 2; se usó la fila 2.')])
+
+    def test_rechazar_descarta_todas_las_filas_de_la_llave(self):
+        df, consolidadas, rechazadas = self.consolidar('rechazar', primera_fila=10)
+
+        self.assertEqual(list(df['MONTO_IMPUESTO']), [2, 4, 5])
+        self.assertEqual(consolidadas, [])
+        self.assertEqual([fila for fila, _ in rechazadas], [10, 12])
+        self.assertIn('se repite en 2 filas del archivo (la primera es la fila 10)', rechazadas[1][1])
+
+    def test_sin_repetidas_retorna_el_mismo_dataframe(self):
+        from . import importacion
+
+        unicas = self.df.drop(index=[0])
+
+        df, consolidadas, rechazadas = importacion.consolidar_duplicados(unicas, esquemas.MONTO)
+
+        self.assertIs(df, unicas)
+        self.assertEqual((consolidadas, rechazadas), ([], []))
+
+    def test_politica_desconocida(self):
+        with self.assertRaises(ValueError):
+            self.consolidar('todas')
+
+
+def migracion_canonica():
+    return importlib.import_module('miAppCalificacion.migrations.0011_identificacion_fiscal_canonica')
+
+
+class CanonizarIdFiscalTests(SimpleTestCase):
+    VALORES = [
+        '76.000.000-1', '076000000-1', ' 76000000-k ', '76000000K', '00076000000K', '76.000.000-k',
+        '76000000.0', '76000000.00', '760000001.0', '0', '000', '-', '', '  ',
+    ]
+
+    def test_las_tres_copias_coinciden(self):
+        import pandas as pd
+
+        from . import importacion
+
+        vectorizados = importacion.canonizar_ids_fiscales(pd.Series(self.VALORES, dtype='string'))
+        del_modelo = [canonizar_id_fiscal(valor) for valor in self.VALORES]
+
+        # La vectorizada deja nulas las celdas sin letras ni dígitos; las otras dos, ''
+        self.assertEqual([None if pd.isna(valor) else valor for valor in vectorizados], [valor or None for valor in del_modelo])
+        self.assertEqual([migracion_canonica()._canonizar(valor) for valor in self.VALORES], del_modelo)
+
+    def test_casos_limite(self):
+        for valor, canonica in (
+            ('76.000.000-k', '76000000K'), ('00076000000K', '76000000K'), ('76000000.0', '76000000'),
+            ('76000000.00', '7600000000'), ('0', ''), ('-', ''),
+        ):
+            with self.subTest(valor=valor):
+                self.assertEqual(canonizar_id_fiscal(valor), canonica)
+
+
+class EmpresaIdCanonicoTests(DatosBase):
+    def nueva(self, identificacion_fiscal, nombre='Otra'):
+        return EmpresaSubsidiaria(
+            nombre_legal=nombre, identificacion_fiscal=identificacion_fiscal,
+            actividad_principal='Comercio', regimen_fiscal='General', pais_operacion=self.pais,
+        )
+
+    def test_clean_rechaza_id_sin_letras_ni_digitos_y_otro_formato_del_mismo(self):
+        for identificacion_fiscal in ('0', '-', '076000000-1'):
+            with self.subTest(identificacion_fiscal=identificacion_fiscal), self.assertRaises(ValidationError):
+                self.nueva(identificacion_fiscal).full_clean()
+
+    def test_migracion_informa_ids_vacios_como_conflicto(self):
+        # save() no valida: así llega un ID así a la BD antes de la migración
+        self.nueva('0').save()
+
+        with self.assertRaisesMessage(RuntimeError, '(vacío): 0'):
+            migracion_canonica().poblar(mock.Mock(get_model=mock.Mock(return_value=EmpresaSubsidiaria)), None)
+
+    def test_solo_save_sincroniza_la_canonica(self):
+        self.empresa.identificacion_fiscal = '77.000.000-2'
+        self.empresa.save(update_fields=['identificacion_fiscal'])
+        self.empresa.refresh_from_db()
+        self.assertEqual(self.empresa.identificacion_fiscal_canonica, '770000002')
+
+        EmpresaSubsidiaria.objects.filter(pk=self.empresa.pk).update(identificacion_fiscal='78.000.000-3')
+        self.empresa.refresh_from_db()
+        self.assertEqual(self.empresa.identificacion_fiscal_canonica, '770000002')
+
+
+class ConversorMonedaTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.clp = Moneda.objects.create(codigo_iso='CLP', nombre='Peso chileno')
+        cls.usd = Moneda.objects.create(codigo_iso='USD', nombre='Dólar')
+        cls.eur = Moneda.objects.create(codigo_iso='EUR', nombre='Euro')
+        for fecha, valor in ((date(2024, 1, 1), '900'), (date(2024, 6, 1), '950.5')):
+            TasaDeCambio.objects.create(moneda_origen=cls.usd, moneda_destino=cls.clp, fecha=fecha, valor_tasa=Decimal(valor))
+
+    def test_usa_la_ultima_tasa_anterior_o_igual_a_la_fecha(self):
+        conversor = utils.ConversorMoneda(self.clp)
+
+        self.assertEqual(conversor.convertir(Decimal('10.00'), self.usd.pk, date(2024, 1, 1)), Decimal('9000.00'))
+        self.assertEqual(conversor.convertir(Decimal('10.00'), self.usd.pk, date(2024, 5, 31)), Decimal('9000.00'))
+        self.assertEqual(conversor.convertir(Decimal('10.01'), self.usd.pk, date(2024, 7, 1)), Decimal('9514.50'))
+
+    def test_sin_tasa_aplicable_retorna_none(self):
+        conversor = utils.ConversorMoneda(self.clp)
+
+        self.assertIsNone(conversor.convertir(Decimal('10.00'), self.usd.pk, date(2023, 12, 31)))
+        self.assertIsNone(conversor.convertir(Decimal('10.00'), self.eur.pk, date(2024, 7, 1)))
+        self.assertIsNone(conversor.convertir(None, self.usd.pk, date(2024, 7, 1)))
+
+    def test_misma_moneda_no_convierte(self):
+        conversor = utils.ConversorMoneda(self.clp)
+
+        self.assertEqual(conversor.convertir(Decimal('10.00'), self.clp.pk, date(2020, 1, 1)), Decimal('10.00'))
+
+
+class PaginadorEstimadoTests(DatosBase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for mes in (1, 4, 7):
+            CalificacionTributaria.objects.create(
+                empresa_subsidiaria=cls.empresa, usuario_creador=cls.usuario,
+                fecha_inicio_periodo=date(2024, mes, 1), fecha_fin_periodo=date(2024, mes + 2, 28),
+                monto_impuesto=Decimal('100.00'), estado='Vigente',
+            )
+
+    def cantidad(self, queryset):
+        return utils.PaginadorEstimado(queryset.order_by('pk'), 2).count
+
+    def test_tabla_chica_se_cuenta(self):
+        with mock.patch.object(utils, 'filas_estimadas', return_value=10):
+            self.assertEqual(self.cantidad(CalificacionTributaria.objects.all()), 3)
+
+    def test_tabla_grande_sin_filtros_usa_la_estimacion(self):
+        with mock.patch.object(utils, 'filas_estimadas', return_value=utils.UMBRAL_ESTIMADO):
+            self.assertEqual(self.cantidad(CalificacionTributaria.objects.all()), utils.UMBRAL_ESTIMADO)
+
+    def test_con_filtros_cuenta_hasta_el_tope(self):
+        filtradas = CalificacionTributaria.objects.filter(estado='Vigente')
+        with mock.patch.object(utils, 'filas_estimadas') as estimadas, mock.patch.object(utils, 'TOPE_CONTEO', 2):
+            self.assertEqual(self.cantidad(filtradas), 2)
+        estimadas.assert_not_called()
+
+
+class ProcesarFactoresTests(DatosBase):
+    def test_crea_y_luego_actualiza_por_la_llave(self):
+        otro = Usuario.objects.create_user(
+            'otro@ejemplo.cl', 'clave-segura-123', rol_usuario=self.rol, pais_usuario=self.pais, first_name='Otro',
+        )
+        creada = cargas.procesar_factores(registros(esquemas.FACTOR, [{'ID_FISCAL_EMPRESA': '76000000-1'}]), self.usuario)
+        actualizada = cargas.procesar_factores(
+            registros(esquemas.FACTOR, [{'ID_FISCAL_EMPRESA': '760000001', 'FACTOR_20': '0.5'}]), otro,
+        )
+
+        self.assertEqual((creada.creados, creada.actualizados, creada.errores), (1, 0, []))
+        self.assertEqual((actualizada.creados, actualizada.actualizados, actualizada.errores), (0, 1, []))
+        self.assertEqual(creada.pks, actualizada.pks)
+        calificacion = CalificacionTributaria.objects.get()
+        self.assertEqual(calificacion.factor_20, Decimal('0.5'))
+        # El creador se conserva; el modificador es el de la última carga
+        self.assertEqual((calificacion.usuario_creador, calificacion.usuario_modificador), (self.usuario, otro))
+
+    def test_otra_secuencia_es_otra_fila(self):
+        resultado = cargas.procesar_factores(registros(esquemas.FACTOR, [
+            {'ID_FISCAL_EMPRESA': '76000000-1', 'SECUENCIA': '1'},
+            {'ID_FISCAL_EMPRESA': '76000000-1', 'SECUENCIA': '2'},
+        ]), self.usuario)
+
+        self.assertEqual((resultado.creados, resultado.actualizados), (2, 0))
+        self.assertEqual(CalificacionTributaria.objects.count(), 2)
+
+
+class CargaMasivaTests(DatosBase):
+    def subir(self, nombre_url, esquema, filas):
+        self.client.force_login(self.usuario)
+        archivo = SimpleUploadedFile('carga.csv', plantilla(esquema, filas), content_type='text/csv')
+        return self.client.post(reverse(f'calificaciones:{nombre_url}'), {'file': archivo})
+
+    def test_carga_de_factores_crea_fila_con_periodo_del_ejercicio(self):
+        respuesta = self.subir('bulk_upload_factor', esquemas.FACTOR, [{'ID_FISCAL_EMPRESA': '76000000-1', 'EJERCICIO': 2024}])
+
+        self.assertRedirects(respuesta, reverse('calificaciones:calificacion_list'), fetch_redirect_response=False)
+        calificacion = CalificacionTributaria.objects.get()
+        self.assertEqual(calificacion.empresa_subsidiaria, self.empresa)
+        self.assertEqual(calificacion.ejercicio, 2024)
+        self.assertEqual((calificacion.fecha_inicio_periodo, calificacion.fecha_fin_periodo), (date(2024, 1, 1), date(2024, 12, 31)))
+        self.assertIsNone(calificacion.monto_impuesto)
+        self.assertEqual(calificacion.factor_8, Decimal('0.08333000'))
+
+    def test_fila_de_factores_no_choca_con_la_de_montos_del_mismo_periodo(self):
+        CalificacionTributaria.objects.create(
+            empresa_subsidiaria=self.empresa, usuario_creador=self.usuario,
+            fecha_inicio_periodo=date(2024, 1, 1), fecha_fin_periodo=date(2024, 3, 31),
+            monto_impuesto=Decimal('100.00'), estado='Vigente',
+        )
+        self.subir('bulk_upload_factor', esquemas.FACTOR, [{'ID_FISCAL_EMPRESA': '76000000-1', 'EJERCICIO': 2024}])
+
+        self.assertEqual(CalificacionTributaria.objects.filter(fecha_inicio_periodo=date(2024, 1, 1)).count(), 2)
+
+    def test_carga_de_montos_crea_y_luego_actualiza_por_periodo(self):
+        fila = {'ID_FISCAL_EMPRESA': '76.000.000-1', 'FECHA_INICIO': '2024-01-01', 'FECHA_FIN': '2024-03-31'}
+        respuesta = self.subir('bulk_upload_monto', esquemas.MONTO, [fila])
+        self.subir('bulk_upload_monto', esquemas.MONTO, [{**fila, 'MONTO_IMPUESTO': '1234,50'}])
+
+        self.assertRedirects(respuesta, reverse('calificaciones:calificacion_list'), fetch_redirect_response=False)
+        calificacion = CalificacionTributaria.objects.get()
+        self.assertEqual(calificacion.empresa_subsidiaria, self.empresa)
+        self.assertIsNone(calificacion.ejercicio)
+        self.assertEqual((calificacion.fecha_inicio_periodo, calificacion.fecha_fin_periodo), (date(2024, 1, 1), date(2024, 3, 31)))
+        self.assertEqual(calificacion.monto_impuesto, Decimal('1234.50'))
+        self.assertEqual(Auditoria.objects.filter(status=Auditoria.STATUS_IMPORTED).count(), 2)
+
+    def test_content_length_sobre_el_limite_responde_413_sin_leer_el_cuerpo(self):
+        with self.settings(IMPORTACION_MAX_BYTES=1024):
+            respuesta = self.subir('bulk_upload_monto', esquemas.MONTO, [{'ESTADO': 'x' * 100_000}])
+
+        self.assertEqual(respuesta.status_code, 413)
+        self.assertFalse(Auditoria.objects.exists())
+
+    def test_archivo_que_supera_el_limite_al_recibirse_muestra_el_motivo(self):
+        with self.settings(IMPORTACION_MAX_BYTES=100):
+            respuesta = self.subir('bulk_upload_monto', esquemas.MONTO, [{}, {}, {}])
+
+        self.assertRedirects(respuesta, reverse('calificaciones:bulk_upload_monto'), fetch_redirect_response=False)
+        self.assertIn('supera el tamaño máximo', str(list(respuesta.wsgi_request._messages)[0]))
+        self.assertFalse(Auditoria.objects.exists())
+
+
+class ExportarCalificacionesTests(DatosBase):
+    def setUp(self):
+        super().setUp()
+        CalificacionTributaria.objects.create(
+            empresa_subsidiaria=self.empresa, usuario_creador=self.usuario,
+            fecha_inicio_periodo=date(2024, 1, 1), fecha_fin_periodo=date(2024, 3, 31),
+            monto_impuesto=Decimal('5500000.50'), estado='Vigente',
+        )
+        # Una fila de factores de la misma subsidiaria: no es parte del listado de montos
+        cargas.procesar_factores(registros(esquemas.FACTOR, [{'ID_FISCAL_EMPRESA': '76000000-1', 'EJERCICIO': '2023'}]), self.usuario)
+        self.client.force_login(self.usuario)
+
+    def exportar(self, **params):
+        respuesta = self.client.get(reverse('calificaciones:exportar_calificaciones'), params)
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta
+
+    def test_exporta_solo_montos_y_el_csv_se_vuelve_a_cargar(self):
+        contenido = b''.join(self.exportar().streaming_content)
+
+        self.assertEqual(len(contenido.decode().splitlines()), 2)
+        respuesta = self.client.post(reverse('calificaciones:bulk_upload_monto'), {
+            'file': SimpleUploadedFile('Calificaciones.csv', contenido, content_type='text/csv'),
+        })
+
+        self.assertRedirects(respuesta, reverse('calificaciones:calificacion_list'), fetch_redirect_response=False)
+        auditoria = Auditoria.objects.get()
+        self.assertEqual(
+            (auditoria.status, auditoria.imported_count, auditoria.updated_count, auditoria.errors),
+            (Auditoria.STATUS_IMPORTED, 0, 1, []),
+        )
+        self.assertEqual(CalificacionTributaria.objects.count(), 2)
+
+    def test_csv_regional_con_los_encabezados_de_la_plantilla(self):
+        respuesta = self.exportar()
+
+        self.assertTrue(respuesta.streaming)
+        self.assertEqual(respuesta['Content-Disposition'], 'attachment; filename="Calificaciones.csv"')
+        self.assertEqual(b''.join(respuesta.streaming_content).decode().splitlines(), [
+            ';'.join(esquemas.MONTO.encabezados + ['Empresa', 'Creador']),
+            '76.000.000-1;2024-01-01;2024-03-31;5500000,50;Vigente;ACME;analista@ejemplo.cl',
+        ])
+
+    def test_xlsx_con_los_mismos_encabezados_y_montos_numericos(self):
+        from openpyxl import load_workbook
+
+        respuesta = self.exportar(formato='xlsx')
+
+        self.assertEqual(respuesta['Content-Disposition'], 'attachment; filename="Calificaciones.xlsx"')
+        hoja = load_workbook(io.BytesIO(b''.join(respuesta.streaming_content)), read_only=True)['Calificaciones']
+        self.assertEqual(list(hoja.values), [
+            tuple(esquemas.MONTO.encabezados + ['Empresa', 'Creador']),
+            ('76.000.000-1', '2024-01-01', '2024-03-31', 5500000.5, 'Vigente', 'ACME', 'analista@ejemplo.cl'),
+        ])
+
+    def test_csv_editado_se_vuelve_a_cargar_como_actualizacion(self):
+        contenido = b''.join(self.exportar().streaming_content).replace(b';5500000,50;', b';4400000,25;')
+
+        self.client.post(reverse('calificaciones:bulk_upload_monto'), {
+            'file': SimpleUploadedFile('Calificaciones.csv', contenido, content_type='text/csv'),
+        })
+
+        calificacion = CalificacionTributaria.objects.get(ejercicio__isnull=True)
+        self.assertEqual(calificacion.monto_impuesto, Decimal('4400000.25'))
+        self.assertEqual(Auditoria.objects.get().updated_count, 1)
+
+    def test_respeta_los_filtros_del_listado(self):
+        contenido = b''.join(self.exportar(desde='2024-02-01').streaming_content).decode()
+
+        self.assertEqual(len(contenido.splitlines()), 1)
+
+    def test_listado_no_muestra_filas_de_factores(self):
+        # Sin collectstatic no hay manifiesto de los estáticos
+        estaticos = {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}
+        with self.settings(STORAGES={**settings.STORAGES, 'staticfiles': estaticos}):
+            respuesta = self.client.get(reverse('calificaciones:calificacion_list'))
+
+        self.assertEqual([c.ejercicio for c in respuesta.context['calificaciones']], [None])
+
+
+class AccionesMasivasTests(DatosBase):
+    def setUp(self):
+        super().setUp()
+        for mes in (1, 4):
+            CalificacionTributaria.objects.create(
+                empresa_subsidiaria=self.empresa, usuario_creador=self.usuario,
+                fecha_inicio_periodo=date(2024, mes, 1), fecha_fin_periodo=date(2024, mes + 2, 28),
+                monto_impuesto=Decimal('100.00'), estado='Vigente',
+            )
+        self.client.force_login(self.usuario)
+
+    def cambiar_estado(self, **filtros):
+        return self.client.post(reverse('calificaciones:acciones_masivas'), {
+            'accion': 'estado', 'estado_nuevo': 'Revisado', 'alcance': 'filtro', **filtros,
+        })
+
+    def test_alcance_filtro_sin_filtros_no_toca_la_tabla(self):
+        self.cambiar_estado(empresa=' ', desde='no-es-fecha')
+
+        self.assertFalse(CalificacionTributaria.objects.filter(estado='Revisado').exists())
+
+    def test_alcance_filtro_aplica_solo_a_las_filas_filtradas(self):
+        self.cambiar_estado(desde='2024-03-01')
+
+        self.assertEqual(list(CalificacionTributaria.objects.filter(estado='Revisado').values_list(
+            'fecha_inicio_periodo', flat=True)), [date(2024, 4, 1)])
+
+    def test_alcance_filtro_no_toca_filas_de_factores(self):
+        cargas.procesar_factores(registros(esquemas.FACTOR, [{'ID_FISCAL_EMPRESA': '76000000-1', 'EJERCICIO': '2024'}]), self.usuario)
+
+        self.cambiar_estado(desde='2024-01-01')
+
+        self.assertEqual(CalificacionTributaria.objects.filter(estado='Revisado').count(), 2)
+        self.assertEqual(CalificacionTributaria.objects.get(ejercicio=2024).estado, '')
+
+
+class AnaliticaFactoresTests(DatosBase):
+    def test_tolerancia_no_finita_o_fuera_de_rango_es_400(self):
+        gerente = Usuario.objects.create_user(
+            'gerente@ejemplo.cl', 'clave-segura-123', rol_usuario=Rol.objects.create(nombre='Gerente', descripcion='Gerente'),
+            pais_usuario=self.pais, first_name='Geo',
+        )
+        self.client.force_login(gerente)
+        for tolerancia in ('nan', 'inf', '-0.5', '1.5', 'abc'):
+            with self.subTest(tolerancia=tolerancia):
+                respuesta = self.client.get(reverse('calificaciones:analitica_factores'), {'tolerancia': tolerancia})
+                self.assertEqual(respuesta.status_code, 400)
+
+
+class ReclamarHuerfanosTests(TestCase):
+    def trabajo(self, intentos, hace):
+        return Auditoria.objects.create(
+            lote=uuid.uuid4(), status=Auditoria.STATUS_IMPORTING, intentos=intentos,
+            latido_en=timezone.now() - hace,
+        )
+
+    def test_sin_latido_reciente_vuelve_a_pendiente_o_falla_tras_el_maximo(self):
+        reintentable = self.trabajo(1, timedelta(minutes=10))
+        agotado = self.trabajo(3, timedelta(minutes=10))
+        vivo = self.trabajo(1, timedelta(seconds=30))
+
+        with self.settings(IMPORTACION_MAX_INTENTOS=3):
+            resultado = trabajos.reclamar_huerfanos(timezone.now() - timedelta(minutes=5))
+
+        self.assertEqual(resultado, (1, 1))
+        for auditoria in (reintentable, agotado, vivo):
+            auditoria.refresh_from_db()
+        self.assertEqual(reintentable.status, Auditoria.STATUS_PENDING)
+        self.assertEqual((agotado.status, agotado.error_count), (Auditoria.STATUS_FAILED, 1))
+        self.assertEqual(vivo.status, Auditoria.STATUS_IMPORTING)
@@ -0,0 +1,233 @@
+# miAppCalificacion/trabajos.py
+"""
+Ejecución concurrente de los trabajos de importación de una carga por lote.
+
+Cada archivo de un lote es una Auditoria pendiente (subidas.registrar_lote). `encolar`
+los entrega, tras el commit que los creó, a un ThreadPoolExecutor del proceso con
+IMPORTACION_WORKERS hilos; así varios archivos se importan a la vez y la petición que
+los subió responde de inmediato con la página de progreso.
+
+Un trabajo se "toma" pasando su estado de PENDING a IMPORTING con un UPDATE condicional,
+de modo que nunca lo ejecutan dos hilos (ni dos procesos). Mientras se importa, un hilo
+de latido renueva `latido_en` cada IMPORTACION_LATIDO_SEGUNDOS. Si el proceso se reinicia
+o muere, el comando `procesar_cargas_pendientes` retoma los trabajos pendientes y los
+IMPORTING sin latido reciente (reclamar_huerfanos): vuelven a PENDING, o quedan FAILED
+si ya se tomaron IMPORTACION_MAX_INTENTOS veces.
+
+Cada cambio de estado de un trabajo deja en la caché una marca de su lote (marca_lote):
+el flujo de eventos de progreso sólo vuelve a consultar la base cuando la marca cambia.
+"""
+
+import contextlib
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from miAppUsuario.models import Auditoria
+
+from . import esquemas
+
+logger = logging.getLogger(__name__)
+
+# tipo de Auditoria -> (esquema del archivo, nombre de la función de cargas.py)
+TIPOS = {
+    Auditoria.TIPO_FACTOR: (esquemas.FACTOR, 'procesar_factores'),
+    Auditoria.TIPO_MONTO: (esquemas.MONTO, 'procesar_montos'),
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _pool():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'IMPORTACION_WORKERS', 4),
+                thread_name_prefix='importacion',
+            )
+        return _executor
+
+
+def encolar(ids):
+    """Programa la ejecución de los trabajos cuando se confirme la transacción en curso."""
+    ids = list(ids)
+
+    def enviar():
+        pool = _pool()
+        for auditoria_id in ids:
+            pool.submit(ejecutar, auditoria_id)
+
+    transaction.on_commit(enviar)
+
+
+def ejecutar_y_esperar(ids):
+    """Ejecuta los trabajos en el pool y espera a que terminen; retorna cuántos se tomaron."""
+    return sum(_pool().map(ejecutar, ids))
+
+
+def ejecutar(auditoria_id):
+    """
+    Importa el archivo de una Auditoria pendiente y registra su resultado.
+
+    Retorna False si otro hilo o proceso ya había tomado el trabajo.
+    """
+    close_old_connections()
+    try:
+        tomado = Auditoria.objects.filter(
+            pk=auditoria_id, status=Auditoria.STATUS_PENDING,
+        ).update(status=Auditoria.STATUS_IMPORTING, intentos=F('intentos') + 1, latido_en=timezone.now())
+        if not tomado:
+            return False
+        auditoria = Auditoria.objects.select_related('usuario').get(pk=auditoria_id)
+        _tocar_lote(auditoria.lote)
+        try:
+            with _latidos(auditoria_id):
+                _importar(auditoria)
+        except Exception as e:
+            logger.exception('Falló el trabajo de importación %s', auditoria_id)
+            auditoria.finalizar(0, 0, [f'Error interno al procesar el archivo: {e}'])
+        _tocar_lote(auditoria.lote)
+        return True
+    finally:
+        # Los hilos del pool no pasan por el ciclo de request: sus conexiones se cierran aquí
+        connections.close_all()
+
+
+@contextlib.contextmanager
+def _latidos(auditoria_id):
+    """Renueva `latido_en` del trabajo en un hilo aparte mientras dura el bloque."""
+    terminado = threading.Event()
+
+    def latir():
+        try:
+            while not terminado.wait(getattr(settings, 'IMPORTACION_LATIDO_SEGUNDOS', 60)):
+                Auditoria.objects.filter(
+                    pk=auditoria_id, status=Auditoria.STATUS_IMPORTING,
+                ).update(latido_en=timezone.now())
+        finally:
+            connections.close_all()
+
+    hilo = threading.Thread(target=latir, name=f'latido-{auditoria_id}', daemon=True)
+    hilo.start()
+    try:
+        yield
+    finally:
+        terminado.set()
+        hilo.join()
+
+
+def reclamar_huerfanos(limite):
+    """
+    Recupera los trabajos IMPORTING cuyo último latido es anterior a `limite`.
+
+    Su proceso murió a mitad de la importación (las cargas son upserts, así que repetirla
+    es seguro): vuelven a PENDING, salvo los que ya se tomaron IMPORTACION_MAX_INTENTOS
+    veces, que quedan FAILED para no reintentar para siempre un archivo que tumba al
+    proceso. Los UPDATE son condicionales: un trabajo que latió entretanto no se toca.
+    Retorna (reiniciados, fallidos).
+    """
+    huerfanos = Auditoria.objects.filter(
+        Q(latido_en__lt=limite) | Q(latido_en__isnull=True),
+        lote__isnull=False, status=Auditoria.STATUS_IMPORTING,
+    )
+    maximo = getattr(settings, 'IMPORTACION_MAX_INTENTOS', 3)
+    fallidos = huerfanos.filter(intentos__gte=maximo).update(
+        status=Auditoria.STATUS_FAILED, error_count=1,
+        errors=[f'La importación se interrumpió {maximo} veces (el proceso terminó sin completarla).'],
+    )
+    reiniciados = huerfanos.filter(intentos__lt=maximo).update(status=Auditoria.STATUS_PENDING)
+    return reiniciados, fallidos
+
+
+def _importar(auditoria):
+    # pandas se importa recién aquí, con el primer trabajo (ver importacion.py)
+    from . import cargas, importacion
+
+    esquema, funcion = TIPOS[auditoria.tipo]
+    try:
+        df = importacion.leer_archivo(auditoria.file, esquema)
+    except importacion.FormatoNoSoportado:
+        auditoria.finalizar(0, 0, ['Formato de archivo no soportado. Use CSV o Excel.'])
+        return
+    except Exception as e:
+        auditoria.finalizar(0, 0, [f'Error al leer el archivo: {e}'])
+        return
+
+    if auditoria.row_count != len(df):
+        auditoria.row_count = len(df)
+        auditoria.save(update_fields=['row_count'])
+
+    try:
+        resultado = getattr(cargas, funcion)(df, auditoria.usuario)
+    except ValueError as e:
+        # Validación de todo el archivo (columnas, suma de factores): no se procesó ninguna fila
+        auditoria.finalizar(0, 0, [str(e)])
+        return
+
+    if resultado.consolidadas:
+        logger.info(
+            'Trabajo de importación %s: %s filas con llave repetida consolidadas', auditoria.pk, len(resultado.consolidadas),
+        )
+    if auditoria.tipo == Auditoria.TIPO_FACTOR:
+        # matriz_factores serializa los refrescos entre trabajos y procesos
+        advertencia = cargas.refrescar_snapshot(resultado.pks)
+        if advertencia:
+            logger.warning('Trabajo de importación %s: %s', auditoria.pk, advertencia)
+    auditoria.finalizar(resultado.creados, resultado.actualizados, resultado.errores)
+
+
+def _llave_lote(lote):
+    return f'lote:{lote}'
+
+
+def _tocar_lote(lote):
+    if lote is not None:
+        cache.set(_llave_lote(lote), time.time_ns(), 3600)
+
+
+async def amarca_lote(lote):
+    """Marca del último cambio de estado de un trabajo del lote en este caché (None si no hay)."""
+    return await cache.aget(_llave_lote(lote))
+
+
+def _consulta_lote(lote):
+    return Auditoria.objects.filter(lote=lote).order_by('pk').values(
+        'pk', 'filename', 'tipo', 'status', 'row_count', 'imported_count', 'updated_count',
+        'error_count', 'errors', 'uploaded_at', 'usuario_id',
+    )
+
+
+def resumen_lote(lote):
+    """Trabajos de un lote y sus totales, para la vista de progreso."""
+    trabajos = list(_consulta_lote(lote))
+    return trabajos, _totales(trabajos)
+
+
+async def aresumen_lote(lote):
+    """resumen_lote con el ORM async, para las vistas async y el flujo de eventos."""
+    trabajos = [trabajo async for trabajo in _consulta_lote(lote)]
+    return trabajos, _totales(trabajos)
+
+
+def _totales(trabajos):
+    en_curso = (Auditoria.STATUS_PENDING, Auditoria.STATUS_IMPORTING)
+    totales = {
+        'archivos': len(trabajos),
+        'terminados': sum(trabajo['status'] not in en_curso for trabajo in trabajos),
+        'fallidos': sum(trabajo['status'] == Auditoria.STATUS_FAILED for trabajo in trabajos),
+        'filas': sum(trabajo['row_count'] for trabajo in trabajos),
+        'creados': sum(trabajo['imported_count'] for trabajo in trabajos),
+        'actualizados': sum(trabajo['updated_count'] for trabajo in trabajos),
+        'errores': sum(trabajo['error_count'] for trabajo in trabajos),
+    }
+    totales['en_curso'] = totales['archivos'] - totales['terminados']
+    return totales
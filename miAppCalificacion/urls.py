@@ -1,7 +1,7 @@
 # miAppCalificacion/urls.py
 
 from django.urls import path
-from . import views
+from . import api, views
 
 app_name = 'calificaciones'
 
@@ -9,13 +9,27 @@ urlpatterns = [
     # (CRUD)
     path('', views.calificaciones_home, name='menu'),
     path('listado/', views.list_calificaciones, name='calificacion_list'),
+    path('listado/exportar/', views.exportar_calificaciones, name='exportar_calificaciones'),
+    path('analitica/factores/', views.analitica_factores, name='analitica_factores'),
+
+    # Endpoints JSON de autocompletado para los widgets de llaves foráneas
+    path('autocompletar/empresas/', views.autocompletar_empresas, name='autocompletar_empresas'),
+    path('autocompletar/paises/', views.autocompletar_paises, name='autocompletar_paises'),
     path('crear/', views.create_calificacion, name='create_calificacion'),
     path('editar/<int:pk>/', views.edit_calificacion, name='edit_calificacion'),
     path('eliminar/<int:pk>/', views.delete_calificacion, name='delete_calificacion'),
+    path('acciones-masivas/', views.acciones_masivas, name='acciones_masivas'),
     
     # funciones para la carga
     path('carga-masiva/', views.bulk_upload_monto, name='bulk_upload_monto'),
     path('carga-factores/', views.bulk_upload_factor, name='bulk_upload_factor'),
+    path('carga-lote/', views.carga_lote, name='carga_lote'),
+    path('carga-lote/<uuid:lote>/', views.progreso_lote, name='progreso_lote'),
+    path('carga-lote/<uuid:lote>/eventos/', views.eventos_lote, name='eventos_lote'),
+
+    # API JSON autenticada con token (ver api.py)
+    path('api/calificaciones/', api.calificaciones, name='api_calificaciones'),
+    path('api/cargas/<str:tipo>/', api.cargar, name='api_cargar'),
 
     # url para la vista de acceso denegado
     path('forbidden/', views.forbidden_access, name='forbidden'),
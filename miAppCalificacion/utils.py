@@ -0,0 +1,224 @@
+# miAppCalificacion/utils.py
+
+import hashlib
+from bisect import bisect_right
+from datetime import datetime
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections, router
+from django.utils.functional import cached_property
+from django.http import JsonResponse
+
+from .models import TasaDeCambio
+from .versiones import aversion_tabla
+
+# Parámetros GET aceptados por el listado (y por todo lo que lo reutiliza, ej. la exportación)
+FILTROS_LISTADO = ('empresa', 'estado', 'desde', 'hasta', 'incluir_archivo')
+
+# Cantidad máxima de opciones que devuelven los endpoints de autocompletado
+AUTOCOMPLETAR_LIMITE = 20
+
+# PaginadorEstimado: desde cuántas filas se usa la estimación de PostgreSQL en vez de
+# COUNT(*), y hasta cuántas filas se cuentan cuando hay filtros
+UMBRAL_ESTIMADO = 100_000
+TOPE_CONTEO = 10_000
+
+
+def _parsear_fecha(valor):
+    try:
+        return datetime.strptime(valor, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return None
+
+
+def filtros_activos(params):
+    """
+    Condiciones (lookup: valor) que los filtros del listado aplican según `params`.
+
+    Los valores vacíos o mal formados se ignoran; sin ninguna condición, el filtro abarca
+    toda la tabla (ver acciones_masivas, que no lo permite).
+    """
+    filtros = {}
+    empresa = (params.get('empresa') or '').strip()
+    if empresa:
+        filtros['empresa_subsidiaria__nombre_legal__icontains'] = empresa
+
+    estado = (params.get('estado') or '').strip()
+    if estado:
+        filtros['estado__iexact'] = estado
+
+    desde = _parsear_fecha(params.get('desde'))
+    if desde:
+        filtros['fecha_inicio_periodo__gte'] = desde
+
+    hasta = _parsear_fecha(params.get('hasta'))
+    if hasta:
+        filtros['fecha_inicio_periodo__lte'] = hasta
+    return filtros
+
+
+def filtrar_calificaciones(queryset, params):
+    """
+    Aplica al queryset los filtros del listado de calificaciones.
+
+    `params` es normalmente `request.GET`. Los valores vacíos o mal formados se ignoran,
+    de modo que el listado y la exportación siempre devuelven exactamente las mismas filas.
+    """
+    return queryset.filter(**filtros_activos(params))
+
+
+def solo_montos(queryset):
+    """
+    Calificaciones de montos (DJ 1948): las que no tienen ejercicio.
+
+    Las filas de factores comparten la tabla, pero no tienen monto ni estado y no se
+    pueden volver a cargar en bulk_upload_monto: el listado, su exportación y las
+    acciones masivas por filtro trabajan sólo con las de montos.
+    """
+    return queryset.filter(ejercicio__isnull=True)
+
+
+def incluye_archivo(params):
+    """True si se pidió (?incluir_archivo=1) leer también los periodos archivados (ver archivo.py)."""
+    return (params.get('incluir_archivo') or '').strip().lower() in ('1', 'true', 'on', 'si')
+
+
+class ConversorMoneda:
+    """
+    Convierte montos hacia una moneda destino usando la tasa vigente a una fecha.
+
+    Todas las tasas hacia el destino se cargan una sola vez en memoria (son pocas filas)
+    para que la conversión por fila sea una búsqueda binaria y no una consulta a la BD.
+    """
+
+    def __init__(self, moneda_destino):
+        self.moneda_destino = moneda_destino
+        self._fechas = {}
+        self._valores = {}
+        tasas = TasaDeCambio.objects.filter(
+            moneda_destino=moneda_destino
+        ).order_by('moneda_origen_id', 'fecha').values_list('moneda_origen_id', 'fecha', 'valor_tasa')
+        for moneda_origen_id, fecha, valor in tasas:
+            self._fechas.setdefault(moneda_origen_id, []).append(fecha)
+            self._valores.setdefault(moneda_origen_id, []).append(valor)
+
+    def convertir(self, monto, moneda_origen_id, fecha):
+        """Retorna el monto convertido, o None si no existe una tasa anterior o igual a `fecha`."""
+        if monto is None:
+            return None
+        if moneda_origen_id == self.moneda_destino.pk:
+            return monto
+        fechas = self._fechas.get(moneda_origen_id)
+        if not fechas:
+            return None
+        posicion = bisect_right(fechas, fecha)
+        if posicion == 0:
+            return None
+        return (monto * self._valores[moneda_origen_id][posicion - 1]).quantize(monto)
+
+
+async def arespuesta_autocompletar(request, queryset, campo, tabla):
+    """
+    Respuesta JSON para los widgets AutocompleteSelect: filas cuyo `campo` comienza con ?q=.
+
+    La búsqueda es por prefijo (istartswith), que usa los índices UPPER(campo) creados en
+    las migraciones *_indices_prefijo, y se guarda en caché con la versión de datos de `tabla`, así que se
+    invalida sola cuando la tabla cambia. Es async (caché y ORM async): los endpoints se
+    llaman en cada tecla y con ASGI no ocupan un hilo por petición.
+    """
+    texto = (request.GET.get('q') or '').strip()[:100]
+    huella = hashlib.md5(texto.upper().encode('utf-8')).hexdigest()
+    cache_key = f'autocompletar:{queryset.model._meta.label_lower}:{await aversion_tabla(tabla)}:{huella}'
+    datos = await cache.aget(cache_key)
+    if datos is None:
+        if texto:
+            queryset = queryset.filter(**{f'{campo}__istartswith': texto})
+        # Se pide una fila extra sólo para saber si hay más resultados
+        filas = [fila async for fila in queryset.order_by(campo).values_list('pk', campo)[:AUTOCOMPLETAR_LIMITE + 1]]
+        datos = {
+            'resultados': [{'id': pk, 'texto': etiqueta} for pk, etiqueta in filas[:AUTOCOMPLETAR_LIMITE]],
+            'mas': len(filas) > AUTOCOMPLETAR_LIMITE,
+        }
+        await cache.aset(cache_key, datos, 3600)
+    return JsonResponse(datos)
+
+
+def insertar_desde_queryset(modelo, campos, queryset):
+    """
+    Ejecuta un único INSERT INTO <modelo> (campos) SELECT ... a partir de `queryset`.
+
+    `queryset` debe ser un values_list cuyas columnas coincidan en orden con `campos`
+    (las constantes se agregan con annotate(Value(...))). Las filas nunca pasan por
+    Python, por lo que el costo no depende de cuántas sean. Retorna las filas insertadas.
+    """
+    conexion = connections[queryset.db]
+    sql, params = queryset.query.sql_with_params()
+    tabla = conexion.ops.quote_name(modelo._meta.db_table)
+    columnas = ', '.join(conexion.ops.quote_name(modelo._meta.get_field(campo).column) for campo in campos)
+    with conexion.cursor() as cursor:
+        cursor.execute(f'INSERT INTO {tabla} ({columnas}) {sql}', params)
+        return cursor.rowcount
+
+
+def eliminar_desde_queryset(queryset, using=None):
+    """
+    Ejecuta un único DELETE ... WHERE con las condiciones de `queryset` y retorna las filas eliminadas.
+
+    queryset.delete() carga cada fila en memoria cuando el modelo tiene receptores de
+    señales o relaciones en cascada; esto no, así que no dispara señales ni cascadas ni
+    borra filas relacionadas. Usa QuerySet._raw_delete, que es privado: revisar esta
+    función al actualizar Django (probado con 5.0). Sin `using`, va a la base de escritura
+    del modelo (queryset.db sería la de lectura, que puede ser la réplica).
+    """
+    return queryset._raw_delete(using or router.db_for_write(queryset.model))
+
+
+def filas_estimadas(modelo, using='default'):
+    """
+    Cantidad de filas de la tabla según las estadísticas de PostgreSQL (pg_class.reltuples).
+
+    La mantienen VACUUM y ANALYZE, así que es aproximada pero no recorre la tabla. En una
+    tabla particionada (particiones.py) se suman sus particiones. Retorna None en otros
+    motores o si la tabla aún no tiene estadísticas.
+    """
+    conexion = connections[using]
+    if conexion.vendor != 'postgresql':
+        return None
+    with conexion.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT CASE WHEN t.relkind = 'p' THEN (
+                SELECT SUM(GREATEST(p.reltuples, 0)) FROM pg_inherits i
+                JOIN pg_class p ON p.oid = i.inhrelid WHERE i.inhparent = t.oid
+            ) ELSE t.reltuples END
+            FROM pg_class t WHERE t.oid = to_regclass(%s)
+            """,
+            [conexion.ops.quote_name(modelo._meta.db_table)],
+        )
+        fila = cursor.fetchone()
+    if not fila or fila[0] is None or fila[0] < 0:
+        return None
+    return int(fila[0])
+
+
+class PaginadorEstimado(Paginator):
+    """
+    Paginator para tablas grandes, donde un COUNT(*) recorre la tabla completa.
+
+    Sin filtros usa filas_estimadas() si la tabla supera UMBRAL_ESTIMADO; con filtros
+    cuenta a lo más TOPE_CONTEO filas (las páginas siguientes no se ofrecen). Las tablas
+    chicas se cuentan como siempre.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not hasattr(queryset, 'query'):
+            return super().count
+        if not queryset.query.where:
+            estimado = filas_estimadas(queryset.model, queryset.db)
+            if estimado is not None and estimado >= UMBRAL_ESTIMADO:
+                return estimado
+            return queryset.count()
+        return queryset[:TOPE_CONTEO].count()
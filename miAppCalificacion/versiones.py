@@ -0,0 +1,90 @@
+# miAppCalificacion/versiones.py
+"""
+Versión de datos por tabla, usada como parte de la llave de los fragmentos en caché.
+
+Cada vez que cambian los datos de una tabla se publica una versión nueva; los fragmentos
+renderizados con la versión anterior simplemente dejan de consultarse y el backend de
+caché los descarta por antigüedad. Funciona con cualquier backend de Django (memoria
+local, archivos, etc.), no requiere Redis.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.db import transaction
+
+from miProyecto.routers import es_reciente, fijar_primaria
+
+TABLA_CALIFICACIONES = 'calificaciones'
+TABLA_USUARIOS = 'usuarios'
+TABLA_EMPRESAS = 'empresas'
+TABLA_CATALOGOS = 'catalogos'
+
+_estado = threading.local()
+
+
+def _llave(tabla):
+    return f'version_tabla:{tabla}'
+
+
+def version_tabla(tabla):
+    """Retorna la versión vigente de `tabla`, creándola si el backend la descartó."""
+    version = cache.get(_llave(tabla))
+    if version is None:
+        # time_ns y no un contador: si la llave se pierde, nunca se reutiliza una versión antigua
+        cache.add(_llave(tabla), time.time_ns(), None)
+        version = cache.get(_llave(tabla))
+    if es_reciente(version):
+        # La réplica quizá no tiene aún el cambio que publicó esta versión: lo que se
+        # renderice (y se guarde en caché con ella) debe leerse de la primaria
+        fijar_primaria()
+    return version
+
+
+async def aversion_tabla(tabla):
+    """version_tabla para vistas async (API async del caché)."""
+    version = await cache.aget(_llave(tabla))
+    if version is None:
+        await cache.aadd(_llave(tabla), time.time_ns(), None)
+        version = await cache.aget(_llave(tabla))
+    if es_reciente(version):
+        fijar_primaria()
+    return version
+
+
+def incrementar_version(*tablas):
+    """Publica una versión nueva de cada tabla (o la pospone si hay un agrupar_versiones activo)."""
+    pendientes = getattr(_estado, 'pendientes', None)
+    if pendientes is not None:
+        pendientes.update(tablas)
+        return
+
+    def publicar():
+        version = time.time_ns()
+        cache.set_many({_llave(tabla): version for tabla in tablas}, None)
+
+    # Tras el commit: si se publicara antes, otra petición podría cachear los datos
+    # antiguos bajo la versión nueva. Fuera de una transacción se ejecuta de inmediato.
+    transaction.on_commit(publicar)
+
+
+@contextmanager
+def agrupar_versiones():
+    """
+    Agrupa todos los incrementos de versión del bloque en uno solo al salir.
+
+    Las cargas masivas guardan miles de filas y cada save() dispara una señal; así la
+    caché se escribe una vez por carga en vez de una vez por fila.
+    """
+    if getattr(_estado, 'pendientes', None) is not None:
+        yield
+        return
+    _estado.pendientes = set()
+    try:
+        yield
+    finally:
+        tablas, _estado.pendientes = _estado.pendientes, None
+        if tablas:
+            incrementar_version(*tablas)
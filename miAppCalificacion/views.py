@@ -1,31 +1,40 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
-from django.db import IntegrityError, transaction
+from django.db import router, transaction
+from django.views.decorators.http import require_POST
 from decimal import Decimal
-import pandas as pd 
-import io
-import os
 from datetime import date 
-from django.http import HttpResponseForbidden, HttpResponse
-from miAppUsuario.utils import has_access
-from .models import CalificacionTributaria, EmpresaSubsidiaria
+import math
+from django.http import Http404, HttpResponseForbidden, HttpResponse, StreamingHttpResponse, FileResponse, JsonResponse
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from asgiref.sync import sync_to_async
+from miAppUsuario.utils import acceso_async, has_access
+from miProyecto.routers import lectura_en_replica
+from .models import (
+    CalificacionTributaria, CalificacionArchivada, EmpresaSubsidiaria, Moneda, Pais
+)
 from .forms import CalificacionForm
+from . import acciones, esquemas
+from .condicional import get_condicional, plantilla_condicional
+from .subidas import con_subida_a_disco, motivo_rechazo, registrar_auditoria, registrar_lote
+from miAppUsuario.models import Auditoria
+from .utils import (
+    filtrar_calificaciones, filtros_activos, incluye_archivo, solo_montos, ConversorMoneda, FILTROS_LISTADO,
+    arespuesta_autocompletar,
+)
+from .versiones import (
+    version_tabla,
+    TABLA_CALIFICACIONES, TABLA_EMPRESAS, TABLA_CATALOGOS
+)
+import asyncio
 import csv
-# Factores del 8 al 37 (total 30 factores)
-ALL_FACTORS = [f'Factor {i}' for i in range(8, 38)] 
-
-# Columnas requeridas para la carga de FACTOR (incluyendo el ID Fiscal)
-REQUIRED_COLUMNS = [
-    'ID_FISCAL_EMPRESA', 'Ejercicio', 'Mercado', 'Instrumento', 'Fecha', 'Secuencia',
-    'Numero de dividendo', 'Tipo sociedad', 'Valor Historico', 
-] + ALL_FACTORS
-
-# Columnas requeridas para la carga de MONTO (DJ 1948)
-REQUIRED_MONTO_COLUMNS = ['ID Fiscal Empresa', 'Fecha Inicio', 'Fecha Fin', 'Monto Impuesto', 'Estado']
-
-# Factores que deben sumar <= 1 (Factores 8 al 19)
-FACTORS_TO_SUM = [f'FACTOR {i}' for i in range(8, 20)]
+import json
+import tempfile
+import time
+# Tamaño de lote del cursor del lado del servidor usado en la exportación
+EXPORT_CHUNK_SIZE = 2000
 
 @login_required
 def calificaciones_home(request):
@@ -46,6 +55,7 @@ def create_calificacion(request):
             calificacion.usuario_creador = request.user
             # usuario_modificador se asigna también, ya que es la primera vez que se guarda
             calificacion.usuario_modificador = request.user
+            calificacion.origen = 'Ingreso Manual'
             calificacion.save()
             messages.success(request, "Calificación Tributaria creada manualmente con éxito.")
             return redirect('calificaciones:calificacion_list')
@@ -59,19 +69,143 @@ def create_calificacion(request):
 @login_required
 @user_passes_test(lambda user: has_access(user, ['Analista', 'Gerente', 'Corredor']), 
                     login_url='/forbidden/') # Redirige a una vista de acceso denegado
+@lectura_en_replica
+@get_condicional(TABLA_CALIFICACIONES, TABLA_CATALOGOS)
 def list_calificaciones(request):
     """Muestra todas las calificaciones, optimizando la consulta a la base de datos."""
     # select_related reduce las consultas al traer la Subsidiaria y el Usuario Creador 
     # en la consulta inicial.
-    calificaciones = CalificacionTributaria.objects.select_related(
+    calificaciones = solo_montos(CalificacionTributaria.objects.select_related(
         'empresa_subsidiaria', 'usuario_creador'
-    ).all().order_by('-fecha_inicio_periodo')
+    )).order_by('-fecha_inicio_periodo')
+    calificaciones = filtrar_calificaciones(calificaciones, request.GET)
+
+    # Los periodos archivados se leen sólo a pedido, desde su propia tabla
+    archivadas = None
+    if incluye_archivo(request.GET):
+        archivadas = filtrar_calificaciones(
+            solo_montos(CalificacionArchivada.objects.select_related('empresa_subsidiaria', 'usuario_creador')),
+            request.GET,
+        ).order_by('-fecha_inicio_periodo')
+
+    # Los mismos filtros se reenvían a la exportación para que descargue exactamente lo listado
+    filtros = {key: request.GET.get(key, '') for key in FILTROS_LISTADO}
     
     context = {
+        # El queryset es perezoso: si el fragmento de la tabla está en caché no se consulta
         'calificaciones': calificaciones,
+        'archivadas': archivadas,
+        'version_tabla': version_tabla(TABLA_CALIFICACIONES),
+        'filtros': filtros,
+        'filtros_query': request.GET.urlencode(),
+        'monedas': Moneda.objects.all(),
     }
     return render(request, 'list_calificaciones.html', context)
 
+
+class _Echo:
+    """Pseudo-buffer para csv.writer: en vez de acumular, retorna la línea escrita."""
+    def write(self, value):
+        return value
+
+
+def _formato_regional(valor):
+    """Formatea un Decimal con coma decimal, igual que lo espera bulk_upload_monto (decimal=',')."""
+    if valor is None:
+        return ''
+    return str(valor).replace('.', ',')
+
+
+@login_required
+@user_passes_test(lambda user: has_access(user, ['Analista', 'Gerente', 'Corredor']), 
+                    login_url='/forbidden/')
+@lectura_en_replica
+@get_condicional(TABLA_CALIFICACIONES, TABLA_CATALOGOS)
+def exportar_calificaciones(request):
+    """
+    Exporta las calificaciones del listado (mismos filtros GET) en CSV o Excel.
+
+    El CSV usa ';' como separador y coma decimal, con los encabezados del esquema
+    esquemas.MONTO primero, por lo que el archivo puede volver a cargarse
+    directamente en bulk_upload_monto (sólo incluye calificaciones de montos, ver
+    utils.solo_montos). Las filas se leen con .iterator() (cursor del
+    lado del servidor en PostgreSQL) y se envían a medida que se generan, así que la
+    memoria usada no depende de la cantidad de filas. Con ?incluir_archivo=1 se agregan,
+    a continuación, las calificaciones archivadas que cumplen los mismos filtros.
+    """
+    # Las filas se leen después de que la vista retorna (respuesta en streaming): la base
+    # de lectura se fija ahora, mientras rige @lectura_en_replica
+    base = router.db_for_read(CalificacionTributaria)
+    consultas = [filtrar_calificaciones(
+        solo_montos(CalificacionTributaria.objects.using(base)), request.GET
+    ).order_by('-fecha_inicio_periodo', 'pk')]
+    if incluye_archivo(request.GET):
+        consultas.append(filtrar_calificaciones(
+            solo_montos(CalificacionArchivada.objects.using(base)), request.GET
+        ).order_by('-fecha_inicio_periodo', 'pk'))
+
+    columnas = [
+        'empresa_subsidiaria__identificacion_fiscal', 'fecha_inicio_periodo', 'fecha_fin_periodo',
+        'monto_impuesto', 'estado', 'empresa_subsidiaria__nombre_legal', 'usuario_creador__email',
+        'empresa_subsidiaria__pais_operacion__moneda_local_id',
+    ]
+    encabezados = esquemas.MONTO.encabezados + ['Empresa', 'Creador']
+
+    # Conversión opcional de montos (?moneda=USD) usando la tasa vigente al inicio del periodo
+    conversor = None
+    codigo_moneda = (request.GET.get('moneda') or '').strip().upper()
+    if codigo_moneda:
+        moneda = Moneda.objects.filter(codigo_iso=codigo_moneda).first()
+        if moneda is None:
+            messages.error(request, f'La moneda {codigo_moneda} no existe.')
+            return redirect('calificaciones:calificacion_list')
+        conversor = ConversorMoneda(moneda)
+        encabezados.append(f'Monto Convertido ({moneda.codigo_iso})')
+
+    def filas():
+        # values_list evita instanciar modelos; iterator(chunk_size) mantiene la memoria constante
+        for calificaciones in consultas:
+            for id_fiscal, inicio, fin, monto, estado, empresa, creador, moneda_id in calificaciones.values_list(
+                *columnas
+            ).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+                fila = [id_fiscal, inicio.isoformat(), fin.isoformat(), monto, estado, empresa, creador]
+                if conversor:
+                    fila.append(conversor.convertir(monto, moneda_id, inicio))
+                yield fila
+
+    formato = request.GET.get('formato', 'csv').lower()
+
+    if formato == 'xlsx':
+        from openpyxl import Workbook
+
+        # write_only escribe las filas a disco a medida que llegan (no construye el libro en memoria)
+        libro = Workbook(write_only=True)
+        hoja = libro.create_sheet('Calificaciones')
+        hoja.append(encabezados)
+        for fila in filas():
+            hoja.append([float(valor) if isinstance(valor, Decimal) else valor for valor in fila])
+        archivo = tempfile.TemporaryFile()
+        libro.save(archivo)
+        archivo.seek(0)
+        return FileResponse(
+            archivo, as_attachment=True, filename='Calificaciones.xlsx',
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        )
+
+    writer = csv.writer(_Echo(), delimiter=';')
+
+    def contenido():
+        yield writer.writerow(encabezados)
+        for fila in filas():
+            yield writer.writerow([
+                _formato_regional(valor) if isinstance(valor, Decimal) else valor for valor in fila
+            ])
+
+    response = StreamingHttpResponse(contenido(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = 'attachment; filename="Calificaciones.csv"'
+    return response
+
+@con_subida_a_disco
 @login_required
 @user_passes_test(lambda user: has_access(user, ['Analista', 'Corredor']), 
                              login_url='/forbidden/')
@@ -79,213 +213,95 @@ def bulk_upload_factor(request):
     if request.method == 'POST':
         uploaded_file = request.FILES.get('file')
 
+        # El handler de subida corta los archivos que superan el límite mientras se reciben
+        rechazo = motivo_rechazo(request)
+        if rechazo:
+            messages.error(request, rechazo)
+            return render(request, 'bulk_upload_factor.html')
+
         if not uploaded_file:
             messages.error(request, 'Debe seleccionar un archivo para cargar.')
             return render(request, 'bulk_upload_factor.html')
         
-        # Determinación y Lectura del Archivo
-        file_ext = os.path.splitext(uploaded_file.name)[1].lower()
+        # pandas se importa recién aquí, con la primera carga (ver importacion.py)
+        from . import importacion
+
+        # Determinación y Lectura del Archivo (CSV regional: separador punto y coma y decimal coma)
         try:
-            if file_ext == '.csv':
-                # CRÍTICO: Corrección para formato regional (separador coma y decimal coma)
-                df = pd.read_csv(
-                    io.StringIO(uploaded_file.read().decode('utf-8')), 
-                    sep=';', 
-                    decimal=','
-                )
-            elif file_ext in ['.xlsx', '.xls']:
-                df = pd.read_excel(uploaded_file)
-            else:
-                messages.error(request, 'Formato de archivo no soportado. Use CSV o Excel.')
-                return render(request, 'bulk_upload_factor.html')
+            df = importacion.leer_archivo(uploaded_file, esquemas.FACTOR)
+        except importacion.FormatoNoSoportado:
+            messages.error(request, 'Formato de archivo no soportado. Use CSV o Excel.')
+            return render(request, 'bulk_upload_factor.html')
         except Exception as e:
             messages.error(request, f'Error al leer el archivo: {e}')
             return render(request, 'bulk_upload_factor.html')
 
-        # --- inicio de la logica para la validacion y lo que es procesamiento ---
-        registros_creados = 0
-        registros_actualizados = 0
-        errores = [] # Lista para recolectar errores por fila
-        
-        try:
-            # Homologación de columnas
-            df.columns = [col.upper().replace(' ', '_') for col in df.columns]
-            
-            # --- 1. Validación de Columnas ---
-            required_cols_normalized = [col.upper().replace(' ', '_') for col in REQUIRED_COLUMNS]
-            missing_cols = [col for col in required_cols_normalized if col not in df.columns]
-
-            if missing_cols:
-                missing_cols_readable = [col.replace('_', ' ') for col in missing_cols]
-                raise ValueError(f"Faltan las siguientes columnas requeridas: {', '.join(missing_cols_readable)}")
-
-            # --- 2. Validación de Regla de Negocio (Suma de Factores 8 al 19 <= 1) ---
-            factors_to_sum_upper = [f.upper().replace(' ', '_') for f in FACTORS_TO_SUM]
-            # Convertir a numérico (coercing errores a NaN para la suma)
-            df[factors_to_sum_upper] = df[factors_to_sum_upper].apply(pd.to_numeric, errors='coerce')
-            
-            df['SUMA_FACTORES_8_19'] = df[factors_to_sum_upper].sum(axis=1)
-            
-            validation_errors = df[df['SUMA_FACTORES_8_19'] > 1.00000001]
-            
-            if not validation_errors.empty:
-                error_msg = (
-                    f"Validación fallida: {len(validation_errors)} registros tienen una suma de Factores 8 al 19 mayor que 1. "
-                    f"Filas con error (muestra): {', '.join([str(i + 2) for i in validation_errors.index.tolist()[:5]])}"
-                )
-                raise ValueError(error_msg)
-
-
-            # --- 3. Procesamiento e Inserción/Actualización en Base de Datos ---
-            # Se usa transaction.atomic() por fila para asegurar la unicidad y reversión del fallo
-            
-            for index, row in df.iterrows():
-                id_fiscal = None # Inicializar para asegurar que esté disponible en el except
-                
-                try:
-                    # **SOLUCIÓN CRÍTICA** Búsqueda de la Subsidiaria por identificacion_fiscal (no por PK)
-                    id_fiscal = str(row['ID_FISCAL_EMPRESA']).split('.')[0].strip()
-                    subsidiaria_obj = EmpresaSubsidiaria.objects.get(identificacion_fiscal=id_fiscal)
-
-                    # --- Definición de Clave Única y Datos ---
-                    unique_key = {
-                        'empresa_subsidiaria': subsidiaria_obj, 
-                        'ejercicio': int(row['EJERCICIO']),
-                        'instrumento': row['INSTRUMENTO'],
-                        'fecha_pago': pd.to_datetime(row['FECHA']).date(), 
-                        'secuencia': int(row['SECUENCIA']),
-                        'numero_dividendo': int(row['NUMERO_DE_DIVIDENDO']), # Campo agregado
-                    }
-                    
-                    update_data = {
-                        'mercado': row['MERCADO'],
-                        'tipo_sociedad': row['TIPO_SOCIEDAD'],
-                        'valor_historico': Decimal(str(row['VALOR_HISTORICO'])),
-                        'origen': 'Carga Masiva Factor', 
-                        'usuario_modificador': request.user,
-                    }
-                    
-                    # Mapear los 30 factores (8 al 37) de forma dinámica
-                    for factor_num in range(8, 38):
-                        col_name = f'FACTOR_{factor_num}'
-                        model_field_name = f'factor_{factor_num}'
-                        factor_value = row.get(col_name)
-                        
-                        update_data[model_field_name] = Decimal(str(factor_value)) if pd.notna(factor_value) else None
-
-                    
-                    # bloque transaccional por fila
-                    with transaction.atomic():
-                        # Uso de update_or_create con trazabilidad
-                        existing_calificacion = CalificacionTributaria.objects.filter(**unique_key).only('usuario_creador').first()
-                        
-                        calificacion, created = CalificacionTributaria.objects.update_or_create(
-                            **unique_key,
-                            defaults={
-                                **update_data,
-                                'usuario_creador': request.user if created or not existing_calificacion else existing_calificacion.usuario_creador
-                            }
-                        )
-                        
-                        if created:
-                            registros_creados += 1
-                        else:
-                            registros_actualizados += 1
-                            
-                # Manejo de errores por fila
-                except EmpresaSubsidiaria.DoesNotExist:
-                    errores.append(f"Fila {index + 2}: El ID Fiscal '{id_fiscal}' de la empresa no existe.")
-                    continue
-                except (ValueError, TypeError) as ve:
-                    # Captura errores de conversión (Decimal, Int, Fecha)
-                    errores.append(f"Fila {index + 2}: Error de formato de dato (Ej. Fecha, Número). Detalle: {str(ve).splitlines()[0]}")
-                    continue
-                except Exception as e:
-                    errores.append(f"Fila {index + 2}: Error desconocido: {str(e).splitlines()[0]}")
-                    continue
-
-
-            # --- 4. Mensaje de Éxito y Errores Finales ---
-            
-            if errores:
-                # Mostrar todos los errores recolectados
-                error_summary = ' | '.join(errores)  
-                messages.warning(
-                    request, 
-                    f'Carga finalizada con {len(errores)} errores. Revise los detalles: {error_summary}'
-                )
+        # Registro de la carga: el archivo temporal se mueve a Auditoria.file junto a su hash
+        auditoria = registrar_auditoria(request, uploaded_file, Auditoria.TIPO_FACTOR, len(df))
 
-            messages.success(
-                request, 
-                f'El archivo "{uploaded_file.name}" fue procesado. {registros_creados} creados, {registros_actualizados} actualizados.'
-            )
-            
-            return redirect('calificaciones:calificacion_list')
-            
-        # --- Manejo de Errores de Pre-Procesamiento (Columnas/Suma) ---
+        # --- Validación (columnas y suma de factores 8 al 19) e inserción/actualización por fila ---
+        from . import cargas
+        try:
+            resultado = cargas.procesar_factores(df, request.user)
         except ValueError as e:
+            auditoria.finalizar(0, 0, [str(e)])
             messages.error(request, f'Error de validación de datos: {e}')
             return render(request, 'bulk_upload_factor.html')
-            
         except Exception as e:
+            auditoria.finalizar(0, 0, [str(e)])
             messages.error(request, f'Error interno al procesar el archivo: {e}')
             return render(request, 'bulk_upload_factor.html')
 
+        # Refresco incremental del snapshot columnar de factores
+        advertencia = cargas.refrescar_snapshot(resultado.pks)
+        if advertencia:
+            messages.warning(request, advertencia)
+
+        auditoria.finalizar(resultado.creados, resultado.actualizados, resultado.errores)
+        _informar_consolidadas(request, resultado)
+        if resultado.errores:
+            messages.warning(
+                request,
+                f'Carga finalizada con {len(resultado.errores)} errores. '
+                f'Revise los detalles: {" | ".join(resultado.errores)}'
+            )
+        messages.success(
+            request,
+            f'El archivo "{uploaded_file.name}" fue procesado. '
+            f'{resultado.creados} creados, {resultado.actualizados} actualizados.'
+        )
+        return redirect('calificaciones:calificacion_list')
+
     return render(request, 'bulk_upload_factor.html')
 
+def _informar_consolidadas(request, resultado):
+    """Mensaje con las filas descartadas por repetir la llave de otra fila del archivo."""
+    if resultado.consolidadas:
+        messages.info(
+            request,
+            f'{len(resultado.consolidadas)} filas repetían la llave de otra fila del archivo y se consolidaron: '
+            f'{" | ".join(resultado.consolidadas[:5])}{"..." if len(resultado.consolidadas) > 5 else ""}'
+        )
+
+def _respuesta_plantilla(esquema):
+    """Plantilla CSV de un esquema de carga: encabezados y una fila de ejemplo, en formato regional."""
+    response = HttpResponse(content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{esquema.archivo_plantilla}"'
+    esquema.escribir_plantilla(response)
+    return response
+
 @login_required 
 # Usa el decorador de acceso que ya tienes (Analista/Corredor o el que corresponda)
 @user_passes_test(lambda user: has_access(user, ['Analista', 'Corredor']), 
                  login_url='/forbidden/')
 # miAppCalificacion/views.py
-
+@plantilla_condicional(esquemas.FACTOR)
 def descargar_plantilla_factores_view(request):
-    """Genera y sirve el archivo CSV con los encabezados requeridos para Factores."""
-    
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="Plantilla_Carga_Masiva_Factores.csv"' 
-
-    writer = csv.writer(response) 
-    
-    # Metadatos requeridos (9 campos) - Usamos mayúsculas según el error
-    metadata_headers = [
-        # Asumimos que estos 6 campos SÍ fueron encontrados por el validador
-        'ID_FISCAL_EMPRESA', 'EJERCICIO', 'MERCADO', 'INSTRUMENTO', 
-        'FECHA', 'SECUENCIA', 
-        # Los campos que se reportan como faltantes
-        'NUMERO DE DIVIDENDO', 'TIPO SOCIEDAD', 'VALOR HISTORICO', 
-    ]
-    
-    # 30 Factores (del Factor 8 al Factor 37)
-    # CORRECCIÓN: Usamos .upper() para generar FACTOR 8, FACTOR 9, etc.
-    factor_headers = [f'FACTOR {i}' for i in range(8, 38)] 
-    
-    # Escribe todos los encabezados
-    writer.writerow(metadata_headers + factor_headers)
-    
-    # --- fila de Ejemplo (El cuerpo de la fila de ejemplo está bien) ---
-    
-    # Valores de metadatos (9 valores)
-    example_row = [
-        '76000000-1', '2025', 'CHILE', 'ACCION', '2025-01-01', '1', 
-        '0', 'SA', '1000.00', 
-    ]
-    
-    # Valores de factores (30 valores)
-    factors_to_sum_count = 12
-    valor_unitario = 1.00 / factors_to_sum_count 
-    
-    for i in range(8, 38): 
-        if i <= 19:
-            example_row.append(f'{valor_unitario:.5f}')
-        else:
-            example_row.append('0.00000') 
-            
-    writer.writerow(example_row)
-    
-    return response
+    """Genera y sirve el archivo CSV con los encabezados requeridos para Factores (esquemas.FACTOR)."""
+    return _respuesta_plantilla(esquemas.FACTOR)
 
 
+@con_subida_a_disco
 @login_required
 @user_passes_test(lambda user: has_access(user, ['Analista', 'Corredor']), 
                   login_url='/forbidden/')
@@ -295,6 +311,12 @@ def bulk_upload_monto(request):
     basada en la llave única (Subsidiaria + Fecha de Inicio).
     """
     if request.method == "POST":
+        # El handler de subida corta los archivos que superan el límite mientras se reciben
+        rechazo = motivo_rechazo(request)
+        if rechazo:
+            messages.error(request, rechazo)
+            return redirect('calificaciones:bulk_upload_monto')
+
         if 'file' in request.FILES:
             file = request.FILES['file']
             
@@ -302,107 +324,33 @@ def bulk_upload_monto(request):
                 messages.error(request, 'El archivo debe ser CSV o Excel.')
                 return redirect('calificaciones:bulk_upload_monto')
 
+            # pandas se importa recién aquí, con la primera carga (ver importacion.py)
+            from . import importacion
+
+            auditoria = None
             try:
-                # Lectura con Pandas: CORRECCIÓN DE FORMATO REGIONAL
-                if file.name.endswith('.csv'):
-                    # CRÍTICO: Usamos sep=';' (punto y coma) y decimal=',' (coma decimal)
-                    # La línea se divide en dos para cumplir con PEP 8
-                    df = pd.read_csv(
-                        io.StringIO(file.read().decode('utf-8')), 
-                        sep=';', 
-                        decimal=','
-                    ) 
-                else:
-                    df = pd.read_excel(file)
-                
-                df = df.fillna('')
-                
-                # Homologación de columnas
-                df.columns = [col.upper().replace(' ', '_') for col in df.columns]
-                
-                required_cols_normalized = [
-                    col.upper().replace(' ', '_') for col in REQUIRED_MONTO_COLUMNS
-                ]
+                # Lectura con Pandas: CORRECCIÓN DE FORMATO REGIONAL (sep=';' y decimal=',')
+                df = importacion.leer_archivo(file, esquemas.MONTO)
+
+                # Registro de la carga: el archivo temporal se mueve a Auditoria.file junto a su hash
+                auditoria = registrar_auditoria(request, file, Auditoria.TIPO_MONTO, len(df))
                 
-                if not all(col in df.columns for col in required_cols_normalized):
-                    missing_cols_readable = [
-                        col for col in REQUIRED_MONTO_COLUMNS 
-                        if col.upper().replace(' ', '_') not in df.columns
-                    ]
-                    messages.error(
-                        request, 
-                        f'El archivo debe contener las siguientes columnas requeridas: {", ".join(missing_cols_readable)}'
-                    )
+                # Columnas tipadas por el esquema (sin fillna: las celdas vacías quedan nulas)
+                from . import cargas
+                try:
+                    resultado = cargas.procesar_montos(df, request.user)
+                except ValueError as e:
+                    auditoria.finalizar(0, 0, [str(e)])
+                    messages.error(request, str(e))
                     return redirect('calificaciones:bulk_upload_monto')
-                
-                creados = 0
-                actualizados = 0
-                errores = []
-                
-                with transaction.atomic():
-                    for index, row in df.iterrows():
-                        try:
-                            # Obtener y limpiar ID Fiscal (Maneja el caso de que Pandas lo lea como float)
-                            id_fiscal = str(row['ID_FISCAL_EMPRESA']).split('.')[0].strip()
-                            subsidiaria_obj = EmpresaSubsidiaria.objects.get(
-                                identificacion_fiscal=id_fiscal
-                            )
-                            
-                            # Conversión de fechas y montos
-                            fecha_inicio = pd.to_datetime(row['FECHA_INICIO']).date()
-                            fecha_fin = pd.to_datetime(row['FECHA_FIN']).date()
-                            monto_impuesto = Decimal(str(row['MONTO_IMPUESTO']))
-                            
-                            key_fields = {
-                                'empresa_subsidiaria': subsidiaria_obj,
-                                'fecha_inicio_periodo': fecha_inicio
-                            }
-                            
-                            update_defaults = {
-                                'fecha_fin_periodo': fecha_fin,
-                                'monto_impuesto': monto_impuesto,
-                                'estado': str(row['ESTADO']),
-                                'origen': 'Carga Masiva Monto',
-                                'usuario_modificador': request.user 
-                            }
-                            
-                            existing_calificacion = CalificacionTributaria.objects.filter(
-                                **key_fields
-                            ).only('usuario_creador').first()
-
-                            calificacion, created = CalificacionTributaria.objects.update_or_create(
-                                **key_fields,
-                                defaults={
-                                    **update_defaults,
-                                    'usuario_creador': request.user if created or not existing_calificacion else existing_calificacion.usuario_creador
-                                }
-                            )
-
-                            if created:
-                                creados += 1
-                            else:
-                                actualizados += 1
-                                
-                        except EmpresaSubsidiaria.DoesNotExist:
-                            errores.append(
-                                f"Fila {index + 2}: El ID Fiscal {id_fiscal} de la empresa no existe."
-                            )
-                        except (ValueError, TypeError) as e:
-                            # Este es el bloque que buscamos solucionar (Monto/Fecha)
-                            errores.append(
-                                f"Fila {index + 2}: Error en formato (Fecha/Monto). Detalle: {e}"
-                            )
-                        except IntegrityError:
-                            errores.append(
-                                f"Fila {index + 2}: Error de integridad de datos (posiblemente fechas inválidas)."
-                            )
-                        except Exception as e:
-                            errores.append(f"Fila {index + 2}: Error desconocido: {e}")
 
+                auditoria.finalizar(resultado.creados, resultado.actualizados, resultado.errores)
+                _informar_consolidadas(request, resultado)
                 messages.success(
                     request, 
-                    f'Carga masiva finalizada: {creados} creados, {actualizados} actualizados.'
+                    f'Carga masiva finalizada: {resultado.creados} creados, {resultado.actualizados} actualizados.'
                 )
+                errores = resultado.errores
                 if errores:
                     error_summary = ' | '.join(errores[:5]) + ('...' if len(errores) > 5 else '')
                     messages.warning(
@@ -413,6 +361,9 @@ def bulk_upload_monto(request):
                 return redirect('calificaciones:calificacion_list')
             
             except Exception as e:
+                # Ya finalizada, conserva su resultado; si no, no queda PENDING
+                if auditoria and auditoria.status == Auditoria.STATUS_PENDING:
+                    auditoria.finalizar(0, 0, [str(e)])
                 messages.error(
                     request, 
                     f'Error fatal al procesar el archivo: {e}'
@@ -424,25 +375,245 @@ def bulk_upload_monto(request):
 @login_required 
 @user_passes_test(lambda user: has_access(user, ['Analista', 'Corredor']), 
                  login_url='/forbidden/')
+@plantilla_condicional(esquemas.MONTO)
 def descargar_plantilla_montos_view(request):
-    # Configurar la respuesta HTTP
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="Plantilla_Montos_Tributarios.csv"' 
+    """Genera y sirve el archivo CSV con los encabezados requeridos para Montos (esquemas.MONTO)."""
+    return _respuesta_plantilla(esquemas.MONTO)
 
-    # Esta línea es correcta y necesaria
-    writer = csv.writer(response) 
-    
-    # Definir los encabezados (¡DEBEN COINCIDIR EXACTAMENTE!)
-    headers = ['ID Fiscal Empresa', 'Fecha Inicio', 'Fecha Fin', 'Monto Impuesto', 'Estado']
-    
-    writer.writerow(headers)
-    
-    # Fila de ejemplo
-    writer.writerow(['76000000-1', '2025-01-01', '2025-03-31', '5500000.00', 'Vigente'])
-    
+
+TIPOS_LOTE = {
+    'factores': Auditoria.TIPO_FACTOR,
+    'montos': Auditoria.TIPO_MONTO,
+}
+
+
+@con_subida_a_disco(varios_archivos=True)
+@login_required
+@user_passes_test(lambda user: has_access(user, ['Analista', 'Corredor']), 
+                  login_url='/forbidden/')
+def carga_lote(request):
+    """
+    Carga por lote: varios archivos (CSV/Excel) o un zip con ellos, de factores o de montos.
+
+    Cada archivo queda como un trabajo de importación (Auditoria) que se ejecuta en
+    segundo plano, en paralelo con los demás (ver trabajos.py); la vista redirige de
+    inmediato al progreso del lote.
+    """
+    if request.method == 'POST':
+        rechazo = motivo_rechazo(request)
+        if rechazo:
+            messages.error(request, rechazo)
+            return redirect('calificaciones:carga_lote')
+
+        tipo = TIPOS_LOTE.get(request.POST.get('tipo'))
+        archivos = request.FILES.getlist('archivos')
+        if tipo is None:
+            messages.error(request, 'Debe indicar si el lote es de factores o de montos.')
+            return redirect('calificaciones:carga_lote')
+        if not archivos:
+            messages.error(request, 'Debe seleccionar al menos un archivo para cargar.')
+            return redirect('calificaciones:carga_lote')
+
+        from . import trabajos
+        with transaction.atomic():
+            lote, auditorias, rechazados = registrar_lote(request, archivos, tipo)
+            trabajos.encolar(auditoria.pk for auditoria in auditorias)
+
+        for motivo in rechazados:
+            messages.warning(request, f'Archivo omitido: {motivo}')
+        if not auditorias:
+            messages.error(request, 'El lote no contiene archivos CSV o Excel para importar.')
+            return redirect('calificaciones:carga_lote')
+        messages.success(request, f'{len(auditorias)} archivos en cola de importación.')
+        return redirect('calificaciones:progreso_lote', lote=lote)
+
+    return render(request, 'carga_lote.html', {'tipos': TIPOS_LOTE})
+
+
+async def _resumen_lote_visible(request, lote):
+    """Resumen del lote (ver trabajos.aresumen_lote); None si es de otro usuario y quien pide no es staff."""
+    from . import trabajos
+    trabajos_lote, totales = await trabajos.aresumen_lote(lote)
+    if not trabajos_lote:
+        raise Http404('Lote no encontrado.')
+    if any(trabajo['usuario_id'] != request.user.pk for trabajo in trabajos_lote) and not await sync_to_async(
+        has_access
+    )(request.user, []):
+        return None
+    return trabajos_lote, totales
+
+
+@acceso_async(['Analista', 'Corredor'])
+async def progreso_lote(request, lote):
+    """Estado de cada archivo de un lote y totales; con ?formato=json para consultarlo por script."""
+    resumen = await _resumen_lote_visible(request, lote)
+    if resumen is None:
+        return redirect('/forbidden/')
+    trabajos_lote, totales = resumen
+
+    if request.GET.get('formato') == 'json':
+        return JsonResponse({'lote': str(lote), 'totales': totales, 'archivos': [
+            {clave: valor for clave, valor in trabajo.items() if clave != 'usuario_id'}
+            for trabajo in trabajos_lote
+        ]})
+
+    etiquetas = dict(Auditoria.STATUS_CHOICES)
+    for trabajo in trabajos_lote:
+        trabajo['estado'] = etiquetas.get(trabajo['status'], trabajo['status'])
+    # render lee la sesión (mensajes, token CSRF) con el ORM síncrono
+    return await sync_to_async(render)(request, 'progreso_lote.html', {
+        'lote': lote, 'trabajos': trabajos_lote, 'totales': totales,
+    })
+
+
+# Flujo de eventos del progreso de un lote (server-sent events)
+EVENTOS_INTERVALO = 1          # segundos entre revisiones de la marca del lote
+EVENTOS_CONSULTA = 5           # segundos máximos sin consultar la base (la marca es por caché)
+EVENTOS_LATIDO = 15            # comentario periódico para que los proxies no corten la conexión
+EVENTOS_DURACION = 300         # luego se cierra y el navegador se reconecta solo
+EVENTOS_REINTENTO_MS = 3000    # espera del navegador antes de reconectarse
+
+
+def _evento(nombre, datos):
+    return f'event: {nombre}\ndata: {datos}\n\n'
+
+
+def _datos_progreso(lote, trabajos_lote, totales):
+    etiquetas = dict(Auditoria.STATUS_CHOICES)
+    # Sin el detalle de errores: al terminar, la página se recarga y lo muestra
+    return json.dumps({'lote': str(lote), 'totales': totales, 'archivos': [
+        {
+            'pk': trabajo['pk'], 'status': trabajo['status'],
+            'estado': etiquetas.get(trabajo['status'], trabajo['status']),
+            'row_count': trabajo['row_count'], 'imported_count': trabajo['imported_count'],
+            'updated_count': trabajo['updated_count'], 'error_count': trabajo['error_count'],
+        }
+        for trabajo in trabajos_lote
+    ]})
+
+
+async def _flujo_lote(lote, trabajos_lote, totales):
+    from . import trabajos
+    yield f'retry: {EVENTOS_REINTENTO_MS}\n\n'
+    marca = await trabajos.amarca_lote(lote)
+    enviados = None
+    inicio = ultimo_envio = ultima_consulta = time.monotonic()
+    while True:
+        datos = _datos_progreso(lote, trabajos_lote, totales)
+        if datos != enviados:
+            enviados, ultimo_envio = datos, time.monotonic()
+            yield _evento('progreso', datos)
+        if not totales['en_curso']:
+            yield _evento('fin', datos)
+            return
+        if time.monotonic() - inicio > EVENTOS_DURACION:
+            return
+        if time.monotonic() - ultimo_envio >= EVENTOS_LATIDO:
+            ultimo_envio = time.monotonic()
+            yield ': latido\n\n'
+        # La espera no ocupa hilo ni conexión a la base: un proceso ASGI atiende muchos clientes
+        await asyncio.sleep(EVENTOS_INTERVALO)
+        nueva_marca = await trabajos.amarca_lote(lote)
+        if nueva_marca != marca or time.monotonic() - ultima_consulta >= EVENTOS_CONSULTA:
+            marca, ultima_consulta = nueva_marca, time.monotonic()
+            trabajos_lote, totales = await trabajos.aresumen_lote(lote)
+
+
+@acceso_async(['Analista', 'Corredor'])
+async def eventos_lote(request, lote):
+    """
+    Progreso del lote como server-sent events (text/event-stream), para EventSource.
+
+    Emite `progreso` cuando cambia el estado y `fin` cuando no quedan trabajos en curso.
+    Con ASGI la conexión queda abierta; con WSGI se responde sólo el estado actual (la
+    conexión ocuparía un hilo del servidor) y el navegador se reconecta cada
+    EVENTOS_REINTENTO_MS.
+    """
+    resumen = await _resumen_lote_visible(request, lote)
+    if resumen is None:
+        return HttpResponseForbidden()
+    trabajos_lote, totales = resumen
+
+    if isinstance(request, ASGIRequest):
+        response = StreamingHttpResponse(_flujo_lote(lote, trabajos_lote, totales), content_type='text/event-stream')
+    else:
+        datos = _datos_progreso(lote, trabajos_lote, totales)
+        contenido = f'retry: {EVENTOS_REINTENTO_MS}\n\n' + _evento('progreso', datos)
+        if not totales['en_curso']:
+            contenido += _evento('fin', datos)
+        response = HttpResponse(contenido, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # nginx no debe acumular el flujo en su buffer
+    response['X-Accel-Buffering'] = 'no'
     return response
 
 
+# --- autocompletado de llaves foraneas ---
+
+@acceso_async()
+async def autocompletar_empresas(request):
+    """Opciones de EmpresaSubsidiaria para el widget del formulario de calificación."""
+    return await arespuesta_autocompletar(
+        request, EmpresaSubsidiaria.objects.all(), 'nombre_legal', TABLA_EMPRESAS
+    )
+
+@acceso_async(['Administrador'])
+async def autocompletar_paises(request):
+    """Opciones de Pais para el formulario de usuarios, que administra el rol Administrador."""
+    return await arespuesta_autocompletar(request, Pais.objects.all(), 'nombre', TABLA_CATALOGOS)
+
+
+# --- analitica de factores ---
+
+ANALITICA_DECIMALES = 4           # la tolerancia se redondea a esta grilla antes de armar la llave
+ANALITICA_CACHE_SEGUNDOS = 3600   # las versiones de snapshot viejas expiran solas
+
+@login_required
+@user_passes_test(lambda user: has_access(user, ['Gerente']), 
+                login_url='/forbidden/')
+@lectura_en_replica
+def analitica_factores(request):
+    """
+    Estadísticas por empresa o ejercicio sobre toda la matriz de factores (JSON).
+
+    Se calculan con NumPy sobre el snapshot columnar y se guardan en caché con la versión
+    del snapshot en la llave: la siguiente importación publica otra versión y el resultado
+    se recalcula en la primera consulta posterior.
+    """
+    # Importación diferida: NumPy sólo se carga cuando se usa la analítica
+    from . import analitica, matriz_factores
+
+    agrupar = request.GET.get('agrupar', 'empresa')
+    if agrupar not in ('empresa', 'ejercicio'):
+        return JsonResponse({'error': "El parámetro 'agrupar' debe ser 'empresa' o 'ejercicio'."}, status=400)
+    try:
+        tolerancia = float(request.GET.get('tolerancia', '0.01'))
+    except ValueError:
+        tolerancia = math.nan
+    # float() también acepta 'nan', 'inf' y negativos; cada valor distinto sería otra llave de caché
+    if not 0 <= tolerancia <= 1:
+        return JsonResponse({'error': "El parámetro 'tolerancia' debe ser un número entre 0 y 1."}, status=400)
+    tolerancia = round(tolerancia, ANALITICA_DECIMALES)
+
+    version = matriz_factores.version_actual()
+    if version is None:
+        return JsonResponse({'error': 'Aún no existe un snapshot de factores. Ejecute snapshot_factores.'}, status=404)
+
+    cache_key = f'analitica_factores:{version}:{agrupar}:{tolerancia}'
+    resultado = cache.get(cache_key)
+    if resultado is None:
+        resultado = analitica.calcular_estadisticas(matriz_factores.cargar_matriz(), agrupar, tolerancia)
+        if agrupar == 'empresa':
+            nombres = dict(EmpresaSubsidiaria.objects.filter(
+                pk__in=[grupo['grupo'] for grupo in resultado['grupos']]
+            ).values_list('pk', 'nombre_legal'))
+            for grupo in resultado['grupos']:
+                grupo['nombre'] = nombres.get(grupo['grupo'], '')
+        cache.set(cache_key, resultado, ANALITICA_CACHE_SEGUNDOS)
+
+    return JsonResponse(resultado)
+
+
 # --- edicion de calificacion ---
 
 @login_required
@@ -468,6 +639,65 @@ def edit_calificacion(request, pk):
     
     return render(request, 'create_edit.html', {'form': form, 'calificacion': calificacion})
 
+# --- acciones masivas (estado / eliminacion) ---
+
+@login_required
+@require_POST
+@user_passes_test(lambda user: has_access(user, ['Analista', 'Gerente', 'Corredor']), 
+                login_url='/forbidden/')
+def acciones_masivas(request):
+    """
+    Cambia el estado o elimina muchas calificaciones a la vez.
+
+    El alcance es la selección de filas del listado o todas las filas que cumplen los
+    filtros vigentes. Cada acción es un INSERT ... SELECT al histórico más un único
+    UPDATE o DELETE, sin importar cuántas filas abarque.
+    """
+    accion = request.POST.get('accion')
+    calificaciones = CalificacionTributaria.objects.all()
+
+    if request.POST.get('alcance') == 'filtro':
+        # Sin ningún filtro efectivo el alcance sería la tabla completa
+        if not filtros_activos(request.POST):
+            messages.error(
+                request, 'Para aplicar una acción a las filas filtradas debe filtrar el listado, o seleccionar las filas.'
+            )
+            return redirect('calificaciones:calificacion_list')
+        # Las mismas filas del listado: sólo las de montos
+        calificaciones = filtrar_calificaciones(solo_montos(calificaciones), request.POST)
+    else:
+        seleccion = [pk for pk in request.POST.getlist('seleccion') if pk.isdigit()]
+        if not seleccion:
+            messages.error(request, 'Debe seleccionar al menos una calificación.')
+            return redirect('calificaciones:calificacion_list')
+        calificaciones = calificaciones.filter(pk__in=seleccion)
+
+    if accion == 'estado':
+        estado_nuevo = (request.POST.get('estado_nuevo') or '').strip()
+        max_length = acciones.largo_maximo_estado()
+        if not estado_nuevo or len(estado_nuevo) > max_length:
+            messages.error(request, f'Debe indicar un estado de hasta {max_length} caracteres.')
+            return redirect('calificaciones:calificacion_list')
+
+        total = acciones.cambiar_estado(calificaciones, estado_nuevo, request.user)
+        messages.success(request, f'{total} calificaciones cambiaron al estado "{estado_nuevo}".')
+
+    elif accion == 'eliminar':
+        # Misma regla que delete_calificacion
+        if not has_access(request.user, []):
+            return redirect('calificaciones:forbidden')
+
+        total, advertencia = acciones.eliminar(calificaciones, request.user)
+        if advertencia:
+            messages.warning(request, advertencia)
+        messages.success(request, f'{total} calificaciones eliminadas.')
+
+    else:
+        messages.error(request, 'Acción masiva no reconocida.')
+
+    return redirect('calificaciones:calificacion_list')
+
+
 # --- eliminacion de calificacion ---
 @login_required
 @user_passes_test(lambda user: has_access(user, []), 
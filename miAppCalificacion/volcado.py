@@ -0,0 +1,243 @@
+# miAppCalificacion/volcado.py
+"""
+Volcado y restauración de los datos del proyecto con COPY de PostgreSQL.
+
+Reemplaza a dumpdata/loaddata para refrescar staging desde producción: cada tabla se
+escribe a un archivo con COPY ... TO STDOUT (formato binary o csv) y se carga con
+COPY ... FROM STDIN, sin pasar las filas por el ORM.
+
+- Exportar: varias tablas a la vez, cada una en su propia conexión. Todas leen el mismo
+  snapshot (pg_export_snapshot / SET TRANSACTION SNAPSHOT, como pg_dump -j), así el
+  volcado es consistente aunque la base siga recibiendo escrituras.
+- Importar: cada tabla se carga en cuanto están cargadas las tablas a las que apunta
+  (orden topológico de las FK), con las independientes en paralelo.
+- Anonimizar: los datos personales de los usuarios se reemplazan en la misma consulta del
+  COPY, fila a fila mientras se transmiten; nunca llegan al archivo.
+
+El directorio contiene un archivo por tabla y manifest.json con el orden, las columnas y
+la cantidad de filas de cada una.
+"""
+
+import json
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from graphlib import TopologicalSorter
+
+from django.apps import apps
+from django.core.management.color import no_style
+from django.db import connections, transaction
+from django.utils import timezone
+
+MANIFIESTO = 'manifest.json'
+FORMATOS = ('binary', 'csv')
+APPS = ('miAppUsuario', 'miAppCalificacion')
+# Credenciales de la API: no deben viajar de producción a otro ambiente
+EXCLUIDOS = ('miAppUsuario.TokenApi',)
+
+# modelo -> {columna: expresión SQL}; las columnas no listadas se copian tal cual.
+# Los valores dependen del id para que el usuario y su histórico sigan coincidiendo.
+ANONIMIZAR = {
+    'miAppUsuario.Usuario': {
+        'email': "'usuario' || \"id\" || '@anonimo.invalid'",
+        'first_name': "'Usuario'",
+        'last_name': '"id"::text',
+        'telefono': 'NULL',
+        'edad': 'NULL',
+        # Un hash que comienza con "!" es una contraseña inutilizable para Django
+        'password': "'!'",
+    },
+    'miAppUsuario.UsuarioHistorico': {
+        'email': "'usuario' || \"usuario_id\" || '@anonimo.invalid'",
+        'first_name': "'Usuario'",
+        'last_name': '"usuario_id"::text',
+        'telefono': 'NULL',
+        'edad': 'NULL',
+        'fecha_nacimiento': 'NULL',
+    },
+}
+
+
+def modelos():
+    """Modelos que se vuelcan, con las tablas a las que apuntan por FK antes que ellos."""
+    incluidos = {
+        modelo._meta.label: modelo
+        for app in APPS
+        for modelo in apps.get_app_config(app).get_models()
+        if modelo._meta.managed and not modelo._meta.proxy and modelo._meta.label not in EXCLUIDOS
+    }
+    grafo = TopologicalSorter({etiqueta: _dependencias(modelo, incluidos) for etiqueta, modelo in incluidos.items()})
+    return [incluidos[etiqueta] for etiqueta in grafo.static_order()]
+
+
+def _dependencias(modelo, incluidos):
+    return {
+        campo.related_model._meta.label
+        for campo in modelo._meta.concrete_fields
+        if campo.is_relation and campo.related_model is not modelo and campo.related_model._meta.label in incluidos
+    }
+
+
+def _columnas(modelo):
+    return [campo.column for campo in modelo._meta.concrete_fields]
+
+
+def _archivo(modelo, formato):
+    return f'{modelo._meta.db_table}.{"bin" if formato == "binary" else "csv"}'
+
+
+def _opciones(formato):
+    return 'FORMAT binary' if formato == 'binary' else 'FORMAT csv, HEADER true'
+
+
+def _exigir_postgresql(connection):
+    if connection.vendor != 'postgresql':
+        raise ValueError('El volcado con COPY sólo está disponible en PostgreSQL.')
+
+
+def _consulta(connection, modelo, anonimizar):
+    q = connection.ops.quote_name
+    reemplazos = ANONIMIZAR.get(modelo._meta.label, {}) if anonimizar else {}
+    columnas = []
+    for campo in modelo._meta.concrete_fields:
+        if campo.column in reemplazos:
+            # El tipo exacto de la columna: el formato binary no convierte tipos al cargar
+            columnas.append(f'CAST({reemplazos[campo.column]} AS {campo.db_type(connection)}) AS {q(campo.column)}')
+        else:
+            columnas.append(q(campo.column))
+    # Con SELECT (y no COPY tabla TO) también funciona sobre la tabla particionada
+    return f'SELECT {", ".join(columnas)} FROM {q(modelo._meta.db_table)}'
+
+
+def exportar(directorio, formato='binary', workers=4, anonimizar=False, using='default', progreso=None):
+    """
+    Vuelca todas las tablas a `directorio` y escribe el manifiesto.
+
+    `progreso(tabla, filas)` se llama al terminar cada tabla. Retorna el manifiesto.
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f'Formato desconocido: {formato}')
+    conexion = connections[using]
+    _exigir_postgresql(conexion)
+    os.makedirs(directorio, exist_ok=True)
+    lista = modelos()
+    filas = {}
+    lock = threading.Lock()
+
+    def volcar(modelo, snapshot):
+        try:
+            c = connections[using]
+            with transaction.atomic(using=using), c.cursor() as cursor:
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY')
+                cursor.execute('SET TRANSACTION SNAPSHOT %s', [snapshot])
+                with open(os.path.join(directorio, _archivo(modelo, formato)), 'wb') as archivo:
+                    cursor.cursor.copy_expert(
+                        f'COPY ({_consulta(c, modelo, anonimizar)}) TO STDOUT WITH ({_opciones(formato)})', archivo,
+                    )
+                total = cursor.cursor.rowcount
+            with lock:
+                filas[modelo._meta.label] = total
+            if progreso:
+                progreso(modelo._meta.db_table, total)
+        finally:
+            connections.close_all()
+
+    # La transacción que exporta el snapshot debe seguir abierta hasta que todos lo tomen
+    with transaction.atomic(using=using), conexion.cursor() as cursor:
+        cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY')
+        cursor.execute('SELECT pg_export_snapshot()')
+        snapshot = cursor.fetchone()[0]
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='volcado') as pool:
+            for futuro in [pool.submit(volcar, modelo, snapshot) for modelo in lista]:
+                futuro.result()
+
+    manifiesto = {
+        'generado': timezone.now().isoformat(),
+        'formato': formato,
+        'anonimizado': anonimizar,
+        'tablas': [
+            {
+                'modelo': modelo._meta.label,
+                'tabla': modelo._meta.db_table,
+                'archivo': _archivo(modelo, formato),
+                'columnas': _columnas(modelo),
+                'dependencias': sorted(_dependencias(modelo, {m._meta.label for m in lista})),
+                'filas': filas[modelo._meta.label],
+            }
+            for modelo in lista
+        ],
+    }
+    with open(os.path.join(directorio, MANIFIESTO), 'w', encoding='utf-8') as archivo:
+        json.dump(manifiesto, archivo, indent=2, ensure_ascii=False)
+    return manifiesto
+
+
+def leer_manifiesto(directorio):
+    with open(os.path.join(directorio, MANIFIESTO), encoding='utf-8') as archivo:
+        return json.load(archivo)
+
+
+def importar(directorio, workers=4, using='default', progreso=None):
+    """
+    Reemplaza el contenido de las tablas por el del volcado en `directorio`.
+
+    Vacía las tablas con TRUNCATE ... CASCADE (arrastra también las que apuntan a ellas,
+    como los tokens de la API y el log del admin), carga cada tabla cuando ya están
+    cargadas sus dependencias y al final reinicia las secuencias de los id.
+    Retorna el manifiesto.
+    """
+    manifiesto = leer_manifiesto(directorio)
+    conexion = connections[using]
+    _exigir_postgresql(conexion)
+    q = conexion.ops.quote_name
+    por_etiqueta = {tabla['modelo']: tabla for tabla in manifiesto['tablas']}
+    lista = [apps.get_model(etiqueta) for etiqueta in por_etiqueta]
+
+    for modelo in lista:
+        faltantes = set(por_etiqueta[modelo._meta.label]['columnas']) - set(_columnas(modelo))
+        if faltantes:
+            raise ValueError(
+                f'{modelo._meta.db_table}: el volcado trae columnas que no existen aquí '
+                f'({", ".join(sorted(faltantes))}); aplique las migraciones pendientes.'
+            )
+
+    with transaction.atomic(using=using), conexion.cursor() as cursor:
+        cursor.execute(f'TRUNCATE {", ".join(q(m._meta.db_table) for m in lista)} CASCADE')
+
+    def cargar(etiqueta):
+        tabla = por_etiqueta[etiqueta]
+        try:
+            c = connections[using]
+            with transaction.atomic(using=using), c.cursor() as cursor:
+                columnas = ', '.join(q(columna) for columna in tabla['columnas'])
+                with open(os.path.join(directorio, tabla['archivo']), 'rb') as archivo:
+                    cursor.cursor.copy_expert(
+                        f'COPY {q(tabla["tabla"])} ({columnas}) FROM STDIN WITH ({_opciones(manifiesto["formato"])})',
+                        archivo,
+                    )
+                total = cursor.cursor.rowcount
+            if progreso:
+                progreso(tabla['tabla'], total)
+        finally:
+            connections.close_all()
+
+    # Cada tabla se confirma por separado: sólo puede cargarse cuando sus FK ya apuntan a filas confirmadas
+    grafo = TopologicalSorter({etiqueta: set(tabla['dependencias']) for etiqueta, tabla in por_etiqueta.items()})
+    grafo.prepare()
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='volcado') as pool:
+        en_curso = {}
+        while grafo.is_active():
+            for etiqueta in grafo.get_ready():
+                en_curso[pool.submit(cargar, etiqueta)] = etiqueta
+            listos, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+            for futuro in listos:
+                futuro.result()
+                grafo.done(en_curso.pop(futuro))
+
+    with transaction.atomic(using=using), conexion.cursor() as cursor:
+        for sql in conexion.ops.sequence_reset_sql(no_style(), lista):
+            cursor.execute(sql)
+    with conexion.cursor() as cursor:
+        # Estadísticas al día para el planificador y para las cuentas estimadas (utils.filas_estimadas)
+        cursor.execute(f'ANALYZE {", ".join(q(m._meta.db_table) for m in lista)}')
+    return manifiesto
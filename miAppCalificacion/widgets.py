@@ -0,0 +1,41 @@
+# miAppCalificacion/widgets.py
+
+from django import forms
+from django.urls import reverse_lazy
+
+
+class AutocompleteSelect(forms.Select):
+    """
+    <select> para llaves foráneas con muchas filas.
+
+    Sólo renderiza la opción seleccionada (una consulta por pk, no la tabla completa);
+    el resto de las opciones se piden bajo demanda al endpoint JSON `url_name`
+    mientras el usuario escribe (ver static/js/autocompletar.js).
+    """
+
+    class Media:
+        js = ('js/autocompletar.js',)
+
+    def __init__(self, url_name, attrs=None):
+        super().__init__(attrs)
+        self.url_name = url_name
+
+    def build_attrs(self, base_attrs, extra_attrs=None):
+        attrs = super().build_attrs(base_attrs, extra_attrs)
+        attrs['data-autocompletar-url'] = reverse_lazy(self.url_name)
+        return attrs
+
+    def optgroups(self, name, value, attrs=None):
+        opciones = []
+        seleccionados = [v for v in value if v not in ('', None)]
+        # Igual que ModelChoiceField: opción vacía si el campo es opcional o aún no hay valor
+        if not self.is_required or not seleccionados:
+            opciones.append(self.create_option(name, '', '---------', not seleccionados, 0))
+
+        if seleccionados:
+            campo = self.choices.field
+            for obj in self.choices.queryset.filter(pk__in=seleccionados):
+                opciones.append(self.create_option(
+                    name, str(obj.pk), campo.label_from_instance(obj), True, len(opciones)
+                ))
+        return [(None, opciones, 0)]
@@ -1,20 +1,42 @@
 from django.contrib import admin
-from .models import Usuario, Auditoria, Rol
+from .models import Usuario, Auditoria, Rol, TokenApi
+from miAppCalificacion.admin import AdminTablaGrande
 from miAppCalificacion.models import Pais, Moneda
 
 # Register your models here.
+# search_fields también habilita el autocompletado de estas FK en los demás admins
 @admin.register(Usuario)
-class UsuarioAdmin(admin.ModelAdmin):
-    list_display = ('id', 'first_name', 'last_name')
+class UsuarioAdmin(AdminTablaGrande):
+    list_display = ('id', 'first_name', 'last_name', 'email', 'rol_usuario', 'pais_usuario')
+    list_select_related = ('rol_usuario', 'pais_usuario')
+    list_filter = ('rol_usuario',)
+    search_fields = ('^email', '^first_name', '^last_name')
+    autocomplete_fields = ('rol_usuario', 'pais_usuario')
 
 @admin.register(Rol)
 class RolAdmin(admin.ModelAdmin):
     list_display = ('nombre', 'descripcion')
+    search_fields = ('^nombre',)
 
 @admin.register(Pais)
 class PaisAdmin(admin.ModelAdmin):
     list_display = ('nombre', 'codigo_iso', 'moneda_local')
+    list_select_related = ('moneda_local',)
+    search_fields = ('^nombre', '^codigo_iso')
+    autocomplete_fields = ('moneda_local',)
 
 @admin.register(Moneda)
 class MonedaAdmin(admin.ModelAdmin):
-    list_display = ('codigo_iso', 'nombre', 'simbolo', 'es_moneda_base')
\ No newline at end of file
+    list_display = ('codigo_iso', 'nombre', 'simbolo', 'es_moneda_base')
+    search_fields = ('^codigo_iso', '^nombre')
+
+@admin.register(TokenApi)
+class TokenApiAdmin(admin.ModelAdmin):
+    # Los tokens se crean con `manage.py token_api crear` (la clave se muestra sólo ahí)
+    list_display = ('nombre', 'prefijo', 'usuario', 'activo', 'creado_en', 'ultimo_uso')
+    list_select_related = ('usuario',)
+    list_filter = ('activo',)
+    readonly_fields = ('prefijo', 'clave_hash', 'creado_en', 'ultimo_uso')
+
+    def has_add_permission(self, request):
+        return False
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class MiappusuarioConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'miAppUsuario'
+
+    def ready(self):
+        # Registra los receptores que invalidan la caché de fragmentos
+        from . import signals  # noqa: F401
+        # Registra el chequeo del caché que usa el límite de intentos de inicio de sesión
+        from . import limites  # noqa: F401
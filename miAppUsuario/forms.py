@@ -1,6 +1,7 @@
 # miAppUsuario/forms.py (UPDATED)
 from django import forms
 from .models import Usuario 
+from miAppCalificacion.widgets import AutocompleteSelect
 
 class UsuarioForm(forms.ModelForm):
     contraseña = forms.CharField(
@@ -24,7 +25,9 @@ class UsuarioForm(forms.ModelForm):
             'email': forms.EmailInput(attrs={'placeholder': 'ejemplo@correo.com'}),
             'telefono': forms.TextInput(attrs={'placeholder': 'Ej: +56912345678 (opcional)'}),
             'edad': forms.NumberInput(attrs={'placeholder': 'Su edad (opcional)'}),
-            # Los campos Foreign Key (rol_usuario, pais_usuario) se renderizan automáticamente como <select>
+            # Los campos Foreign Key cargan sus opciones bajo demanda (endpoints de autocompletado)
+            'rol_usuario': AutocompleteSelect('usuarios:autocompletar_roles'),
+            'pais_usuario': AutocompleteSelect('calificaciones:autocompletar_paises'),
         }
 
     # Lógica de validación para contraseñas (la dejamos igual)
@@ -0,0 +1,178 @@
+# miAppUsuario/limites.py
+"""
+Límite de intentos de inicio de sesión por IP y por email, con contadores por ventana deslizante.
+
+Cada intento fallido cuesta un hash PBKDF2 completo, así que una ráfaga de credenciales
+robadas contra el login puede dejar sin CPU a todos los workers. Antes de llamar a
+authenticate, cada intento suma uno al contador de su IP y al de su email; si alguno
+supera su límite, el intento se rechaza sin calcular ningún hash.
+
+- Cada ventana dura lo que tarda en rellenarse la ráfaga tolerada al ritmo sostenido
+  (D = LOGIN_LIMITE_*_CAPACIDAD / LOGIN_LIMITE_*_POR_MINUTO). Un intento se admite si
+  los de la ventana en curso, más los de la anterior ponderados por la fracción de ésta
+  que aún cae dentro de los últimos D segundos, no superan la capacidad.
+- Así el límite equivale a un balde de fichas: en cualquier intervalo de T segundos
+  entran a lo más CAPACIDAD + T * ritmo intentos. Una ráfaga al final de una ventana
+  sigue pesando al comienzo de la siguiente (con ventanas fijas entraría el doble).
+- Los contadores se crean con cache.add y se suman con cache.incr, sin leer y volver a
+  escribir: en memcached, Redis y LocMemCache ninguna carrera deja pasar intentos de más
+  (en los cachés de archivos o de BD incr sí es un get/set). Un intento rechazado se
+  descuenta con cache.decr; mientras tanto, uno concurrente puede verlo y ser rechazado
+  de más, nunca admitido de más.
+- Deben vivir en un caché compartido entre procesos: con LocMemCache cada worker lleva
+  su propia cuenta y el límite real se multiplica por la cantidad de workers. El chequeo
+  miAppUsuario.W001 lo advierte al arrancar con DEBUG=False.
+- Un inicio de sesión exitoso reinicia el contador de su email.
+
+Los contadores (intentos, limitados, fallidos, exitosos) se acumulan en el mismo caché
+y se consultan con `contadores()` (endpoint de métricas de la API).
+"""
+
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Tags, Warning, register
+
+CONTADORES = ('intentos', 'limitados_ip', 'limitados_email', 'fallidos', 'exitosos')
+
+
+def _limite(tipo):
+    """(capacidad, intentos por segundo) de los contadores de `tipo` ('ip' o 'email')."""
+    capacidad = getattr(settings, f'LOGIN_LIMITE_{tipo.upper()}_CAPACIDAD', 20 if tipo == 'ip' else 5)
+    por_minuto = getattr(settings, f'LOGIN_LIMITE_{tipo.upper()}_POR_MINUTO', 10 if tipo == 'ip' else 2)
+    return capacidad, por_minuto / 60
+
+
+def _ventana(tipo, ahora):
+    """(inicio, duración en segundos) de la ventana en curso para `tipo`."""
+    capacidad, tasa = _limite(tipo)
+    duracion = max(math.ceil(capacidad / tasa), 1)
+    return int(ahora // duracion) * duracion, duracion
+
+
+def _llave(tipo, valor, inicio):
+    # Hash: el email o la IP no siempre son llaves válidas (memcached) ni deben quedar en claro
+    return f'login:ventana:{tipo}:{hashlib.sha256(valor.encode()).hexdigest()[:32]}:{inicio}'
+
+
+def cache_no_compartido():
+    """True si el caché por defecto vive en cada proceso (o no guarda nada)."""
+    return isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+@register(Tags.caches, Tags.security)
+def revisar_cache(app_configs, **kwargs):
+    if settings.DEBUG or not cache_no_compartido():
+        return []
+    return [Warning(
+        'El límite de intentos de inicio de sesión usa un caché por proceso: cada worker '
+        'cuenta por separado y el límite efectivo se multiplica por la cantidad de workers.',
+        hint='Configure CACHE_BACKEND con memcached o Redis (ver CACHES en settings).',
+        id='miAppUsuario.W001',
+    )]
+
+
+def ip_cliente(request):
+    """
+    IP del cliente. Detrás de LOGIN_PROXIES_CONFIABLES proxies se toma de X-Forwarded-For
+    (la que agregó el primero de ellos); sin proxies, REMOTE_ADDR, que el cliente no controla.
+    """
+    proxies = getattr(settings, 'LOGIN_PROXIES_CONFIABLES', 0)
+    if proxies:
+        reenviadas = [ip.strip() for ip in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if ip.strip()]
+        if len(reenviadas) >= proxies:
+            return reenviadas[-proxies]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _incrementar(llave, timeout):
+    """Suma uno al contador `llave` (creándolo con `timeout`) y retorna su valor nuevo."""
+    cache.add(llave, 0, timeout)
+    try:
+        return cache.incr(llave)
+    except ValueError:
+        # El contador venció entre add e incr
+        cache.add(llave, 1, timeout)
+        return 1
+
+
+def _tomar_intento(tipo, valor, ahora):
+    """Cuenta un intento; retorna 0 si cabe, o los segundos que faltan para que quepa."""
+    capacidad, _ = _limite(tipo)
+    inicio, duracion = _ventana(tipo, ahora)
+    llave = _llave(tipo, valor, inicio)
+    # El contador se sigue leyendo durante la ventana siguiente, como la anterior
+    actual = _incrementar(llave, 2 * duracion)
+    anterior = cache.get(_llave(tipo, valor, inicio - duracion), 0)
+    transcurrido = (ahora - inicio) / duracion
+    if anterior * (1 - transcurrido) + actual <= capacidad:
+        return 0
+
+    # Un intento rechazado no consume (como el balde sin fichas)
+    try:
+        cache.decr(llave)
+    except ValueError:
+        pass
+    previos = actual - 1
+    if previos < capacidad:
+        # Cabe en esta ventana cuando el peso de la anterior baje lo suficiente
+        espera = inicio + duracion * (1 - (capacidad - previos - 1) / anterior) - ahora
+    else:
+        # En la siguiente, cuando los de ésta (que pasan a ser la anterior) pesen menos
+        espera = inicio + duracion * (2 - (capacidad - 1) / previos) - ahora
+    return max(math.ceil(espera), 1)
+
+
+def _contar(nombre):
+    _incrementar(f'login:contador:{nombre}', None)
+
+
+def intento_login(request, email):
+    """
+    Registra un intento de inicio de sesión antes de verificar la contraseña.
+
+    Retorna 0 si el intento puede seguir, o los segundos que debe esperar el cliente
+    (el intento no se procesa; un intento rechazado por su IP no cuenta para el email).
+    """
+    email = (email or '').strip().lower()
+    ahora = time.time()
+    _contar('intentos')
+    espera = _tomar_intento('ip', ip_cliente(request), ahora)
+    if espera:
+        _contar('limitados_ip')
+        return espera
+    if email:
+        espera = _tomar_intento('email', email, ahora)
+        if espera:
+            _contar('limitados_email')
+            return espera
+    return 0
+
+
+def resultado_login(email, exitoso):
+    """Registra el resultado de un intento que llegó a verificar la contraseña."""
+    if exitoso:
+        _contar('exitosos')
+        inicio, duracion = _ventana('email', time.time())
+        email = (email or '').strip().lower()
+        cache.delete_many([_llave('email', email, inicio), _llave('email', email, inicio - duracion)])
+    else:
+        _contar('fallidos')
+
+
+def contadores():
+    """Contadores acumulados y límites vigentes, para monitoreo."""
+    valores = cache.get_many([f'login:contador:{nombre}' for nombre in CONTADORES])
+    return {
+        'contadores': {nombre: valores.get(f'login:contador:{nombre}', 0) for nombre in CONTADORES},
+        'limites': {
+            tipo: {'capacidad': capacidad, 'por_minuto': round(tasa * 60, 3)}
+            for tipo in ('ip', 'email')
+            for capacidad, tasa in [_limite(tipo)]
+        },
+    }
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from miAppUsuario.models import TokenApi, Usuario
+
+
+class Command(BaseCommand):
+    help = 'Crea, revoca o lista los tokens de acceso a la API JSON (miAppCalificacion/api.py).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('accion', choices=['crear', 'revocar', 'listar'])
+        parser.add_argument('--email', help='Usuario dueño del token (crear).')
+        parser.add_argument('--nombre', default='', help='Sistema o integración que usará el token (crear).')
+        parser.add_argument('--prefijo', help='Prefijo del token a revocar.')
+
+    def handle(self, *args, **options):
+        if options['accion'] == 'crear':
+            if not options['email']:
+                raise CommandError('Indique el usuario con --email.')
+            usuario = Usuario.objects.filter(email=options['email']).first()
+            if usuario is None:
+                raise CommandError(f"No existe el usuario {options['email']}.")
+            token, clave = TokenApi.generar(usuario, options['nombre'] or 'API')
+            self.stdout.write(self.style.SUCCESS(f'Token {token.prefijo}… creado para {usuario.email}.'))
+            self.stdout.write('Guarde esta clave; no se volverá a mostrar:')
+            self.stdout.write(clave)
+
+        elif options['accion'] == 'revocar':
+            if not options['prefijo']:
+                raise CommandError('Indique el token con --prefijo.')
+            revocados = TokenApi.objects.filter(prefijo=options['prefijo'], activo=True).update(activo=False)
+            if not revocados:
+                raise CommandError(f"No hay tokens activos con prefijo {options['prefijo']}.")
+            self.stdout.write(self.style.SUCCESS(f'{revocados} token(s) revocado(s).'))
+
+        else:
+            for token in TokenApi.objects.select_related('usuario'):
+                estado = 'activo' if token.activo else 'revocado'
+                ultimo = token.ultimo_uso.strftime('%Y-%m-%d %H:%M') if token.ultimo_uso else 'nunca'
+                self.stdout.write(f'{token.prefijo}  {token.usuario.email:<30} {token.nombre:<25} {estado:<9} último uso: {ultimo}')
@@ -0,0 +1,33 @@
+from django.db import migrations
+
+# Ver miAppCalificacion/migrations/0004_indices_prefijo.py
+INDICES = [
+    ('rol_nombre_prefijo_idx', 'miAppUsuario_rol', 'nombre'),
+]
+
+
+def crear_indices(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for nombre, tabla, campo in INDICES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{nombre}" ON "{tabla}" (UPPER("{campo}"::text) text_pattern_ops)'
+        )
+
+
+def eliminar_indices(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for nombre, _, _ in INDICES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{nombre}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miAppUsuario', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indices, eliminar_indices),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.0.6 on 2026-10-18 22:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miAppUsuario', '0002_indices_prefijo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auditoria',
+            name='sha256',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='auditoria',
+            name='tipo',
+            field=models.CharField(blank=True, choices=[('FACTOR', 'Carga masiva de factores'), ('MONTO', 'Carga masiva de montos'), ('USUARIOS', 'Carga masiva de usuarios')], max_length=20),
+        ),
+        migrations.AddField(
+            model_name='auditoria',
+            name='usuario',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='cargas_auditadas', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
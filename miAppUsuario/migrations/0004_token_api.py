@@ -0,0 +1,34 @@
+# Generated by Django 5.0.6 on 2026-10-18 22:42
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miAppUsuario', '0003_auditoria_hash_usuario'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenApi',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=100, verbose_name='Sistema o integración')),
+                ('prefijo', models.CharField(db_index=True, max_length=8)),
+                ('clave_hash', models.CharField(max_length=64, unique=True)),
+                ('activo', models.BooleanField(default=True)),
+                ('creado_en', models.DateTimeField(default=django.utils.timezone.now)),
+                ('ultimo_uso', models.DateTimeField(blank=True, null=True)),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tokens_api', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Token de API',
+                'verbose_name_plural': 'Tokens de API',
+                'ordering': ['-creado_en'],
+            },
+        ),
+    ]
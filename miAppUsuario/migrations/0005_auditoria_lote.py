@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-18 22:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miAppUsuario', '0004_token_api'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auditoria',
+            name='lote',
+            field=models.UUIDField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-18 23:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miAppUsuario', '0005_auditoria_lote'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usuario',
+            name='actualizado_en',
+            field=models.DateTimeField(auto_now=True, verbose_name='Actualizado en'),
+        ),
+    ]
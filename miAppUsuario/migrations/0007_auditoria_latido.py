@@ -0,0 +1,23 @@
+# Generated by Django 5.0.6 on 2026-10-18 23:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miAppUsuario', '0006_actualizado_en'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auditoria',
+            name='intentos',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='auditoria',
+            name='latido_en',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,3 +1,6 @@
+import hashlib
+import secrets
+
 from django.db import models
 from django.contrib.auth.hashers import make_password, check_password
 from django.conf import settings
@@ -32,6 +35,7 @@ class Usuario(AbstractUser):
     email = models.EmailField(max_length=254, unique = True)
     telefono = models.CharField(max_length=30,blank=True, null=True , unique=True)
     fecha_creacion = models.DateTimeField(auto_now_add=True, null=True)
+    actualizado_en = models.DateTimeField(auto_now=True, verbose_name="Actualizado en")
 
     USERNAME_FIELD = 'email' 
     def has_perm(self, perm, obj=None):
@@ -67,7 +71,7 @@ class Usuario(AbstractUser):
     class Meta:
         ordering = ['first_name'] 
     def __str__(self):
-        return f"{self.nombre} {self.apellido} <{self.email}>"
+        return f"{self.first_name} {self.last_name} <{self.email}>"
     
 class Auditoria(models.Model):
     STATUS_PENDING = 'PENDING'
@@ -85,20 +89,95 @@ class Auditoria(models.Model):
         (STATUS_CANCELLED, 'Proceso cancelado'),
         (STATUS_FAILED, 'Cago mano')
     ]
+
+    TIPO_FACTOR = 'FACTOR'
+    TIPO_MONTO = 'MONTO'
+    TIPO_USUARIOS = 'USUARIOS'
+
+    TIPO_CHOICES = [
+        (TIPO_FACTOR, 'Carga masiva de factores'),
+        (TIPO_MONTO, 'Carga masiva de montos'),
+        (TIPO_USUARIOS, 'Carga masiva de usuarios'),
+    ]
     uploaded_at = models.DateTimeField(default=timezone.now)
     file = models.FileField(upload_to='imports/', null=True, blank=True)
     filename = models.CharField(max_length=255, blank=True)
+    # SHA-256 del archivo, calculado mientras se recibía (miAppCalificacion/subidas.py)
+    sha256 = models.CharField(max_length=64, blank=True, db_index=True)
+    tipo = models.CharField(max_length=20, choices=TIPO_CHOICES, blank=True)
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='cargas_auditadas'
+    )
     row_count = models.PositiveIntegerField(default=0)
     imported_count = models.PositiveIntegerField(default=0)
     updated_count = models.PositiveIntegerField(default=0)
     error_count = models.PositiveIntegerField(default=0)
     errors = models.JSONField(default=list, blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    # Cargas subidas juntas (varios archivos o un zip) comparten el lote
+    lote = models.UUIDField(null=True, blank=True, db_index=True)
+    # Trabajos de un lote (miAppCalificacion/trabajos.py): veces que se tomó y último latido
+    # del hilo que lo importa; un IMPORTING sin latidos recientes quedó huérfano
+    intentos = models.PositiveSmallIntegerField(default=0)
+    latido_en = models.DateTimeField(null=True, blank=True)
     class Meta:
         ordering = ['-uploaded_at']
     
     def __str__(self):
-        return f"histotico de {self.usuario} modificado en {self.modified_at}"
+        return f"histotico de {self.usuario} cargado en {self.uploaded_at}"
+
+    def finalizar(self, creados, actualizados, errores):
+        """Registra el resultado de la carga y la marca como importada (o fallida si no entró nada)."""
+        self.imported_count = creados
+        self.updated_count = actualizados
+        self.error_count = len(errores)
+        self.errors = errores
+        self.status = self.STATUS_IMPORTED if creados or actualizados or not errores else self.STATUS_FAILED
+        self.save(update_fields=['imported_count', 'updated_count', 'error_count', 'errors', 'status'])
+
+class TokenApi(models.Model):
+    """
+    Token de acceso a la API JSON (miAppCalificacion/api.py) para sistemas externos.
+
+    Sólo se guarda el SHA-256 de la clave; la clave se muestra una única vez al crearla
+    (comando `token_api crear`). El prefijo permite identificar el token sin exponerla.
+    """
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='tokens_api'
+    )
+    nombre = models.CharField(max_length=100, verbose_name="Sistema o integración")
+    prefijo = models.CharField(max_length=8, db_index=True)
+    clave_hash = models.CharField(max_length=64, unique=True)
+    activo = models.BooleanField(default=True)
+    creado_en = models.DateTimeField(default=timezone.now)
+    ultimo_uso = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-creado_en']
+        verbose_name = "Token de API"
+        verbose_name_plural = "Tokens de API"
+
+    def __str__(self):
+        return f"{self.nombre} ({self.prefijo}…) de {self.usuario}"
+
+    @staticmethod
+    def hash_clave(clave):
+        return hashlib.sha256(clave.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def generar(cls, usuario, nombre):
+        """Crea un token y retorna (token, clave en texto plano)."""
+        clave = secrets.token_urlsafe(32)
+        token = cls.objects.create(
+            usuario=usuario, nombre=nombre, prefijo=clave[:8], clave_hash=cls.hash_clave(clave),
+        )
+        return token, clave
 
 class Rol(models.Model):
     nombre = models.CharField(
@@ -0,0 +1,23 @@
+# miAppUsuario/signals.py
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from miAppCalificacion.versiones import (
+    incrementar_version, TABLA_CALIFICACIONES, TABLA_USUARIOS, TABLA_CATALOGOS
+)
+from .models import Usuario, Rol
+
+
+@receiver([post_save, post_delete], sender=Usuario)
+def invalidar_tablas_por_usuario(sender, update_fields=None, **kwargs):
+    # El login sólo actualiza last_login, que no se muestra en ninguna tabla
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    # El listado de calificaciones muestra el nombre del usuario creador
+    incrementar_version(TABLA_USUARIOS, TABLA_CALIFICACIONES)
+
+
+@receiver([post_save, post_delete], sender=Rol)
+def invalidar_tablas_por_rol(sender, **kwargs):
+    incrementar_version(TABLA_CATALOGOS, TABLA_USUARIOS)
@@ -1,3 +1,166 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from miAppCalificacion import esquemas
+from miAppCalificacion.models import Moneda, Pais
+
+from . import limites
+from .models import Auditoria, Rol, Usuario
+
+
+@override_settings(
+    LOGIN_LIMITE_IP_CAPACIDAD=4, LOGIN_LIMITE_IP_POR_MINUTO=2,
+    LOGIN_LIMITE_EMAIL_CAPACIDAD=2, LOGIN_LIMITE_EMAIL_POR_MINUTO=1,
+    LOGIN_PROXIES_CONFIABLES=0,
+)
+class LimitesLoginTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        # Al principio de una ventana de 120 s (IP) y de 120 s (email)
+        self.ahora = 1_200_000.0
+        reloj = mock.patch.object(limites.time, 'time', side_effect=lambda: self.ahora)
+        reloj.start()
+        self.addCleanup(reloj.stop)
+
+    def intento(self, email, ip='10.0.0.1'):
+        return limites.intento_login(RequestFactory().post('/', REMOTE_ADDR=ip), email)
+
+    def test_email_admite_su_capacidad_y_luego_el_ritmo(self):
+        self.assertEqual([self.intento('a@b.cl') for _ in range(2)], [0, 0])
+        # A 1 por minuto, la siguiente ficha llega en 60 s; el rechazo no consume
+        self.assertEqual(self.intento('A@b.cl '), 180)
+        self.assertEqual(self.intento('a@b.cl'), 180)
+
+        self.ahora += 179
+        self.assertGreater(self.intento('a@b.cl'), 0)
+        self.ahora += 1
+        self.assertEqual(self.intento('a@b.cl'), 0)
+
+    def test_rafaga_en_el_borde_de_la_ventana_no_se_duplica(self):
+        # Capacidad completa al final de una ventana de 120 s...
+        self.ahora += 119
+        self.assertEqual([self.intento('a@b.cl') for _ in range(2)], [0, 0])
+
+        # ...y al comienzo de la siguiente ya no queda nada que gastar
+        self.ahora += 2
+        self.assertEqual(self.intento('a@b.cl'), 59)
+        # Un minuto después de la ráfaga hay una ficha, como en un balde
+        self.ahora += 59
+        self.assertEqual([self.intento('a@b.cl') for _ in range(2)], [0, 60])
+
+    def test_ip_no_duplica_la_rafaga_en_el_borde(self):
+        self.ahora += 119
+        self.assertEqual([self.intento(f'u{i}@b.cl') for i in range(4)], [0, 0, 0, 0])
+
+        self.ahora += 2
+        self.assertGreater(self.intento('otro@b.cl'), 0)
+
+    def test_ip_limita_aunque_cambie_el_email(self):
+        esperas = [self.intento(f'u{i}@b.cl') for i in range(5)]
+
+        self.assertEqual(esperas[:4], [0, 0, 0, 0])
+        self.assertGreater(esperas[4], 0)
+        self.assertEqual(self.intento('otro@b.cl', ip='10.0.0.2'), 0)
+
+    def test_rechazo_por_ip_no_cuenta_para_el_email(self):
+        for i in range(4):
+            self.intento(f'u{i}@b.cl')
+        self.intento('a@b.cl')
+
+        self.assertEqual(self.intento('a@b.cl', ip='10.0.0.2'), 0)
+
+    def test_inicio_exitoso_reinicia_el_email(self):
+        self.intento('a@b.cl')
+        self.intento('a@b.cl')
+        limites.resultado_login('a@b.cl', True)
+
+        self.assertEqual(self.intento('a@b.cl'), 0)
+        self.assertEqual(limites.contadores()['contadores']['exitosos'], 1)
+
+    def test_chequeo_de_cache_por_proceso(self):
+        with self.settings(DEBUG=False):
+            self.assertEqual([aviso.id for aviso in limites.revisar_cache(None)], ['miAppUsuario.W001'])
+        with self.settings(DEBUG=True):
+            self.assertEqual(limites.revisar_cache(None), [])
+
+
+class AutocompletarCatalogosTests(TestCase):
+    URLS = ('usuarios:autocompletar_roles', 'calificaciones:autocompletar_paises')
+
+    @classmethod
+    def setUpTestData(cls):
+        pais = Pais.objects.create(
+            nombre='Chile', codigo_iso='CL', moneda_local=Moneda.objects.create(codigo_iso='CLP', nombre='Peso chileno'),
+        )
+        for nombre in ('Administrador', 'Analista'):
+            Usuario.objects.create_user(
+                f'{nombre.lower()}@ejemplo.cl', 'clave-segura-123', first_name=nombre, pais_usuario=pais,
+                rol_usuario=Rol.objects.create(nombre=nombre, descripcion=nombre),
+            )
+
+    def test_sin_sesion_redirige_al_login(self):
+        for url in self.URLS:
+            with self.subTest(url=url):
+                respuesta = self.client.get(reverse(url), {'q': 'a'})
+                self.assertEqual(respuesta.status_code, 302)
+                self.assertIn('login', respuesta.url)
+
+    def test_solo_el_administrador_lista_los_catalogos(self):
+        self.client.force_login(Usuario.objects.get(email='analista@ejemplo.cl'))
+        for url in self.URLS:
+            with self.subTest(url=url):
+                self.assertRedirects(self.client.get(reverse(url)), '/forbidden/', fetch_redirect_response=False)
+
+        self.client.force_login(Usuario.objects.get(email='administrador@ejemplo.cl'))
+        respuesta = self.client.get(reverse('usuarios:autocompletar_roles'), {'q': 'ana'})
+        self.assertEqual([opcion['texto'] for opcion in respuesta.json()['resultados']], ['Analista'])
+
+
+def libro(encabezados, filas):
+    """Bytes de un .xlsx con una hoja: los encabezados y las filas dadas."""
+    from openpyxl import Workbook
+
+    hoja_libro = Workbook()
+    hoja = hoja_libro.active
+    hoja.append(encabezados)
+    for fila in filas:
+        hoja.append(fila)
+    destino = io.BytesIO()
+    hoja_libro.save(destino)
+    return destino.getvalue()
+
+
+class CargaUsuariosTests(TestCase):
+    def setUp(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio, ignore_errors=True)
+        ajustes = self.settings(MEDIA_ROOT=directorio)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def subir(self, contenido):
+        return self.client.post(reverse('usuarios:create'), {
+            'bulk_upload': 'true', 'excel_file': SimpleUploadedFile('usuarios.xlsx', contenido),
+        })
+
+    def test_archivo_sin_las_columnas_no_deja_auditoria(self):
+        respuesta = self.subir(libro(['nombre', 'email'], [['Juan', 'juan@ejemplo.cl']]))
+
+        self.assertRedirects(respuesta, reverse('usuarios:create'), fetch_redirect_response=False)
+        self.assertFalse(Auditoria.objects.exists())
+
+    def test_error_inesperado_finaliza_la_auditoria(self):
+        contenido = libro(esquemas.USUARIOS.encabezados, [['Juan', 'Pérez', 'juan@ejemplo.cl', '', 30, 1, 1, 'x']])
+        with mock.patch('miAppUsuario.views.agrupar_versiones', side_effect=RuntimeError('sin conexión')):
+            self.subir(contenido)
+
+        auditoria = Auditoria.objects.get()
+        self.assertEqual((auditoria.status, auditoria.errors), (Auditoria.STATUS_FAILED, ['sin conexión']))
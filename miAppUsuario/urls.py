@@ -9,4 +9,6 @@ urlpatterns = [
     path('ver/', views.read, name='read'),
     path('editar/<int:pk>/', views.edit, name='edit'), 
     path('eliminar/<int:pk>/', views.delete, name='delete'),
+    path('autocompletar/roles/', views.autocompletar_roles, name='autocompletar_roles'),
+    path('metricas/login/', views.metricas_login, name='metricas_login'),
 ]
\ No newline at end of file
@@ -1,5 +1,15 @@
+from datetime import timedelta
+from functools import wraps
+
+from asgiref.sync import sync_to_async
 from django.contrib.auth import get_user_model
-from .models import Usuario
+from django.contrib.auth.views import redirect_to_login
+from django.shortcuts import redirect
+from django.http import JsonResponse
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+
+from .models import Usuario, TokenApi
 # -----------------------------------------------
 # FUNCIONES DE VERIFICACIÓN INDIVIDUAL
 # -----------------------------------------------
@@ -50,4 +60,68 @@ def has_access(user, required_roles):
     return False
 
 # Nota: Asegúrate de que tu modelo Usuario sea importado correctamente
-# y que el campo 'rol' apunte a tu modelo 'Rol'.
\ No newline at end of file
+# y que el campo 'rol' apunte a tu modelo 'Rol'.
+
+
+def acceso_async(required_roles=None):
+    """
+    Equivalente de @login_required + @user_passes_test(has_access) para vistas async.
+
+    Los decoradores de Django 5.0 no aceptan vistas async. Sin sesión redirige al login;
+    con `required_roles` y sin el rol (misma regla que has_access), a /forbidden/.
+    Deja el usuario cargado en request.user, así la vista no vuelve a consultarlo.
+    """
+    def decorador(vista):
+        @wraps(vista)
+        async def envoltura(request, *args, **kwargs):
+            user = await request.auser()
+            request.user = user
+            if not user.is_authenticated:
+                return redirect_to_login(request.get_full_path())
+            if required_roles is not None and not await sync_to_async(has_access)(user, required_roles):
+                return redirect('/forbidden/')
+            return await vista(request, *args, **kwargs)
+
+        return envoltura
+    return decorador
+
+
+# -----------------------------------------------
+# AUTENTICACIÓN POR TOKEN (API)
+# -----------------------------------------------
+
+# Se registra el uso de un token a lo más una vez por este intervalo, no en cada petición
+INTERVALO_ULTIMO_USO = timedelta(minutes=5)
+
+
+def token_requerido(required_roles):
+    """
+    Decorador para las vistas de la API: autentica con 'Authorization: Bearer <clave>'.
+
+    Responde 401 (JSON) sin token válido y 403 si el rol del dueño no está en
+    `required_roles` (misma regla que has_access). Sin cookies de sesión no hay riesgo
+    CSRF, así que la vista queda exenta.
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(request, *args, **kwargs):
+            tipo, _, clave = request.headers.get('Authorization', '').partition(' ')
+            token = None
+            if tipo.lower() in ('bearer', 'token') and clave.strip():
+                token = TokenApi.objects.select_related('usuario').filter(
+                    clave_hash=TokenApi.hash_clave(clave.strip()), activo=True, usuario__is_active=True,
+                ).first()
+            if token is None:
+                return JsonResponse({'error': 'Token ausente o inválido.'}, status=401)
+            if not has_access(token.usuario, required_roles):
+                return JsonResponse({'error': 'El rol del usuario no tiene acceso a este recurso.'}, status=403)
+
+            ahora = timezone.now()
+            if token.ultimo_uso is None or ahora - token.ultimo_uso > INTERVALO_ULTIMO_USO:
+                TokenApi.objects.filter(pk=token.pk).update(ultimo_uso=ahora)
+            request.user = token.usuario
+            request.token_api = token
+            return vista(request, *args, **kwargs)
+
+        return csrf_exempt(envoltura)
+    return decorador
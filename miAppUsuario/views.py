@@ -1,5 +1,6 @@
 # miAppUsuario/views.py
 
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
 from django.utils import timezone
 from datetime import timedelta 
@@ -7,22 +8,34 @@ from django.contrib.auth import login, logout, authenticate
 from django.contrib import messages 
 from django.contrib.auth.hashers import make_password, check_password 
 from django.contrib.auth.decorators import login_required
-import pandas as pd 
 from django.db import IntegrityError
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+import math
 
-from .models import Usuario, Rol
+from .models import Usuario, Rol, Auditoria
+from . import limites
+from .utils import acceso_async, token_requerido
 from miAppCalificacion.models import Pais
 from .forms import UsuarioForm
+from miAppCalificacion.versiones import version_tabla, agrupar_versiones, TABLA_USUARIOS, TABLA_CATALOGOS
+from miAppCalificacion.utils import arespuesta_autocompletar
+from miAppCalificacion import esquemas
+from miAppCalificacion.subidas import con_subida_a_disco, motivo_rechazo, registrar_auditoria
+from miAppCalificacion.condicional import get_condicional
+from miProyecto.routers import lectura_en_replica
 
-def home(request):
+@lectura_en_replica
+async def home(request):
     siete_dias_atras = timezone.now() - timedelta(days=7)
-    total_registros = Usuario.objects.count()
+    # Con ASGI los conteos esperan a la base sin ocupar un hilo por petición
+    total_registros = await Usuario.objects.acount()
     
-    registros_recientes = Usuario.objects.filter(
+    registros_recientes = await Usuario.objects.filter(
         fecha_creacion__gte=siete_dias_atras
-    ).count()
+    ).acount()
 
-    usuarios_activos = Usuario.objects.filter(is_active=True).count()
+    usuarios_activos = await Usuario.objects.filter(is_active=True).acount()
     
     context = {
         'total_registros': total_registros,
@@ -30,11 +43,18 @@ def home(request):
         'usuarios_activos': usuarios_activos
     }
     
-    return render(request, 'home.html', context)
+    # render lee la sesión (mensajes, usuario del menú) con el ORM síncrono
+    return await sync_to_async(render)(request, 'home.html', context)
 
 
+@con_subida_a_disco
 def create(request):
     if request.method == "POST":
+        # El handler de subida corta los archivos que superan el límite mientras se reciben
+        rechazo = motivo_rechazo(request)
+        if rechazo:
+            messages.error(request, rechazo)
+            return redirect('usuarios:create')
 
         if 'excel_file' in request.FILES and request.POST.get('bulk_upload') == 'true':
             excel_file = request.FILES['excel_file']
@@ -43,53 +63,60 @@ def create(request):
                 messages.error(request, 'El archivo debe ser de formato Excel (.xlsx o .xls).')
                 return redirect('usuarios:create')
             
+            # pandas se importa recién aquí, con la primera carga (ver miAppCalificacion/importacion.py)
+            from miAppCalificacion import importacion
+
+            auditoria = None
             try:
-                df = pd.read_excel(excel_file)
-                df = df.fillna('')
-                
-                columnas_esperadas = ['nombre', 'apellido', 'email', 'telefono', 'edad', 'rol_id', 'pais_id', 'contraseña']
-                
-                if not all(col in df.columns for col in columnas_esperadas):
-                    messages.error(request, 'El archivo Excel debe contener las columnas: nombre, apellido, email, telefono, edad, rol_id, pais_id, contraseña.')
+                df = importacion.leer_archivo(excel_file, esquemas.USUARIOS, importacion.EXTENSIONES_EXCEL)
+                # Un archivo sin las columnas no se registra: no hay nada que importar
+                if esquemas.USUARIOS.faltantes(df.columns):
+                    messages.error(request, f'El archivo Excel debe contener las columnas: {", ".join(esquemas.USUARIOS.encabezados)}.')
                     return redirect('usuarios:create')
 
+                auditoria = registrar_auditoria(request, excel_file, Auditoria.TIPO_USUARIOS, len(df))
+
                 usuarios_creados = 0
                 errores = []
                 
-                for index, row in df.iterrows():
-                    try:
-                        rol_obj = Rol.objects.get(pk=row['rol_id'])
-                        pais_obj = Pais.objects.get(pk=row['pais_id'])
+                # Un solo cambio de versión de la tabla de usuarios por carga, no uno por fila
+                with agrupar_versiones():
+                    for index, row in df.iterrows():
+                        try:
+                            rol_obj = Rol.objects.get(pk=row['ROL_ID'])
+                            pais_obj = Pais.objects.get(pk=row['PAIS_ID'])
                         
 
-                        nuevo_usuario = Usuario(
-                            first_name=row['nombre'],
-                            last_name=row['apellido'],
-                            email=row['email'],
-                            telefono=row['telefono'],
-                            edad=row['edad'],
-                            rol_usuario=rol_obj,
-                            pais_usuario=pais_obj,
-                            is_active=True, 
-                            fecha_creacion=timezone.now()
-                        )
+                            nuevo_usuario = Usuario(
+                                first_name=importacion.a_texto(row['NOMBRE']),
+                                last_name=importacion.a_texto(row['APELLIDO']),
+                                email=importacion.a_texto(row['EMAIL']),
+                                telefono=importacion.a_texto(row['TELEFONO']) or None,
+                                edad=importacion.a_entero_o_nulo(row['EDAD']),
+                                rol_usuario=rol_obj,
+                                pais_usuario=pais_obj,
+                                is_active=True, 
+                                fecha_creacion=timezone.now()
+                            )
                         
-                        nuevo_usuario.set_password(row['contraseña'])
+                            nuevo_usuario.set_password(importacion.a_texto(row['CONTRASENA']))
                         
-                        nuevo_usuario.save()
+                            nuevo_usuario.save()
                         
-                        usuarios_creados += 1
+                            usuarios_creados += 1
                         
-                    except Rol.DoesNotExist:
-                        errores.append(f"Fila {index + 2}: El Rol con ID {row['rol_id']} no existe.")
-                    except Pais.DoesNotExist:
-                        errores.append(f"Fila {index + 2}: El País con ID {row['pais_id']} no existe.")
-                    except IntegrityError:
-                        errores.append(f"Fila {index + 2}: Error de integridad (ej. email duplicado) para {row['email']}.")
-                    except Exception as e:
-                        errores.append(f"Fila {index + 2}: Error desconocido al crear usuario. {e}")
+                        except Rol.DoesNotExist:
+                            errores.append(f"Fila {index + 2}: El Rol con ID {row['ROL_ID']} no existe.")
+                        except Pais.DoesNotExist:
+                            errores.append(f"Fila {index + 2}: El País con ID {row['PAIS_ID']} no existe.")
+                        except IntegrityError:
+                            errores.append(f"Fila {index + 2}: Error de integridad (ej. email duplicado) para {row['EMAIL']}.")
+                        except Exception as e:
+                            errores.append(f"Fila {index + 2}: Error desconocido al crear usuario. {e}")
                 
 
+                auditoria.finalizar(usuarios_creados, 0, errores)
+
                 if usuarios_creados > 0:
                     messages.success(request, f'Carga masiva exitosa: {usuarios_creados} usuarios creados.')
                 
@@ -106,6 +133,9 @@ def create(request):
                 return redirect('usuarios:read')
             
             except Exception as e:
+                # La carga no queda PENDING: reclamar_huerfanos sólo revisa los lotes
+                if auditoria and auditoria.status == Auditoria.STATUS_PENDING:
+                    auditoria.finalizar(0, 0, [str(e)])
                 messages.error(request, f'Error al procesar el archivo Excel: {e}')
                 return redirect('usuarios:create')
                 
@@ -144,13 +174,18 @@ def create(request):
     }
     return render(request, 'create.html', context)
 
+@lectura_en_replica
+# Rol y país publican versión de TABLA_USUARIOS; la vigencia cubre "registros recientes" (últimos 7 días)
+@get_condicional(TABLA_USUARIOS, vigencia=3600)
 def read(request):
     """Muestra todos los registros de usuarios en una tabla."""
-    usuarios = Usuario.objects.select_related('pais_usuario').all()
+    # El queryset es perezoso: si el fragmento de la tabla está en caché no se consulta
+    usuarios = Usuario.objects.select_related('pais_usuario', 'rol_usuario').all()
     siete_dias_atras = timezone.now() - timedelta(days=7)
     
     context = {
         'usuarios': usuarios,
+        'version_tabla': version_tabla(TABLA_USUARIOS),
         'total_registros': Usuario.objects.count(),
         'registros_recientes': Usuario.objects.filter(fecha_creacion__gte=siete_dias_atras).count(),
         'usuarios_activos': Usuario.objects.filter(is_active=True).count()
@@ -223,7 +258,18 @@ def login_view(request):
     if request.method == 'POST':
         email_ingresado = request.POST.get('email')
         password_ingresada = request.POST.get('contraseña')
+
+        # Antes de authenticate: un intento limitado no calcula ningún hash (ver limites.py)
+        espera = limites.intento_login(request, email_ingresado)
+        if espera:
+            segundos = math.ceil(espera)
+            messages.error(request, f'Demasiados intentos de inicio de sesión. Intente nuevamente en {segundos} segundos.')
+            response = render(request, 'login.html', status=429)
+            response['Retry-After'] = str(segundos)
+            return response
+
         usuario = authenticate(request, email=email_ingresado, password=password_ingresada)
+        limites.resultado_login(email_ingresado, usuario is not None)
         
         if usuario is not None:
             if usuario.is_active:
@@ -239,6 +285,13 @@ def login_view(request):
     return render(request, 'login.html')
 
 
+@token_requerido(['Administrador'])
+@require_GET
+def metricas_login(request):
+    """Contadores del límite de intentos de inicio de sesión, para el sistema de monitoreo (token de la API)."""
+    return JsonResponse(limites.contadores())
+
+
 @login_required(login_url='login') 
 def admin_dashboard(request):
     rol_actual = request.user.rol_usuario.nombre if hasattr(request.user, 'rol_usuario') and request.user.rol_usuario else None
@@ -258,4 +311,10 @@ def admin_dashboard(request):
 def logout_view(request):
     logout(request)
     messages.success(request, 'Has cerrado sesión exitosamente.')
-    return redirect('login')
\ No newline at end of file
+    return redirect('login')
+
+
+@acceso_async(['Administrador'])
+async def autocompletar_roles(request):
+    """Opciones de Rol para el formulario de usuarios, que administra el rol Administrador."""
+    return await arespuesta_autocompletar(request, Rol.objects.all(), 'nombre', TABLA_CATALOGOS)
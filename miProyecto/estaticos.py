@@ -0,0 +1,36 @@
+# miProyecto/estaticos.py
+"""
+WhiteNoiseMiddleware que también es asíncrono.
+
+El de whitenoise sólo es síncrono: bajo ASGI, Django adapta toda la cadena que queda
+debajo con sync_to_async/async_to_sync y las vistas async terminan corriendo en un hilo.
+Con esta subclase la cadena completa es async y sólo se toca el sistema de archivos para
+servir un estático (o para buscarlo, con WHITENOISE_AUTOREFRESH en desarrollo).
+"""
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from whitenoise.middleware import WhiteNoiseMiddleware as _WhiteNoiseMiddleware
+
+
+class WhiteNoiseMiddleware(_WhiteNoiseMiddleware):
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
@@ -0,0 +1,160 @@
+# miProyecto/routers.py
+"""
+Lecturas en una réplica de PostgreSQL (opcional) con consistencia "leer lo que escribí".
+
+  - Las vistas de sólo lectura se marcan con @lectura_en_replica. Mientras se ejecutan,
+    RouterReplica envía sus consultas de lectura al alias REPLICA; todo lo demás
+    (escrituras, vistas sin marcar, comandos de manage.py) usa 'default'.
+  - Si no hay réplica configurada (DB_REPLICA_HOST / DB_REPLICA_NAME vacíos), el router
+    no hace nada y todo va a 'default'.
+  - Un usuario que acaba de escribir podría no ver su cambio en la réplica (hay retraso de
+    replicación). Por eso ReplicaMiddleware deja una cookie tras cualquier petición que
+    escribió en la BD, y mientras dure (REPLICA_PEGAJOSA_SEGUNDOS) ese navegador lee de
+    la primaria también en las vistas marcadas.
+  - Lo mismo vale para cambios de otros usuarios en tablas con fragmentos en caché: si la
+    versión de la tabla (miAppCalificacion/versiones.py) es más nueva que esa ventana, la
+    petición lee de la primaria, para no guardar en caché datos atrasados bajo la versión nueva.
+
+El estado se guarda en ContextVar, así que funciona igual con WSGI y ASGI; el decorador y
+el middleware aceptan vistas async sin pasar la petición por un hilo.
+"""
+
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA = 'replica'
+COOKIE_PRIMARIA = 'db_primaria'
+
+# True mientras se ejecuta una vista marcada con @lectura_en_replica
+_en_replica = ContextVar('en_replica', default=False)
+# Estado de la petición en curso (lo crea ReplicaMiddleware): {'primaria': bool, 'escritura': bool}
+_peticion = ContextVar('peticion_replica', default=None)
+
+
+def _segundos_pegajosa():
+    return getattr(settings, 'REPLICA_PEGAJOSA_SEGUNDOS', 10)
+
+
+def hay_replica():
+    return REPLICA in connections.databases
+
+
+def fijar_primaria():
+    """El resto de la petición en curso lee de la primaria (ej. datos recién modificados)."""
+    peticion = _peticion.get()
+    if peticion is not None:
+        peticion['primaria'] = True
+
+
+def es_reciente(marca_ns):
+    """True si `marca_ns` (time.time_ns()) cae dentro de la ventana de retraso de la réplica."""
+    return time.time_ns() - marca_ns < _segundos_pegajosa() * 1_000_000_000
+
+
+def lectura_en_replica(vista):
+    """Las consultas de lectura de la vista (GET/HEAD) se envían a la réplica si existe."""
+    if iscoroutinefunction(vista):
+        @wraps(vista)
+        async def envoltura_async(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return await vista(request, *args, **kwargs)
+            # sync_to_async copia el contexto al hilo: las consultas del ORM async ven la marca
+            token = _en_replica.set(True)
+            try:
+                return await vista(request, *args, **kwargs)
+            finally:
+                _en_replica.reset(token)
+
+        return envoltura_async
+
+    @wraps(vista)
+    def envoltura(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return vista(request, *args, **kwargs)
+        token = _en_replica.set(True)
+        try:
+            return vista(request, *args, **kwargs)
+        finally:
+            _en_replica.reset(token)
+
+    return envoltura
+
+
+class RouterReplica:
+    """Router de DATABASE_ROUTERS: lecturas marcadas a REPLICA, el resto a 'default'."""
+
+    def db_for_read(self, model, **hints):
+        if not _en_replica.get() or not hay_replica():
+            return None
+        peticion = _peticion.get()
+        if peticion and (peticion['primaria'] or peticion['escritura']):
+            return DEFAULT_DB_ALIAS
+        # Dentro de una transacción se lee de donde se escribe
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return REPLICA
+
+    def db_for_write(self, model, **hints):
+        peticion = _peticion.get()
+        if peticion is not None:
+            peticion['escritura'] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Ambos alias contienen los mismos datos
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # La réplica recibe el esquema por replicación, nunca por migrate
+        return False if db == REPLICA else None
+
+
+class ReplicaMiddleware:
+    """
+    Mantiene en la primaria, por unos segundos, a quien acaba de escribir.
+
+    Debe ir después de SessionMiddleware: así el guardado de la sesión (que ocurre al
+    salir de SessionMiddleware) no cuenta como escritura de la petición.
+
+    Es síncrono y asíncrono: con ASGI no obliga a Django a ejecutar la cadena en un hilo.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        peticion = {'primaria': COOKIE_PRIMARIA in request.COOKIES, 'escritura': False}
+        token = _peticion.set(peticion)
+        try:
+            response = self.get_response(request)
+        finally:
+            _peticion.reset(token)
+        return self._marcar(peticion, response)
+
+    async def __acall__(self, request):
+        peticion = {'primaria': COOKIE_PRIMARIA in request.COOKIES, 'escritura': False}
+        token = _peticion.set(peticion)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _peticion.reset(token)
+        return self._marcar(peticion, response)
+
+    def _marcar(self, peticion, response):
+        if peticion['escritura'] and hay_replica():
+            response.set_cookie(
+                COOKIE_PRIMARIA, '1', max_age=_segundos_pegajosa(), httponly=True, samesite='Lax',
+            )
+        return response
@@ -55,10 +55,16 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Sirve los estáticos con hash en el nombre con Cache-Control de largo plazo (immutable)
+    # y entrega las variantes .br/.gz precomprimidas según el Accept-Encoding del navegador.
+    # Subclase de whitenoise que además es async (miProyecto/estaticos.py)
+    'miProyecto.estaticos.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # Después de SessionMiddleware: lecturas en réplica y "leer lo que escribí" (miProyecto/routers.py)
+    'miProyecto.routers.ReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -96,11 +102,62 @@ WSGI_APPLICATION = 'miProyecto.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
-        'NAME': 'nuam_db',    
-        'USER': 'postgres',          
+        'NAME': env('DB_NAME', default='nuam_db'),
+        'USER': env('DB_USER', default='postgres'),
         'PASSWORD': env('DB_PASSWORD'),   
-        'HOST': 'localhost', 
-        'PORT': '5432',   
+        'HOST': env('DB_HOST', default='localhost'),
+        'PORT': env('DB_PORT', default='5432'),
+        # Conexiones persistentes: cada worker reutiliza su conexión durante DB_CONN_MAX_AGE
+        # segundos (0 = una por petición, None = sin límite) en vez de abrir una por petición.
+        # Con CONN_HEALTH_CHECKS se verifica al inicio de cada petición que siga viva.
+        'CONN_MAX_AGE': env.int('DB_CONN_MAX_AGE', default=60),
+        'CONN_HEALTH_CHECKS': env.bool('DB_CONN_HEALTH_CHECKS', default=True),
+    }
+}
+
+# Réplica de sólo lectura (opcional) para las vistas marcadas con @lectura_en_replica,
+# ver miProyecto/routers.py. Los valores no indicados se toman de 'default'; para probar
+# en local basta con DB_REPLICA_NAME apuntando a una segunda base en el mismo servidor.
+# En los tests la réplica es un espejo de 'default' (TEST.MIRROR).
+if env('DB_REPLICA_HOST', default='') or env('DB_REPLICA_NAME', default=''):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': env('DB_REPLICA_NAME', default=DATABASES['default']['NAME']),
+        'USER': env('DB_REPLICA_USER', default=DATABASES['default']['USER']),
+        'PASSWORD': env('DB_REPLICA_PASSWORD', default=DATABASES['default']['PASSWORD']),
+        'HOST': env('DB_REPLICA_HOST', default=DATABASES['default']['HOST']),
+        'PORT': env('DB_REPLICA_PORT', default=DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['miProyecto.routers.RouterReplica']
+
+# Segundos que un navegador sigue leyendo de la primaria después de escribir
+# (debe cubrir el retraso de replicación).
+REPLICA_PEGAJOSA_SEGUNDOS = env.int('REPLICA_PEGAJOSA_SEGUNDOS', default=10)
+
+# Límite de intentos de inicio de sesión (miAppUsuario/limites.py): contadores por IP y
+# por email en ventanas deslizantes, guardados en el caché (debe ser compartido entre
+# procesos, ver el chequeo miAppUsuario.W001). Se comportan como un balde de fichas: la
+# capacidad es la ráfaga tolerada (también en el borde entre ventanas) y POR_MINUTO el
+# ritmo sostenido; cada ventana dura CAPACIDAD / POR_MINUTO minutos.
+LOGIN_LIMITE_IP_CAPACIDAD = env.int('LOGIN_LIMITE_IP_CAPACIDAD', default=20)
+LOGIN_LIMITE_IP_POR_MINUTO = env.float('LOGIN_LIMITE_IP_POR_MINUTO', default=10)
+LOGIN_LIMITE_EMAIL_CAPACIDAD = env.int('LOGIN_LIMITE_EMAIL_CAPACIDAD', default=5)
+LOGIN_LIMITE_EMAIL_POR_MINUTO = env.float('LOGIN_LIMITE_EMAIL_POR_MINUTO', default=2)
+# Proxies de confianza delante de la aplicación (la IP se toma de X-Forwarded-For); 0 = ninguno
+LOGIN_PROXIES_CONFIABLES = env.int('LOGIN_PROXIES_CONFIABLES', default=0)
+
+
+# Cache
+# Por defecto memoria local. Con varios procesos (gunicorn, etc.) conviene FileBasedCache
+# (CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache y CACHE_LOCATION=/ruta)
+# para que las versiones de datos de las tablas (miAppCalificacion/versiones.py) se compartan.
+
+CACHES = {
+    'default': {
+        'BACKEND': env('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': env('CACHE_LOCATION', default='nuam-cache'),
     }
 }
 
@@ -140,6 +197,48 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
 STATIC_URL = 'static/'
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# collectstatic genera nombres con hash del contenido (base.3f2a1c.css) y sus variantes
+# comprimidas en gzip y brotli; el navegador puede cachearlos indefinidamente porque un
+# cambio en el CSS produce un nombre nuevo.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
+# Archivos de las cargas masivas (Auditoria.file)
+MEDIA_URL = 'media/'
+MEDIA_ROOT = env('MEDIA_ROOT', default=str(BASE_DIR / 'media'))
+
+# Tamaño máximo de un archivo de carga masiva; se controla mientras se recibe
+# (miAppCalificacion/subidas.py), sin esperar a que el archivo llegue completo.
+IMPORTACION_MAX_BYTES = env.int('IMPORTACION_MAX_BYTES', default=50 * 1024 * 1024)
+
+# Cargas por lote (varios archivos o un zip): archivos máximos por lote y trabajos de
+# importación que se ejecutan a la vez por proceso (miAppCalificacion/trabajos.py).
+IMPORTACION_MAX_ARCHIVOS = env.int('IMPORTACION_MAX_ARCHIVOS', default=50)
+IMPORTACION_WORKERS = env.int('IMPORTACION_WORKERS', default=4)
+# Cada cuánto renueva su latido un trabajo en curso, y cuántas veces se retoma un trabajo
+# cuyo proceso murió antes de marcarlo fallido (comando procesar_cargas_pendientes).
+IMPORTACION_LATIDO_SEGUNDOS = env.int('IMPORTACION_LATIDO_SEGUNDOS', default=60)
+IMPORTACION_MAX_INTENTOS = env.int('IMPORTACION_MAX_INTENTOS', default=3)
+
+# Filas del mismo archivo con la misma llave (miAppCalificacion/importacion.consolidar_duplicados):
+# 'ultima' conserva la última, 'primera' la primera y 'rechazar' las rechaza todas.
+IMPORTACION_DUPLICADOS = env('IMPORTACION_DUPLICADOS', default='ultima')
+
+# Particionamiento anual de CalificacionTributaria en PostgreSQL (miAppCalificacion/particiones.py).
+# Se aplica al migrar; las particiones de años siguientes se crean con el comando
+# `particiones_calificaciones` (programarlo en cron).
+CALIFICACIONES_PARTICIONADAS = env.bool('CALIFICACIONES_PARTICIONADAS', default=False)
+
+# Snapshot columnar (.npy) de la matriz de factores, ver miAppCalificacion/matriz_factores.py
+FACTORES_SNAPSHOT_DIR = BASE_DIR / 'snapshots' / 'factores'
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -15,12 +15,22 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
+from django.contrib.admin import AdminSite
 from django.urls import path,include
 from miAppUsuario import views
-from django.contrib.auth.decorators import user_passes_test
 from miAppUsuario.utils import is_admin
+
+
+def _permiso_admin(request):
+    # Además de is_active/is_staff (AdminSite.has_permission), el admin exige el rol Administrador
+    return AdminSite.has_permission(admin.site, request) and is_admin(request.user)
+
+
+# admin.site.urls es un include, no una vista: no se puede envolver con user_passes_test
+admin.site.has_permission = _permiso_admin
+
 urlpatterns = [
-    path('admin/', user_passes_test(is_admin, login_url='/calificaciones/menu/')(admin.site.urls)),
+    path('admin/', admin.site.urls),
     path('usuarios/', include('miAppUsuario.urls', namespace='usuarios')),
     path('', views.login_view, name='login'), 
     path('admin-dashboard/', views.admin_dashboard, name='admin_dashboard'),